@@ -125,6 +125,7 @@ class ActionMethod():
         p_revert_on_failure:bool,
         p_revert_on_success:bool,
         p_assertion_to_support:Assertion=None,
+        p_timelines:typing.Dict[typing.Tuple[str,typing.Tuple[str,...]],typing.Iterable[Assertion]]=None,
     ) -> typing.Iterable[typing.Tuple[Assertion,Assertion]]:
         '''
         Attempts to propagate the constraints necessary to enforce applicability of this action/method at the
@@ -144,6 +145,10 @@ class ActionMethod():
                 The assertions describing the situation
             p_assertion_to_support (Assertion, None by default):
                 An assertion that must be supported by one of the action/method's assertions. Can be None.
+            p_timelines (Dict[head, Iterable[Assertion]], None by default):
+                The assertions of p_assertions grouped by head (see Chronicle.m_timelines). Can be None.
+                If specified, only the timeline of each of the action/method's assertions is considered
+                (as assertions with different heads can't support each other) instead of all of p_assertions.
             p_backtrack (bool, True by default):
                 Whether to backtrack the changes propagated to the constraint network (in case it is successful).
                 In other words, whether to "apply" the action/method (enforce its applicability) or simply check if
@@ -173,7 +178,11 @@ class ActionMethod():
             b2 = (p_assertion_to_support == None)
             for i_act_or_meth_asrt in self.assertions:
                 b1 = False
-                for i_chronicle_asrt in p_assertions:
+                if p_timelines is not None:
+                    candidate_asrts = p_timelines.get(i_act_or_meth_asrt.head, ())
+                else:
+                    candidate_asrts = p_assertions
+                for i_chronicle_asrt in candidate_asrts:
                     if i_act_or_meth_asrt == i_chronicle_asrt: # just in case
                         break
                     # the action/method must have at least one assertion (any, not necessarily starting at the same time as it)
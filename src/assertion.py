@@ -5,7 +5,9 @@ sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-play
 
 import typing
 from enum import Enum
+import numpy as np
 from src.utility.new_int_id import new_int_id
+from src.constraints.domain import Domain
 from src.constraints.constraints import ConstraintNetwork, ConstraintType
 
 ############################################
@@ -60,6 +62,8 @@ class Assertion():
         self._time_end = te
         self._sv_val = p_sv_val
         self._sv_val_sec = p_sv_val_sec
+        # state variable name and parameter names, identifying the timeline of this assertion (see Chronicle)
+        self._head = (p_sv_name, tuple(param[0] for param in p_sv_params))
 
     @property
     def type(self) -> AssertionType:
@@ -73,6 +77,10 @@ class Assertion():
     def sv_params(self) -> typing.Tuple[typing.Tuple[str,str],...]:
         return self._sv_params
 
+    @property
+    def head(self) -> typing.Tuple[str,typing.Tuple[str,...]]:
+        return self._head
+
     @property
     def time_start(self) -> str:
         return self._time_start
@@ -89,6 +97,18 @@ class Assertion():
     def sv_val_sec(self) -> str:
         return self._sv_val_sec
 
+    @property
+    def objvars(self) -> typing.Tuple[str,...]:
+        # object variables on which conflicts with (or supports by) this assertion depend
+        res = tuple(param[1] for param in self._sv_params) + (self._sv_val,)
+        if self._sv_val_sec is not None:
+            res += (self._sv_val_sec,)
+        return res
+
+    @property
+    def tempvars(self) -> typing.Tuple[str,str]:
+        return (self._time_start, self._time_end)
+
     def has_same_head(self, p_other_assertion:Assertion) -> bool:
         '''
         Determines whether this assertion and the argument assertion have the same head
@@ -99,14 +119,7 @@ class Assertion():
         Returns:
             True if this assertion and the argument assertion have the same head
         '''
-        if self.sv_name != p_other_assertion.sv_name:
-            return False
-        if len(self.sv_params) != len(p_other_assertion.sv_params):
-            return False
-        for _i in range(len(self.sv_params)):
-            if self.sv_params[_i][0] != p_other_assertion.sv_params[_i][0]:
-                return False
-        return True
+        return self._head == p_other_assertion._head
     
     def propagate_causal_support_by(self,
         p_test_supporter:Assertion,
@@ -151,7 +164,12 @@ class Assertion():
             return False
         # check if the end timepoint of the tested supporter and start timepoint of the tested supportee are unified
         # and if the values (variables, describing the values) of the assertion's sv are unified
+        # (the temporal constraints are first probed on the minimal network, to avoid propagating them if they can't be satisfied)
+        temporally_possible = p_cn.tempvars_probe([
+            (p_test_supporter.time_end, self.time_start, 0, False),
+            (self.time_start, p_test_supporter.time_end, 0, False)])[0]
         if (p_test_supporter.type == AssertionType.PERSISTENCE
+            and temporally_possible
             and p_cn.propagate_constraints([
                 (ConstraintType.TEMPORAL,(p_test_supporter.time_end, self.time_start, 0, False)),
                 (ConstraintType.TEMPORAL,(self.time_start, p_test_supporter.time_end, 0, False)),
@@ -163,6 +181,7 @@ class Assertion():
                 p_cn.backtrack()
             return True
         elif (p_test_supporter.type == AssertionType.TRANSITION
+            and temporally_possible
             and p_cn.propagate_constraints([
                 (ConstraintType.TEMPORAL,(p_test_supporter.time_end, self.time_start, 0, False)),
                 (ConstraintType.TEMPORAL,(self.time_start, p_test_supporter.time_end, 0, False)),
@@ -268,6 +287,86 @@ class Assertion():
                     return True
             return False
 
+# minimal number of pairs of assertions for which check_conflicts is vectorized
+_MIN_BATCH_PAIRS = 64
+
+def check_conflicts(
+    p_assertions1:typing.Sequence[Assertion],
+    p_assertions2:typing.Sequence[Assertion],
+    p_cn:ConstraintNetwork,
+) -> np.ndarray:
+    """
+    Batch (vectorized) version of Assertion.check_conflict, for all the pairs of assertions from two sequences (typically timelines, see Chronicle).
+    The timepoints and object variables of the assertions are gathered once, their minimal distances, unifications and unifiability
+    are queried as whole matrices (see ConstraintNetwork.tempvars_minimal_directed_distances, ConstraintNetwork.objvars_unified_pairwise
+    and ConstraintNetwork.objvars_unifiable_pairwise), and the conditions of check_conflict are then evaluated as boolean masks over all the pairs at once.
+    Arguments:
+        p_assertions1 (Sequence[Assertion]): assertions
+        p_assertions2 (Sequence[Assertion]): assertions
+        p_cn (ConstraintNetwork): constraint network to test against
+    Returns:
+        A boolean matrix whose element (i,j) is p_assertions1[i].check_conflict(p_assertions2[j], p_cn)
+    Side effects:
+        None
+    """
+    (n1, n2) = (len(p_assertions1), len(p_assertions2))
+    # the vectorized version has a fixed cost (of a few hundreds of microseconds), only worth it for enough pairs
+    if n1*n2 < _MIN_BATCH_PAIRS:
+        return np.array([[asrt1.check_conflict(asrt2, p_cn) for asrt2 in p_assertions2] for asrt1 in p_assertions1], dtype=bool).reshape(n1,n2)
+    heads = {}
+    heads1 = np.array([heads.setdefault(asrt.head, len(heads)) for asrt in p_assertions1], dtype=np.int64)
+    heads2 = np.array([heads.setdefault(asrt.head, len(heads)) for asrt in p_assertions2], dtype=np.int64)
+    # an assertion can't be conflicting with itself, nor with an assertion with a different head
+    res = ((heads1[:,None] == heads2[None,:])
+        & (np.array([id(asrt) for asrt in p_assertions1], dtype=np.int64)[:,None]
+            != np.array([id(asrt) for asrt in p_assertions2], dtype=np.int64)[None,:]))
+    if not res.any():
+        return res
+
+    # the parameters of the assertions must be unifiable
+    # (assertions with less parameters are padded with "any" variables, their pairs being already ruled out by their heads)
+    for i in range(max(len(asrt.sv_params) for asrt in list(p_assertions1) + list(p_assertions2))):
+        params1 = [asrt.sv_params[i][1] if i < len(asrt.sv_params) else Domain._ANY_VALUE_VAR for asrt in p_assertions1]
+        params2 = [asrt.sv_params[i][1] if i < len(asrt.sv_params) else Domain._ANY_VALUE_VAR for asrt in p_assertions2]
+        res &= p_cn.objvars_unifiable_pairwise(params1, params2)
+    if not res.any():
+        return res
+
+    # minimal distances between the starts (first half) and ends (second half) of the assertions, in both directions
+    # (dists21[x,y] being the distance from tps2[y] to tps1[x])
+    tps1 = np.array([asrt.time_start for asrt in p_assertions1] + [asrt.time_end for asrt in p_assertions1], dtype=object)
+    tps2 = np.array([asrt.time_start for asrt in p_assertions2] + [asrt.time_end for asrt in p_assertions2], dtype=object)
+    dists12 = p_cn.tempvars_minimal_directed_distances(tps1, tps2)
+    dists21 = p_cn.tempvars_minimal_directed_distances(tps2, tps1).T
+    same_tps = tps1[:,None] == tps2[None,:]
+    tps_unified = same_tps | ((dists12 == 0) & (dists21 == 0))
+    (s1_s2, s1_e2, e1_s2, e1_e2) = (np.s_[:n1,:n2], np.s_[:n1,n2:], np.s_[n1:,:n2], np.s_[n1:,n2:])
+
+    # the assertions' temporal windows possibly intersect
+    # (an infinite distance times a zero distance is undefined (nan), and doesn't count as an intersection, like in check_conflict)
+    with np.errstate(invalid='ignore'):
+        overlap = same_tps[s1_e2] | same_tps[e1_s2] | (dists12[s1_e2] * dists21[e1_s2] >= 0)
+
+    # unifications between the values (first half) and secondary values (second half) of the assertions
+    unified = p_cn.objvars_unified_pairwise(
+        [asrt.sv_val for asrt in p_assertions1] + [asrt.sv_val_sec for asrt in p_assertions1],
+        [asrt.sv_val for asrt in p_assertions2] + [asrt.sv_val_sec for asrt in p_assertions2])
+    # the value of one assertion is the secondary value of the other one (unified), and they are connected by the end of the latter
+    chained12 = unified[s1_e2] & tps_unified[s1_e2]
+    chained21 = unified[e1_s2] & tps_unified[e1_s2]
+
+    pers1 = np.array([asrt.type == AssertionType.PERSISTENCE for asrt in p_assertions1], dtype=bool)[:,None]
+    pers2 = np.array([asrt.type == AssertionType.PERSISTENCE for asrt in p_assertions2], dtype=bool)[None,:]
+    no_conflict = np.where(pers1,
+        np.where(pers2,
+            unified[s1_s2],
+            chained12 | (unified[s1_s2] & tps_unified[e1_s2])),
+        np.where(pers2,
+            chained21 | (unified[s1_s2] & tps_unified[s1_e2]),
+            (unified[s1_s2] & unified[e1_e2] & tps_unified[s1_s2] & tps_unified[e1_e2]) | chained12 | chained21))
+    res &= overlap & ~no_conflict
+    return res
+
 #class Timeline():
 #    m_sv_name:str
 #    m_assertions:typing.List[Assertion]
@@ -5,8 +5,10 @@ sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-play
 
 import typing
 from enum import Enum
-from copy import deepcopy
-from src.assertion import Assertion
+import numpy as np
+from src.assertion import Assertion, check_conflicts
+from src.utility.interval_index import IntervalIndex
+from src.utility.persistent_map import PersistentMap, PersistentSet
 from src.actionmethod import ActionMethod
 from src.constraints.constraints import ConstraintNetwork, ConstraintType
 from src.goal_node import GoalMode, GoalNode
@@ -19,23 +21,97 @@ from src.goal_node import GoalMode, GoalNode
 
 # A chronicle is a collection of temporal assertions and constraints on the variables appearing in them.
 # Often, temporal assertions on a particular state variable and constraints on them are called timeline.
-# We do not represent them explicitly, as we can do just fine representing temporal assertions and constraints directly,
-# however an explicit representation of timelines to group assertions by state variables could be beneficial if 
-# it proves to be more efficient algorithmically.
+# Timelines are represented explicitly by an index grouping the assertions by head (state variable name and parameter names, see Assertion.head),
+# as assertions with different heads can't conflict with or support each other. Searches for conflicts or supporters
+# (e.g. get_induced_conflicts) then only go through the relevant timeline instead of the whole chronicle.
+# Assertions must therefore be introduced through add_assertion, which maintains the index.
+
+# The conflicts of a chronicle (m_conflicts) can also be kept up to date after constraints are propagated (or backtracked) in its constraint network,
+# without re-examining all the pairs of assertions of each timeline (see update_conflicts). The assertions are indexed by the variables
+# (object variables and timepoints) they depend on, and the constraint network reports the variables which changed since the last update
+# (see ConstraintNetwork.pop_changed_vars). Only the pairs involving an assertion depending on one of them are examined again.
+# The conflicts are also indexed by assertion (see ConflictSet), so that the conflicts to replace are found without going through all of them.
+
+# The pairs of assertions of a timeline are checked in batches (see check_conflicts in src.assertion) : the timepoints and object variables
+# of the assertions are gathered in arrays, and the conditions for a conflict are evaluated as boolean masks over all the pairs at once.
+
+# Most pairs of assertions of a timeline can't conflict anyway, as they can't overlap in time. The temporal window of each assertion,
+# i.e. [earliest time of its start or end, latest time of its start or end] (relative to the reference timepoint, see ConstraintNetwork.tempvars_bounds)
+# is kept in an interval index per timeline (see src.utility.interval_index), and only the pairs of assertions whose windows intersect are checked.
+# Indeed, if the window of an assertion b ends before the window of an assertion a starts, then d(a.start,b.end) <= d(a.start,ref) + d(ref,b.end) < 0
+# and d(b.start,a.end) >= -d(a.end,b.start) >= -(d(a.end,ref) + d(ref,b.start)) > 0, so their temporal windows don't intersect (see Assertion.check_conflict).
+# The windows are updated along with the conflicts, from the timepoints which changed in the constraint network.
+
+# A chronicle is copied for each child of a search node (see planning_search), which then only modifies a few of its assertions, goal nodes, conflicts etc.
+# Its collections are therefore persistent maps and sets (see src.utility.persistent_map), sharing their structure with their copies :
+# copying a chronicle is constant time (its constraint network being forked, see ConstraintNetwork.fork), and each copy only pays for its own modifications.
+# The mutable values of these collections (goal nodes, timelines, sets of dependents, windows) are copied the first time they are accessed through a copy.
 
 # A chronicle expresses temporal knowledge and temporal evolution of multiple state variables
 
+class ConflictSet(PersistentSet):
+    """
+    Persistent set of conflicts (pairs of assertions), also indexed by assertion, so that the conflicts
+    involving some assertions (e.g. the ones affected by changes in the constraint network, see Chronicle.update_conflicts)
+    can be found without going through all the conflicts.
+    """
+
+    def __init__(self, p_conflicts:typing.Iterable[typing.Tuple[Assertion,Assertion]]=()):
+        # conflicts of the set, by assertion involved
+        self._by_assertion:PersistentMap = PersistentMap(p_copy_value=PersistentSet.copy)
+        super().__init__(p_conflicts)
+
+    def copy(self) -> ConflictSet:
+        res = ConflictSet()
+        res._map = self._map.copy()
+        res._by_assertion = self._by_assertion.copy()
+        return res
+
+    def add(self, p_conflict:typing.Tuple[Assertion,Assertion]) -> None:
+        if p_conflict not in self._map:
+            super().add(p_conflict)
+            for asrt in dict.fromkeys(p_conflict):
+                self._by_assertion.setdefault(asrt, PersistentSet()).add(p_conflict)
+
+    def discard(self, p_conflict:typing.Tuple[Assertion,Assertion]) -> None:
+        if p_conflict in self._map:
+            super().discard(p_conflict)
+            for asrt in dict.fromkeys(p_conflict):
+                conflicts = self._by_assertion[asrt]
+                conflicts.discard(p_conflict)
+                if len(conflicts) == 0:
+                    del self._by_assertion[asrt]
+
+    def involving(self, p_assertions:typing.Iterable[Assertion]) -> typing.Set[typing.Tuple[Assertion,Assertion]]:
+        """
+        Returns the conflicts of this set involving (at least) one of the specified assertions.
+        """
+        res:typing.Set[typing.Tuple[Assertion,Assertion]] = set()
+        for asrt in p_assertions:
+            res.update(self._by_assertion.get(asrt, ()))
+        return res
+
 class Chronicle():
 
     def __init__(self):
         # in bit-monnot 2022 there are also subtasks. adapting to subgoals seems weird, as subgoals can (are) already specified in unsupported assertions
 
-        self.m_goal_nodes: typing.Dict[Assertion, GoalNode] = {}
+        self.m_goal_nodes: typing.MutableMapping[Assertion, GoalNode] = PersistentMap(p_copy_value=GoalNode.copy_goal_node)
         # also could instead create "extended assertions" extended with the goal node constructs (mode etc) - unifying "assertions" with "goals"
 
-        self.m_assertions: typing.Dict[Assertion, bool] = {} # bool value : supported or not
+        self.m_assertions: typing.MutableMapping[Assertion, bool] = PersistentMap() # bool value : supported or not
+        # assertions of m_assertions grouped by head (in their order of introduction)
+        self.m_timelines: typing.MutableMapping[typing.Tuple[str,typing.Tuple[str,...]], typing.List[Assertion]] = PersistentMap(p_copy_value=list.copy)
+        # assertions of m_assertions indexed by the object variables and timepoints they depend on (see Assertion.objvars and Assertion.tempvars)
+        self.m_objvar_dependents: typing.MutableMapping[str, typing.MutableSet[Assertion]] = PersistentMap(p_copy_value=PersistentSet.copy)
+        self.m_tempvar_dependents: typing.MutableMapping[str, typing.MutableSet[Assertion]] = PersistentMap(p_copy_value=PersistentSet.copy)
+        # temporal windows of the assertions of m_assertions, indexed by timeline (same keys as m_timelines)
+        self.m_windows: typing.MutableMapping[typing.Tuple[str,typing.Tuple[str,...]], IntervalIndex] = PersistentMap(p_copy_value=IntervalIndex.copy)
+        # variables (object variables, timepoints) which changed in the constraint network and whose dependent assertions' conflicts
+        # haven't been updated yet (None : all of them, e.g. before the first update)
+        self._pending_changes: typing.Tuple[typing.MutableSet[str],typing.MutableSet[str]]|None = None
         
-        self.m_plan: typing.Dict[ActionMethod,ActionMethod] = {} # quick n dirty tree as an adjacency list
+        self.m_plan: typing.MutableMapping[ActionMethod,ActionMethod] = PersistentMap() # quick n dirty tree as an adjacency list
         # actions (or their operational model) in the plan will be triggered / executed and will transition the goal nodes for
         # their assertions to "dispatched" mode.
 
@@ -54,9 +130,9 @@ class Chronicle():
         # if in resolver info the resolver type is appropriate and the method/action instance is not None, then we know the origin
         # of the supporter (even if it is decided later, which is possible in case of methods, not actions)
 
-        self.m_causal_network: typing.Dict[Assertion, Assertion] = {} # value : supporter assertion. if a priori supported : None
+        self.m_causal_network: typing.MutableMapping[Assertion, Assertion] = PersistentMap() # value : supporter assertion. if a priori supported : None
         
-        self.m_conflicts: typing.Set[typing.Tuple[Assertion,Assertion]] = set()
+        self.m_conflicts: ConflictSet = ConflictSet()
 
         # efficient way of accessing constraints involving variables from a specified assertion ?
         self.m_constraint_network: ConstraintNetwork = ConstraintNetwork()
@@ -66,28 +142,124 @@ class Chronicle():
         
         res = Chronicle()
         
-        for asrt in self.m_assertions:
-            res.m_goal_nodes[asrt] = deepcopy(self.m_goal_nodes[asrt])
+        # (constant time copies, see the note at the top of the file)
+        res.m_goal_nodes = self.m_goal_nodes.copy()
         res.m_assertions = self.m_assertions.copy()
+        res.m_timelines = self.m_timelines.copy()
+        res.m_objvar_dependents = self.m_objvar_dependents.copy()
+        res.m_tempvar_dependents = self.m_tempvar_dependents.copy()
+        res.m_windows = self.m_windows.copy()
+        if self._pending_changes is not None:
+            res._pending_changes = (self._pending_changes[0].copy(), self._pending_changes[1].copy())
         res.m_plan = self.m_plan.copy()
         res.m_causal_network = self.m_causal_network.copy()
         res.m_conflicts = self.m_conflicts.copy()
-        res.m_constraint_network = deepcopy(self.m_constraint_network)
+        res.m_constraint_network = self.m_constraint_network.fork()
 
         return res
 
     def clear(self):
         
-        self.m_goal_nodes = {}
-        self.m_assertions = {}
-        self.m_plan = {}
+        self.m_goal_nodes = PersistentMap(p_copy_value=GoalNode.copy_goal_node)
+        self.m_assertions = PersistentMap()
+        self.m_timelines = PersistentMap(p_copy_value=list.copy)
+        self.m_objvar_dependents = PersistentMap(p_copy_value=PersistentSet.copy)
+        self.m_tempvar_dependents = PersistentMap(p_copy_value=PersistentSet.copy)
+        self.m_windows = PersistentMap(p_copy_value=IntervalIndex.copy)
+        self._pending_changes = None
+        self.m_plan = PersistentMap()
         #self.m_supporter_origin_commitment = {}
-        self.m_causal_network = {}
+        self.m_causal_network = PersistentMap()
+        self.m_conflicts = ConflictSet()
         #self.m_constraints = []        
         self.m_constraint_network = ConstraintNetwork()
         #self.m_constraint_network.m_bcn.clear()
         #self.m_constraint_network.m_stn.clear()
 
+    def add_assertion(self, p_assertion:Assertion, p_supported:bool) -> None:
+        """
+        Introduces an assertion in this chronicle (or updates whether it is supported, if it is already in it).
+        Arguments:
+            p_assertion (Assertion): the assertion
+            p_supported (bool): whether the assertion is supported
+        Returns:
+            None
+        Side effects:
+            Updates the assertions, timelines and dependents of variables of this chronicle
+        """
+        if p_assertion not in self.m_assertions:
+            self.m_timelines.setdefault(p_assertion.head, []).append(p_assertion)
+            for var in p_assertion.objvars:
+                self.m_objvar_dependents.setdefault(var, PersistentSet()).add(p_assertion)
+            for tp in p_assertion.tempvars:
+                self.m_tempvar_dependents.setdefault(tp, PersistentSet()).add(p_assertion)
+            self.m_windows.setdefault(p_assertion.head, IntervalIndex()).set(p_assertion, *self._windows([p_assertion])[p_assertion])
+        self.m_assertions[p_assertion] = p_supported
+
+    def timeline(self, p_head:typing.Tuple[str,typing.Tuple[str,...]]) -> typing.List[Assertion]:
+        """
+        Returns the assertions of this chronicle with the specified head (see Assertion.head), in their order of introduction.
+        """
+        return self.m_timelines.get(p_head, [])
+
+    def _windows(self, p_assertions:typing.Sequence[Assertion]) -> typing.Dict[Assertion,typing.Tuple[float,float]]:
+        # current temporal windows of the specified assertions (see the note at the top of the file)
+        (earliest, latest) = self.m_constraint_network.tempvars_bounds(
+            [asrt.time_start for asrt in p_assertions] + [asrt.time_end for asrt in p_assertions])
+        n = len(p_assertions)
+        lower_bounds = np.minimum(earliest[:n], earliest[n:]).tolist()
+        upper_bounds = np.maximum(latest[:n], latest[n:]).tolist()
+        return { asrt: (lower_bounds[i], upper_bounds[i]) for (i,asrt) in enumerate(p_assertions) }
+
+    def _collect_changes(self) -> None:
+        # collects the variables which changed in the constraint network since the last collection (see ConstraintNetwork.pop_changed_vars)
+        # into the pending changes, and updates the windows of the assertions depending on the changed timepoints
+        # (if the constraint network didn't record its changes yet (e.g. it was just created), everything is considered changed)
+        tracked = self.m_constraint_network.track_changes()
+        (objvars, tempvars) = self.m_constraint_network.pop_changed_vars()
+        if not tracked:
+            self._pending_changes = None
+            changed_asrts = list(self.m_assertions)
+        else:
+            if self._pending_changes is not None:
+                self._pending_changes[0].update(objvars)
+                self._pending_changes[1].update(tempvars)
+            changed_asrts = list(set().union(*(self.m_tempvar_dependents.get(tp, ()) for tp in tempvars)))
+        for (asrt, window) in self._windows(changed_asrts).items():
+            self.m_windows[asrt.head].set(asrt, *window)
+
+    def _overlapping_candidates(
+        self,
+        p_head:typing.Tuple[str,typing.Tuple[str,...]],
+        p_windows:typing.Dict[Assertion,typing.Tuple[float,float]],
+    ) -> typing.Dict[Assertion,typing.Set[Assertion]]:
+        # assertions of the specified timeline whose windows intersect the specified windows (the only ones they can conflict with)
+        res:typing.Dict[Assertion,typing.Set[Assertion]] = {}
+        if p_head in self.m_windows:
+            for (asrt, other_asrt) in self.m_windows[p_head].intersecting(p_windows):
+                if other_asrt != asrt:
+                    res.setdefault(asrt, set()).add(other_asrt)
+        return res
+
+    def _conflicting_candidates(
+        self,
+        p_candidates:typing.Dict[Assertion,typing.Set[Assertion]],
+    ) -> typing.Iterator[typing.Tuple[Assertion,Assertion]]:
+        # pairs (assertion, candidate) of the specified candidates (see _overlapping_candidates) which are conflicting
+        # they are checked in one batch (see check_conflicts) if they cover a large enough part of the (assertions x candidates) matrix
+        # and assertion by assertion otherwise, so that only the pairs of assertions whose windows intersect are checked
+        rows = list(p_candidates)
+        cols = list(set().union(*p_candidates.values()))
+        if len(rows)*len(cols) <= 4*sum(len(others) for others in p_candidates.values()):
+            for (i,j) in zip(*check_conflicts(rows, cols, self.m_constraint_network).nonzero()):
+                if cols[j] in p_candidates[rows[i]]:
+                    yield (rows[i], cols[j])
+        else:
+            for (asrt, others) in p_candidates.items():
+                others = list(others)
+                for j in check_conflicts([asrt], others, self.m_constraint_network)[0].nonzero()[0]:
+                    yield (asrt, others[j])
+
     def get_induced_conflicts(self, p_new_assertions:typing.Iterable[Assertion]) -> typing.Set[typing.Tuple[Assertion,Assertion]]:
         """
         Determines the conflicting assertions which would appear in this chronicle if the specified input assertions were introduced to the chronicle.
@@ -98,17 +270,87 @@ class Chronicle():
         Returns:
             Returns pairs of conflicting assertions which would get introduced if the specified input assertions were added to the chronicle
         Side effects:
-            None
+            Collects the changed variables of the constraint network (and starts recording them, see ConstraintNetwork.track_changes)
+            into the pending changes (see update_conflicts), and updates the windows of the assertions
         """
         res:typing.Set[typing.Tuple[Assertion,Assertion]] = set()
-        # naive brute force implementation
+        # restricted to the assertions of the timeline of each new assertion whose windows intersect its window
+        # (the new assertions of a same timeline being checked against them in one batch, see check_conflicts)
         # can use heuristics, info accumulated during search etc for inference (causal chains etc) to restrict the search / candidate flaws
+        self._collect_changes()
+        new_asrts_by_head:typing.Dict[typing.Tuple[str,typing.Tuple[str,...]], typing.List[Assertion]] = {}
         for new_asrt in p_new_assertions:
-            for asrt in self.m_assertions:
-                #FIXME: don't forget about this goal mode thing
-                #if (self.m_goal_nodes.setdefault(asrt,GoalNode()).m_mode != GoalMode.FORMULATED
-                #    and asrt.check_conflict(new_asrt, self.m_constraint_network)
-                #):# and not (new_asrt, asrt) in res:
-                if asrt.check_conflict(new_asrt, self.m_constraint_network):
-                    res.add((asrt,new_asrt))
-        return res
\ No newline at end of file
+            new_asrts_by_head.setdefault(new_asrt.head, []).append(new_asrt)
+        for (head, new_asrts) in new_asrts_by_head.items():
+            candidates = self._overlapping_candidates(head, self._windows(new_asrts))
+            #FIXME: don't forget about this goal mode thing
+            #if (self.m_goal_nodes.setdefault(asrt,GoalNode()).m_mode != GoalMode.FORMULATED
+            #    and asrt.check_conflict(new_asrt, self.m_constraint_network)
+            #):# and not (new_asrt, asrt) in res:
+            for (new_asrt, asrt) in self._conflicting_candidates(candidates):
+                res.add((asrt,new_asrt))
+        return res
+
+    def detect_conflicts(self) -> typing.Set[typing.Tuple[Assertion,Assertion]]:
+        """
+        Determines all the pairs of conflicting assertions of this chronicle, from scratch.
+        Only the pairs of assertions of each timeline whose windows intersect are checked (in batches, see check_conflicts).
+        Returns:
+            Pairs of conflicting assertions (earliest introduced assertion, latest introduced assertion)
+        Side effects:
+            Collects the changed variables of the constraint network to update the windows of the assertions (see update_conflicts)
+        """
+        res:typing.Set[typing.Tuple[Assertion,Assertion]] = set()
+        self._collect_changes()
+        for (head, timeline) in self.m_timelines.items():
+            candidates = self._overlapping_candidates(head, { asrt: self.m_windows[head][asrt] for asrt in timeline })
+            # each pair is only checked once, from its earliest introduced assertion
+            positions = { asrt: i for (i,asrt) in enumerate(timeline) }
+            for asrt in list(candidates):
+                candidates[asrt] = set(other_asrt for other_asrt in candidates[asrt] if positions[other_asrt] > positions[asrt])
+                if len(candidates[asrt]) == 0:
+                    del candidates[asrt]
+            res.update(self._conflicting_candidates(candidates))
+        return res
+
+    def update_conflicts(self) -> None:
+        """
+        Updates the conflicts (m_conflicts) between the assertions of this chronicle after changes in its constraint network
+        (propagation or backtracking), by examining again only the pairs of assertions involving an assertion which depends
+        on a variable which changed since the last update (see ConstraintNetwork.pop_changed_vars), and whose windows intersect.
+        The first update (for a constraint network which doesn't record its changes yet) examines all the pairs.
+        A new conflict is added as (earliest introduced assertion, latest introduced assertion), like in get_induced_conflicts.
+        Returns:
+            None
+        Side effects:
+            Updates m_conflicts and the windows of the assertions
+            Collects the changed variables of the constraint network (and starts recording them, see ConstraintNetwork.track_changes)
+        """
+        self._collect_changes()
+        if self._pending_changes is None:
+            affected = set(self.m_assertions)
+        else:
+            affected = set()
+            for var in self._pending_changes[0]:
+                affected.update(self.m_objvar_dependents.get(var, ()))
+            for tp in self._pending_changes[1]:
+                affected.update(self.m_tempvar_dependents.get(tp, ()))
+        self._pending_changes = (PersistentSet(), PersistentSet())
+
+        # the conflicts involving an affected assertion are replaced by the ones found among the pairs of assertions whose windows intersect
+        stale_conflicts = self.m_conflicts.involving(affected)
+        conflicts:typing.Set[typing.Tuple[Assertion,Assertion]] = set()
+        affected_by_head:typing.Dict[typing.Tuple[str,typing.Tuple[str,...]], typing.List[Assertion]] = {}
+        for asrt in affected:
+            affected_by_head.setdefault(asrt.head, []).append(asrt)
+        for (head, affected_asrts) in affected_by_head.items():
+            candidates = self._overlapping_candidates(head, { asrt: self.m_windows[head][asrt] for asrt in affected_asrts })
+            positions = { asrt: i for (i,asrt) in enumerate(self.timeline(head)) }
+            for (asrt, other_asrt) in self._conflicting_candidates(candidates):
+                (first, second) = (asrt, other_asrt) if positions[asrt] < positions[other_asrt] else (other_asrt, asrt)
+                if (second, first) in stale_conflicts:
+                    conflicts.add((second, first))
+                else:
+                    conflicts.add((first, second))
+        self.m_conflicts.difference_update(stale_conflicts)
+        self.m_conflicts.update(conflicts)
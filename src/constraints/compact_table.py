@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import sys
+sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
+
+import typing
+import math
+import itertools
+from src.constraints.domain import Domain
+
+############################################
+
+# NOTE: Compact Table, 18 / 10 / 2022
+
+# This file contains the representation of the table (tuples) of a general relation constraint in the BCN (see src.constraints.constraints),
+# inspired by the Compact-Table propagator (Demeulenaere et al. 2016).
+
+# The rows of the table are never removed. Instead, the rows which are still valid (i.e. whose values all belong to the domains
+# of the relation's variables) are represented by a bitset (python integer), and each value of each column by the bitset of the rows
+# in which it appears (its "supports"). Filtering the table is then done with a few bitwise operations per removed value (or kept value,
+# if fewer values are kept than removed), and a value is still supported iff its supports intersect the valid rows.
+
+# As the valid rows are a (immutable) integer, a table is cheap to copy : the rows and supports are shared between copies
+# (and only copied when rows are added), so only the valid rows and the sets of supported values are copied.
+# The BCN copies a table before its first modification at the current backup level (or since the last fork), and restores the previous copy on backtracking.
+
+# Some relations are (almost) the cartesian product of sets of values, one per column (e.g. the relations between the parameters
+# of action / method templates, see src.planning_search). Enumerating their rows is exponential in their arity,
+# so they can instead be represented in a factorized way (see FactorizedTable) : by the values of each column, and explicitly excluded rows.
+# Filtering then only filters the values of each column, and a value is supported iff not all the rows containing it are excluded.
+# Rows are only enumerated (lazily) when iterating over the table, e.g. when rows are added to a table from a factorized one.
+
+############################################
+
+class CompactTable():
+
+    def __init__(self, p_arity:int):
+        self._rows:typing.List[typing.Tuple[object,...]] = []
+        # for each column, the bitset of the rows in which each value appears
+        self._supports:typing.List[typing.Dict[object,int]] = [{} for _ in range(p_arity)]
+        # bitset of the rows which are still valid
+        self._valid:int = 0
+        # for each column, the values appearing in at least one valid row
+        self._supported_values:typing.List[typing.Set[object]] = [set() for _ in range(p_arity)]
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[object,...]]:
+        valid = self._valid
+        while valid:
+            low_bit = valid & -valid
+            yield self._rows[low_bit.bit_length()-1]
+            valid ^= low_bit
+
+    def __len__(self) -> int:
+        return self._valid.bit_count()
+
+    def __repr__(self) -> str:
+        return "CompactTable({0})".format(list(self))
+
+    def copy(self) -> CompactTable:
+        res = CompactTable(0)
+        res._rows = self._rows
+        res._supports = self._supports
+        res._valid = self._valid
+        res._supported_values = [values.copy() for values in self._supported_values]
+        return res
+
+    def supported_values(self, p_col:int) -> typing.Set[object]:
+        return self._supported_values[p_col]
+
+    def add_rows(self, p_rows:typing.Iterable[typing.Tuple[object,...]]) -> None:
+        """
+        Adds rows to the table (as valid rows).
+        Side effects:
+            Replaces the (possibly shared) rows and supports by updated copies.
+        """
+        rows = list(self._rows)
+        supports = [col_supports.copy() for col_supports in self._supports]
+        for row in p_rows:
+            bit = 1 << len(rows)
+            rows.append(row)
+            self._valid |= bit
+            for col in range(len(row)):
+                supports[col][row[col]] = supports[col].get(row[col], 0) | bit
+                self._supported_values[col].add(row[col])
+        self._rows = rows
+        self._supports = supports
+
+    def filter(self, p_domains:typing.List[Domain]) -> bool:
+        """
+        Invalidates the rows containing a value which doesn't belong to the domain of its column anymore.
+        Arguments:
+            p_domains (list(Domain)): the domains of the relation's variables, in the order of the columns
+        Returns:
+            True if some rows were invalidated, False otherwise
+        Side effects:
+            Updates the valid rows and the supported values of each column.
+        """
+        valid = self._valid
+        for col in range(len(p_domains)):
+            values = self._supported_values[col]
+            removed = [v for v in values if not p_domains[col].contains(v)]
+            if len(removed) == 0:
+                continue
+            col_supports = self._supports[col]
+            mask = 0
+            if 2 * len(removed) <= len(values):
+                for v in removed:
+                    mask |= col_supports[v]
+                valid &= ~mask
+            else:
+                for v in values:
+                    if p_domains[col].contains(v):
+                        mask |= col_supports[v]
+                valid &= mask
+
+        if valid == self._valid:
+            return False
+        self._valid = valid
+        for col in range(len(self._supported_values)):
+            col_supports = self._supports[col]
+            self._supported_values[col] = set(v for v in self._supported_values[col] if col_supports[v] & valid)
+        return True
+
+############################################
+
+class FactorizedTable():
+
+    def __init__(self, p_col_values:typing.List[typing.Iterable[object]], p_exclusions:typing.Iterable[typing.Tuple[object,...]]=()):
+        # for each column, its values which belong to the domain of its variable
+        self._col_values:typing.List[typing.Set[object]] = [set(values) for values in p_col_values]
+        self._exclusions:typing.Set[typing.Tuple[object,...]] = set(p_exclusions)
+        # for each column, the values appearing in at least one row which isn't excluded (see _update_supported_values)
+        self._supported_values:typing.List[typing.Set[object]]|None = None
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[object,...]]:
+        for row in itertools.product(*self._col_values):
+            if row not in self._exclusions:
+                yield row
+
+    def __len__(self) -> int:
+        return math.prod(len(values) for values in self._col_values) - len(self._excluded_rows())
+
+    def __repr__(self) -> str:
+        return "FactorizedTable({0}, {1})".format(self._col_values, self._exclusions)
+
+    def copy(self) -> FactorizedTable:
+        res = FactorizedTable([])
+        res._col_values = [values.copy() for values in self._col_values]
+        res._exclusions = self._exclusions.copy()
+        res._supported_values = self._supported_values
+        return res
+
+    def supported_values(self, p_col:int) -> typing.Set[object]:
+        if self._supported_values is None:
+            self._update_supported_values()
+        return self._supported_values[p_col]
+
+    def add_rows(self, p_rows:typing.Iterable[typing.Tuple[object,...]]) -> None:
+        """
+        Adds rows to the table, by cancelling their exclusion.
+        Rows which aren't in the cartesian product of the (filtered) values of the columns can't be represented and are ignored
+        (rows containing a value which was filtered out would be invalid anyway).
+        """
+        for row in p_rows:
+            if all(row[col] in self._col_values[col] for col in range(len(row))):
+                self._exclusions.discard(row)
+        self._supported_values = None
+
+    def filter(self, p_domains:typing.List[Domain]) -> bool:
+        """
+        Filters out the values of each column which don't belong to the domain of its variable.
+        Arguments:
+            p_domains (list(Domain)): the domains of the relation's variables, in the order of the columns
+        Returns:
+            True if some rows were invalidated, False otherwise
+        Side effects:
+            Updates the values and the supported values of each column.
+        """
+        res = False
+        for col in range(len(p_domains)):
+            removed = [v for v in self._col_values[col] if not p_domains[col].contains(v)]
+            if len(removed) > 0:
+                self._col_values[col].difference_update(removed)
+                res = True
+        if res:
+            self._supported_values = None
+        return res
+
+    def _excluded_rows(self) -> typing.List[typing.Tuple[object,...]]:
+        # the excluded rows which are still rows of the cartesian product
+        return [row for row in self._exclusions if all(row[col] in self._col_values[col] for col in range(len(row)))]
+
+    def _update_supported_values(self) -> None:
+        sizes = [len(values) for values in self._col_values]
+        n_rows = math.prod(sizes)
+        if n_rows == 0:
+            self._supported_values = [set() for _ in self._col_values]
+            return
+        # number of excluded rows containing each value of each column
+        n_excluded = [{} for _ in self._col_values]
+        for row in self._excluded_rows():
+            for col in range(len(row)):
+                n_excluded[col][row[col]] = n_excluded[col].get(row[col], 0) + 1
+        self._supported_values = [
+            set(v for v in self._col_values[col] if n_excluded[col].get(v, 0) < n_rows // sizes[col])
+            for col in range(len(self._col_values))
+        ]
@@ -8,10 +8,13 @@ import typing
 import warnings
 import math
 from enum import Enum
-from copy import deepcopy
-from src.utility.unionfind import UnionFind2
-from src.utility.new_int_id import new_int_id
-from src.constraints.domain import Domain, DomainType
+import numpy as np
+from collections.abc import Mapping
+from src.utility.unionfind import UnionFind3
+from src.utility.trail import Trail
+from src.constraints.domain import Domain
+from src.constraints.compact_table import CompactTable, FactorizedTable
+from src.constraints.minimal_network import MinimalNetworkType, new_minimal_network, RigidComponentsView
 
 ############################################
 
@@ -28,6 +31,7 @@ from src.constraints.domain import Domain, DomainType
 # as that is more expensive (algorithmically). (See GNT 2016 4.4 )
 
 # Constants are represented as object variables with a singleton domain.
+# (Except constant bounds of temporal constraints, which are directly stored as edge weights in the STN)
 
 # As such it wraps a "binding constraint network" (BCN) on object variables, and a "simple temporal network" (STN) on temporal variables (points).
 # These networks are combined and need each other (references passed in constraint propagation) to support mixing temporal and object variables.
@@ -51,7 +55,7 @@ class ConstraintType(Enum):
     UNIFICATION = 0         # (binary) unification constraint : two variables are required to always be equal values
     DISJ_UNIFICATION = 1    # disjunctive unification constraint : a variable is required to always be equal to one of the specified variables
     SEPARATION = 2          # (binary) separation constraint : two variables are required to always have different values
-    GENERAL_RELATION = 3    # general relation (or table) constraint between multiple variables
+    GENERAL_RELATION = 3    # general relation (or table) constraint between multiple variables (rows given as tuples, or as a FactorizedTable)
     DOMAIN_VAL_LEQ = 4      # unary constraint : a variable is required to have its domain of values less than or equal to specified value
     DOMAIN_VAL_GEQ = 5      # unary constraint : a variable is required to have its domain of values greater than or equal to specified value
     DOMAIN_VAL_LE = 6       # unary constraint : a variable is required to have its domain of values less than specified value
@@ -60,11 +64,11 @@ class ConstraintType(Enum):
 
 class ConstraintNetwork():
 
-    def __init__(self):
+    _REFERENCE_TIMEPOINT = "_REFERENCE_TIMEPOINT" # special timepoint, the origin of (absolute) times
+
+    def __init__(self, p_minimal_network_type:MinimalNetworkType=MinimalNetworkType.DICT):
         self.m_bcn: BCN = BCN()
-        self.m_stn: STN = STN()
-        self._bcns_stack = []
-        self._stns_stack = []
+        self.m_stn: STN = STN(p_minimal_network_type)
         self.inconsistent = False
 
     def init_objvars(self, p_domains: typing.Dict[str, Domain]) -> None:
@@ -78,8 +82,9 @@ class ConstraintNetwork():
         Side effects:
             Updates BCN domains object and initialises BCN union-find object used for unification constraints
         """
-        self.m_bcn._unifications_list[-1].make_set(p_domains.keys())
-        self.m_bcn._domains_list[-1] = { **self.m_bcn._domains_list[-1] , **p_domains }
+        self.m_bcn.unifications.make_set(p_domains.keys(), self.m_bcn._trail)
+        for (var, dom) in p_domains.items():
+            self.m_bcn._trail.set_item(self.m_bcn._domains, var, dom)
 
     def init_tempvars(self, p_controllability: typing.Dict[str,bool]) -> None:
         """
@@ -91,7 +96,8 @@ class ConstraintNetwork():
         Side effects:
             Updates STN timepoints with the input timepoints
         """
-        self.m_stn._controllability_list[-1] = { **self.m_stn._controllability_list[-1], **p_controllability }
+        for (tp, ctrl) in p_controllability.items():
+            self.m_stn._trail.set_item(self.m_stn._controllability, tp, ctrl)
 
     def objvar_domain(self, p_var:str) -> Domain:
         """
@@ -131,7 +137,8 @@ class ConstraintNetwork():
         ):
             return True
         # check for identical singleton domains
-        if self.m_bcn.domains[p_var1].size() == 1:
+        # (the domain of p_var2 may be infinite, see Domain.get_values)
+        if self.m_bcn.domains[p_var1].size() == 1 and self.m_bcn.domains[p_var2].size() == 1:
             return self.m_bcn.domains[p_var1].get_values() == self.m_bcn.domains[p_var2].get_values()
         return False
 
@@ -152,23 +159,14 @@ class ConstraintNetwork():
         # check for identity - a variable is obviously unified with itself
         if p_var1 == p_var2: 
             return True
-        # check for separation constraints
-        if ((p_var1 in self.m_bcn.separations and p_var2 in self.m_bcn.separations[p_var1])
-            or (p_var2 in self.m_bcn.separations and p_var1 in self.m_bcn.separations[p_var2])
-        ):
+        # check for separation constraints between the specified / input variables or variables unified with them
+        # (i.e. between their components in the union-find)
+        root1 = self.m_bcn._root(p_var1)
+        if root1 in self.m_bcn.class_separations and self.m_bcn._root(p_var2) in self.m_bcn.class_separations[root1]:
             return False
         # check for domain intersection
         if not self.m_bcn.domains[p_var1].intersects(self.m_bcn.domains[p_var2]):
             return False
-        # check for separation constraints between variables unified with the specified / input variables
-        # NOTE: rather inefficient
-        if self.m_bcn.unifications.contains([p_var1]) and self.m_bcn.unifications.contains([p_var2]):
-            cc1 = self.m_bcn.unifications.connected_component(p_var1)
-            cc2 = self.m_bcn.unifications.connected_component(p_var2)
-            for unif_var1 in cc1:
-                for unif_var2 in cc2:
-                    if unif_var1 in self.m_bcn.separations and unif_var2 in self.m_bcn.separations[unif_var1]:
-                        return False
         return True
 
     def objvars_separable(self, p_var1:str, p_var2:str) -> bool:
@@ -195,6 +193,79 @@ class ConstraintNetwork():
         """        
         return not self.objvars_unifiable(p_var1, p_var2)
 
+    def _objvars_classes(self, p_vars:typing.Sequence[str]) -> typing.Tuple[typing.List[str],np.ndarray,np.ndarray,np.ndarray]:
+        # roots (i.e. unification classes) of the specified object variables, along with arrays telling whether they are
+        # the special "unknown" and "any" variables (see Domain), and the id of the value of their domain if it is a singleton (-1 otherwise)
+        # (ids of values are only comparable between variables of a same call)
+        roots = []
+        unknown = np.zeros(len(p_vars), dtype=bool)
+        any_value = np.zeros(len(p_vars), dtype=bool)
+        singletons = np.full(len(p_vars), -1, dtype=np.int64)
+        value_ids = {}
+        for (i,var) in enumerate(p_vars):
+            roots.append(self.m_bcn._root(var))
+            if var == Domain._UNKNOWN_VALUE_VAR:
+                unknown[i] = True
+            elif var == Domain._ANY_VALUE_VAR:
+                any_value[i] = True
+            elif var in self.m_bcn.domains and self.m_bcn.domains[var].size() == 1:
+                (value,) = self.m_bcn.domains[var].get_values()
+                singletons[i] = value_ids.setdefault(value, len(value_ids))
+        return (roots, unknown, any_value, singletons)
+
+    def objvars_unified_pairwise(self, p_vars1:typing.Sequence[str], p_vars2:typing.Sequence[str]) -> np.ndarray:
+        """
+        Vectorized version of objvars_unified, for all the pairs of object variables from two sequences.
+        The unification classes and singleton values of the variables are computed once, and then compared in a single vectorized pass.
+        Arguments:
+            p_vars1 (Sequence[str]): object variables
+            p_vars2 (Sequence[str]): object variables
+        Returns:
+            A boolean matrix whose element (i,j) is objvars_unified(p_vars1[i], p_vars2[j])
+        """
+        (roots, unknown, any_value, singletons) = self._objvars_classes(list(p_vars1) + list(p_vars2))
+        n1 = len(p_vars1)
+        root_ids = { r: k for (k,r) in enumerate(dict.fromkeys(roots)) }
+        classes = np.array([root_ids[r] for r in roots], dtype=np.int64)
+        res = ((classes[:n1,None] == classes[None,n1:])
+            | ((singletons[:n1,None] >= 0) & (singletons[:n1,None] == singletons[None,n1:]))
+            | any_value[:n1,None] | any_value[None,n1:])
+        res &= ~(unknown[:n1,None] | unknown[None,n1:])
+        return res
+
+    def objvars_unifiable_pairwise(self, p_vars1:typing.Sequence[str], p_vars2:typing.Sequence[str]) -> np.ndarray:
+        """
+        Vectorized version of objvars_unifiable, for all the pairs of object variables from two sequences.
+        Separations and intersections of domains are only checked once per pair of unification classes (whose variables share their domain).
+        Arguments:
+            p_vars1 (Sequence[str]): object variables
+            p_vars2 (Sequence[str]): object variables
+        Returns:
+            A boolean matrix whose element (i,j) is objvars_unifiable(p_vars1[i], p_vars2[j])
+        """
+        (roots, unknown, any_value, _) = self._objvars_classes(list(p_vars1) + list(p_vars2))
+        n1 = len(p_vars1)
+        special = unknown | any_value
+        roots1 = list(dict.fromkeys(r for (r,sp) in zip(roots[:n1], special[:n1]) if not sp))
+        roots2 = list(dict.fromkeys(r for (r,sp) in zip(roots[n1:], special[n1:]) if not sp))
+        ids1 = { r: k for (k,r) in enumerate(roots1) }
+        ids2 = { r: k for (k,r) in enumerate(roots2) }
+        classes_unifiable = np.zeros((len(roots1)+1,len(roots2)+1), dtype=bool)
+        for (k1,r1) in enumerate(roots1):
+            separated = self.m_bcn.class_separations.get(r1, ())
+            for (k2,r2) in enumerate(roots2):
+                classes_unifiable[k1,k2] = (r2 not in separated
+                    and self.m_bcn.domains[r1].intersects(self.m_bcn.domains[r2]))
+        # special variables are mapped to the last (unused) class
+        classes1 = np.array([len(roots1) if sp else ids1[r] for (r,sp) in zip(roots[:n1], special[:n1])], dtype=np.int64)
+        classes2 = np.array([len(roots2) if sp else ids2[r] for (r,sp) in zip(roots[n1:], special[n1:])], dtype=np.int64)
+        names = np.array(list(p_vars1) + list(p_vars2), dtype=object)
+        res = (classes_unifiable[np.ix_(classes1,classes2)]
+            | (names[:n1,None] == names[None,n1:])
+            | any_value[:n1,None] | any_value[None,n1:])
+        res &= ~(unknown[:n1,None] | unknown[None,n1:])
+        return res
+
     def tempvars_minimal_directed_distance(self, p_tp1:str, p_tp2:str) -> float:
         """
         Query used to obtain the minimal distance from timepoint p_tp1 to timepoint p_tp2 through a path of length >= 1.
@@ -220,6 +291,90 @@ class ConstraintNetwork():
         return (p_tp1 == p_tp2
             or (self.m_stn.minimal_network[(p_tp1,p_tp2)] == 0 and self.m_stn.minimal_network[(p_tp2,p_tp1)] == 0))
 
+    def tempvars_minimal_directed_distances(self, p_tps1:typing.Sequence[str], p_tps2:typing.Sequence[str]) -> np.ndarray:
+        """
+        Vectorized version of tempvars_minimal_directed_distance, for all the pairs of timepoints from two sequences.
+        Arguments:
+            p_tps1 (Sequence[str]): source timepoints
+            p_tps2 (Sequence[str]): destination timepoints
+        Returns:
+            A matrix whose element (i,j) is the current minimal distance from timepoint p_tps1[i] to timepoint p_tps2[j]
+        """
+        return self.m_stn.minimal_network.distances(p_tps1, p_tps2)
+
+    def tempvars_bounds(self, p_tps:typing.Sequence[str]) -> typing.Tuple[np.ndarray,np.ndarray]:
+        """
+        Query used to obtain the earliest and latest (absolute) times of timepoints, i.e. their minimal and maximal distances
+        from the reference timepoint (-d(tp,ref) and d(ref,tp)).
+        Timepoints which aren't in the STN yet (or all of them, if the reference timepoint isn't) are unbounded.
+        Arguments:
+            p_tps (Sequence[str]): timepoints
+        Returns:
+            The arrays of earliest and latest times of the specified timepoints
+        """
+        earliest = np.full(len(p_tps), -np.inf)
+        latest = np.full(len(p_tps), np.inf)
+        ref = ConstraintNetwork._REFERENCE_TIMEPOINT
+        minimal_network = self.m_stn.minimal_network
+        if (ref, ref) in minimal_network:
+            known = [i for (i,tp) in enumerate(p_tps) if (tp, tp) in minimal_network]
+            known_tps = [p_tps[i] for i in known]
+            earliest[known] = -self.tempvars_minimal_directed_distances(known_tps, [ref])[:,0]
+            latest[known] = self.tempvars_minimal_directed_distances([ref], known_tps)[0,:]
+        return (earliest, latest)
+
+    def tempvars_probe(
+        self,
+        p_temporal_constraints:typing.Iterable[typing.Tuple[str,str,str|float,bool]],
+        p_queries:typing.Iterable[typing.Tuple[str,str]]=(),
+    ) -> typing.Tuple[bool, typing.Dict[typing.Tuple[str,str],float]|None]:
+        """
+        Query used to determine whether the specified temporal constraints could be added to the STN, without propagating them
+        (no backup, propagation or backtrack), along with the minimal distances between some timepoints they would result in.
+        On a consistent minimal network, adding t1 - t2 <= w (i.e. edge t2 -> t1) is feasible iff w + d(t1,t2) >= 0.
+        With several constraints, the edges are inserted one by one, but only among the timepoints involved in
+        the constraints and queries (as a shortest path between them only goes through these edges), in O(k*s^2)
+        (k constraints, s timepoints involved) instead of O(k*n^2). Bounds given as object variables are evaluated with their current domain.
+        Arguments:
+            p_temporal_constraints (list((timepoint1, timepoint2, bound, strict))):
+                Temporal constraints to probe, in the same format as TEMPORAL constraints in propagate_constraints
+            p_queries (list((timepoint1, timepoint2)), empty by default):
+                Pairs of timepoints whose resulting minimal directed distance is requested (see tempvars_minimal_directed_distance)
+        Returns:
+            A tuple (bool, dict) where the bool value describes whether propagating the constraints would be successful (on the STN side)
+            and where the dict gives the resulting minimal directed distance for each of the queried pairs (None if the bool value is False)
+        Side effects:
+            None
+        """
+        edges = []
+        tps = set()
+        for (t1, t2, bound, strict) in p_temporal_constraints:
+            # (same as in the STN propagation: the following constraints wouldn't be propagated)
+            if type(bound) is not str and bound == 0 and not strict and t1 == t2:
+                break
+            weight = self.m_stn._bound_value(bound, self.m_bcn) - (sys.float_info.epsilon if strict else 0)
+            edges.append((t2, t1, weight))
+            tps.update((t1, t2))
+        p_queries = list(p_queries)
+        for (tp1, tp2) in p_queries:
+            tps.update((tp1, tp2))
+
+        network = self.m_stn.minimal_network
+        dist = { (i,j): (network[(i,j)] if (i,j) in network else math.inf) for i in tps for j in tps }
+        for (u, v, w) in edges:
+            if w >= dist[(u,v)]:
+                continue
+            if w + (0 if u == v else dist[(v,u)]) < 0:
+                return (False, None)
+            # "static" paths (of length 0) are allowed before and after the new edge (see minimal_network.relax_edge)
+            to_u = [(i, 0 if i == u else dist[(i,u)]) for i in tps]
+            from_v = [(j, 0 if j == v else dist[(v,j)]) for j in tps]
+            for (i, d_iu) in to_u:
+                for (j, d_vj) in from_v:
+                    if d_iu + w + d_vj < dist[(i,j)]:
+                        dist[(i,j)] = d_iu + w + d_vj
+        return (True, { pair: dist[pair] for pair in p_queries })
+
     #def timepoint_domain(self, p_var:str) -> Domain:
     #    """
     #    Wrapper used to access the domain object of an object variable (through the BCN)
@@ -230,44 +385,119 @@ class ConstraintNetwork():
     #    """
     #    return self.m_bcn.m_domains[p_var]
 
+    def temporal_inconsistency_explanation(self) -> typing.List[typing.Tuple[str,str,str|float,bool]]|None:
+        """
+        Returns:
+            The temporal constraints (t1, t2, bound, strict) forming the negative cycle which made the last propagation fail,
+            or None if the last propagation didn't fail because of a negative cycle in the STN.
+        """
+        return self.m_stn._inconsistency_explanation
+
+    def closes_negative_cycle(
+        self,
+        p_explanation:typing.List[typing.Tuple[str,str,str|float,bool]],
+        p_input_constraints:typing.Iterable[typing.Tuple[ConstraintType,typing.Any]],
+    ) -> bool:
+        """
+        Checks (without propagating anything) whether the specified input constraints, added to this network,
+        would close the negative cycle given by an inconsistency explanation (see temporal_inconsistency_explanation).
+        Each constraint of the cycle is evaluated as the tightest of the corresponding edge weight in the STN and
+        of the matching input temporal constraints (evaluated with the current domains).
+        As propagation can only make edge weights tighter, a True result means propagating the input constraints would fail.
+        Arguments:
+            p_explanation (list((timepoint1, timepoint2, bound, strict))):
+                Temporal constraints forming a cycle (e.g. an explanation obtained from another network)
+            p_input_constraints (list((ConstraintType, constraint))):
+                Input constraints, in the same format as in propagate_constraints
+        Returns:
+            True if the cycle is negative (i.e. propagating the input constraints would fail), False otherwise
+        """
+        input_weights:typing.Dict[typing.Tuple[str,str],float] = {}
+        for (cstr_type, cstr) in p_input_constraints:
+            if cstr_type != ConstraintType.TEMPORAL:
+                continue
+            (t1, t2, bound, strict) = cstr
+            # (same as in the STN propagation: the following constraints wouldn't be propagated)
+            if type(bound) is not str and bound == 0 and not strict and t1 == t2:
+                break
+            if type(bound) is str and bound not in self.m_bcn.domains:
+                continue
+            weight = self.m_stn._bound_value(bound, self.m_bcn) - (sys.float_info.epsilon if strict else 0)
+            if weight < input_weights.get((t1,t2), math.inf):
+                input_weights[(t1,t2)] = weight
+
+        total = 0
+        for (t1, t2, _, _) in p_explanation:
+            # constraint t1 - t2 <= bound <-> edge t2 -> t1
+            total += min(self.m_stn.weights.get((t2,t1), math.inf), input_weights.get((t1,t2), math.inf))
+        return total < 0
+
     def fork(self) -> ConstraintNetwork:
-        res = ConstraintNetwork()
-        res.m_bcn._domains_list.append(deepcopy(self.m_bcn.domains))
-        res.m_bcn._unifications_list.append(deepcopy(self.m_bcn.unifications))
-        res.m_bcn._disj_unifications_list.append(deepcopy(self.m_bcn.disj_unifications))
-        res.m_bcn._separations_list.append(deepcopy(self.m_bcn.separations))
-        res.m_bcn._general_relations_list.append(deepcopy(self.m_bcn.general_relations))
-        res.m_stn._controllability_list.append(deepcopy(self.m_stn.controllability))
-        res.m_stn._constraints_list.append(deepcopy(self.m_stn.constraints))
-        res.m_stn._involved_objvars_list.append(deepcopy(self.m_stn.involved_objvars))
-        res.m_stn._minimal_network_list.append(deepcopy(self.m_stn.minimal_network))
+        """
+        Returns a copy of this constraint network (without its backups), to be used instead of a deep copy.
+        The copy shares its domains, separation / disjunctive unification sets, relation tables and minimal network rows
+        with this network. Shared structures are copied by either network only when it writes to them (copy-on-write).
+        The union-find's (flat) dictionaries are copied.
+        As such, forking only costs O(number of variables and timepoints) (shallow copies of the "outer" dictionaries).
+        """
+        res = ConstraintNetwork(self.m_stn.minimal_network_type)
+        res.m_bcn = self.m_bcn._fork()
+        res.m_stn = self.m_stn._fork()
         return res
 
     def backup(self) -> None:
-        self.m_bcn._domains_backup()
-        self.m_bcn._unifications_backup()
-        self.m_bcn._disj_unifications_backup()
-        self.m_bcn._separations_backup()
-        self.m_bcn._general_relations_backup()
-        self.m_stn._controllability_backup()
-        self.m_stn._constraints_backup()
-        self.m_stn._involved_objvars_backup()
-        self.m_stn._minimal_network_backup()
+        """
+        Pushes a new backup level (marker) to the trails (undo logs) of the BCN and STN, in O(1).
+        Changes made from now on can be undone with backtrack.
+        """
+        self.m_bcn._trail.push_level()
+        self.m_stn._trail.push_level()
 
     def backtrack(self) -> None:
-        self.m_bcn._domains_list.pop()
-        self.m_bcn._unifications_list.pop()
-        self.m_bcn._disj_unifications_list.pop()
-        self.m_bcn._separations_list.pop()
-        self.m_bcn._general_relations_list.pop()
-
-        self.m_stn._controllability_list.pop()
-        self.m_stn._constraints_list.pop()
-        self.m_stn._involved_objvars_list.pop()
-        self.m_stn._minimal_network_list.pop()
-        #if len(self._bcns_stack) > 0 and len(self._stns_stack) > 0:
-        #    self.m_bcn = self._bcns_stack.pop()
-        #    self.m_stn = self._stns_stack.pop()
+        """
+        Undoes all changes made to the BCN and STN since the last backup, in O(number of changes).
+        """
+        self.m_bcn._trail.pop_level()
+        self.m_stn._trail.pop_level()
+        # the changes undone below the level at which changes started to be recorded weren't recorded (see track_changes)
+        if self.m_bcn._tracking_level is not None and self.m_bcn._trail.level < self.m_bcn._tracking_level:
+            self.m_bcn._tracking_level = None
+            self.m_stn._tracking_level = None
+
+    def track_changes(self) -> bool:
+        """
+        Starts recording the variables which change in this network (see pop_changed_vars).
+        This isn't done by default, as it slows propagation down (especially with the sparse minimal network).
+        Forks of this network record them as well.
+        The changes made before they started to be recorded can't be reported if they are backtracked :
+        backtracking below the backup level at which they started to be recorded stops the recording (see backtrack).
+        Returns:
+            True if they were already recorded, False otherwise (in which case any variable may have changed before)
+        Side effects:
+            Enables the recording of changes in the BCN and STN
+        """
+        if self.m_bcn._tracking_level is not None:
+            return True
+        self.m_bcn._tracking_level = self.m_bcn._trail.level
+        self.m_stn._tracking_level = self.m_stn._trail.level
+        return False
+
+    def pop_changed_vars(self) -> typing.Tuple[typing.Set[str],typing.Set[str]]:
+        """
+        Collects the variables whose queries may have changed since they were last collected (or since changes are recorded, see track_changes),
+        i.e. the object variables whose domain, unifications or separations changed, and the timepoints which are new or whose minimal distances changed.
+        Changes undone by backtracking are changes too. The returned sets may contain some variables which didn't actually change.
+        Used to incrementally maintain information depending on the constraint network (e.g. the conflicts of a chronicle).
+        Returns:
+            A pair (changed object variables, changed timepoints)
+        Side effects:
+            Resets the changed variables (until the next changes)
+        """
+        res = (set(self.m_bcn._changed_objvars), set(self.m_stn._changed_tempvars))
+        # cleared in place, as they are referenced by the trails (see BCN._record_changed_objvars)
+        self.m_bcn._changed_objvars.clear()
+        self.m_stn._changed_tempvars.clear()
+        return res
 
     def propagate_constraints(
         self,
@@ -275,6 +505,7 @@ class ConstraintNetwork():
         p_backup:bool,
         p_revert_on_failure:bool,
         p_revert_on_success:bool,
+        p_stn_full_recomputation:bool=False,
     ) -> bool:
         """
         Method allowing to (partially, locally) propagate the specified constraints, by triggering (non independent) constraint propagation for both the BCN and STN.
@@ -284,7 +515,7 @@ class ConstraintNetwork():
                 The constraints are formatted the following way:
                     if TEMPORAL:
                         (timepoint1, timepoint2, objvar, strict_or_not) or (timepoint1, timepoint2, constant value, strict_or_not)
-                        In the second case, a new object variable with singleton domain contain the constant value is created and used to represent the constraint
+                        In the second case, the constant value is directly used as the bound of the constraint (no object variable is created for it)
                     if DOMAIN_VAL_GE or DOMAIN_VAL_LE:
                         (objvar, value)
                     if UNIFICATION or SEPARATION:
@@ -297,12 +528,15 @@ class ConstraintNetwork():
                         (relation_name, ((param_objvars...), [(objvars_values...)...]))
             p_backtrack (bool):
                 Indicates whether to restore the changes to the constraint networks and domains as they were before, i.e. just checking propagation, not applying it.
+            p_stn_full_recomputation (bool, False by default):
+                Indicates whether the STN minimal network should be recomputed from scratch (Floyd-Warshall)
+                instead of being incrementally updated with the new temporal constraints.
         Returns:
             True if the constraints can be successfully propagated
         Side effects:
             If p_backtrack is False (by default), the constraints and changes introduced to the constraint networks and domains will be saved if propagation is successful.
             If it is True, then even if propagation is successful, the changes will be reverted and there won't be any side effects.
-            Currently these backups and restorations are managed through deepcopies... (inefficient and not elegant). 
+            These backups and restorations are managed through trails (undo logs) in the BCN and STN.
         """
         # initialise constraints worklists
         binding_constraints_worklist = []
@@ -330,9 +564,11 @@ class ConstraintNetwork():
         if p_backup:
             self.backup()
 
+        self.m_stn._inconsistency_explanation = None
+
         # propagate constraints to both (interacting) constraint networks (hence stn and bcn specified as arguments)
         if (self.m_bcn._propagate(binding_constraints_worklist,self.m_stn)
-            and self.m_stn._propagate(temporal_constraints_worklist,self.m_bcn)
+            and self.m_stn._propagate(temporal_constraints_worklist,self.m_bcn,p_stn_full_recomputation)
         ):
             # if only checking / verifying possibly consistent propagation is required, then restore backed up networks
             # (no need to apply new propagated constraints)
@@ -357,7 +593,13 @@ class ConstraintNetwork():
 # In the future, adapting a more advanced constraint propagation algorithm would be desirable.
 
 # Representations and data structures aren't very optimised, except for the Union-Find for the unification/equality constraint.
-# Relation tables are represented in a very crude way. In the future, a B-tree or BDD representation could be used.
+# Unified variables share a single domain, stored for the root of their component in the union-find (and read through a DomainsView).
+# A unification only intersects the domains of both components (instead of revising every pair of unified variables),
+# and a change to the domain of a component only requires to revise the other constraints involving its variables.
+# Separations are also indexed between components (roots), and merged on unification, so that checking
+# whether the variables of two components are unifiable doesn't require to check every pair of their variables.
+# Relation tables are represented as compact tables (see src.constraints.compact_table) : rows are filtered with bitwise operations,
+# and the values still supported by each column are maintained incrementally. In the future, a B-tree or BDD representation could be used.
 # Support for "functional" (continuous) relations would be very welcome in the future
 
 # As a side note, the union-find isn't necessarily that suitable if we want to support ordering constraints,
@@ -368,52 +610,220 @@ class ConstraintNetwork():
 
 ############################################
 
+class DomainsView(Mapping):
+    """
+    Read only view of the domains of a BCN, resolving each variable to the root of its component in the union-find.
+    """
+
+    def __init__(self, p_bcn:BCN):
+        self._bcn = p_bcn
+
+    def __getitem__(self, p_var:str) -> Domain:
+        return self._bcn._domains[self._bcn._root(p_var)]
+
+    def __contains__(self, p_var:str) -> bool:
+        return p_var in self._bcn._domains
+
+    def __iter__(self):
+        return iter(self._bcn._domains)
+
+    def __len__(self) -> int:
+        return len(self._bcn._domains)
+
+    def __repr__(self) -> str:
+        return "DomainsView({0})".format({ var: self[var] for var in self })
+
 class BCN():
 
     def __init__(self):
-        self._domains_list = [{}]
-        self._unifications_list = [UnionFind2()]
-        self._disj_unifications_list = [{}]
-        self._separations_list = [{}]
-        self._general_relations_list = [{}]
+        # domains of the object variables, only up to date for the roots of their components in the union-find (see DomainsView)
+        self._domains:typing.Dict[str, Domain] = {}
+        self._domains_view:DomainsView = DomainsView(self)
+        self._unifications:UnionFind3 = UnionFind3()
+        self._disj_unifications:typing.Dict[str, typing.Set[str]] = {}
+        self._separations:typing.Dict[str, typing.Set[str]] = {}
+        # separations between the roots of the components of the union-find (see _merge_class_separations)
+        self._class_separations:typing.Dict[str, typing.Set[str]] = {}
+        self._general_relations:typing.Dict[str,typing.Tuple[typing.List[str], CompactTable|FactorizedTable]] = {}
+        # reverse indexes : variables to the variables whose disjunctive unifications involve them, and to the relations involving them
+        self._disj_unification_owners:typing.Dict[str, typing.Set[str]] = {}
+        self._general_relations_by_var:typing.Dict[str, typing.Set[str]] = {}
+        # variables whose domain, unifications or separations changed since they were last collected (see ConstraintNetwork.pop_changed_vars)
+        # only recorded once someone needs them, from the backup level given by _tracking_level (see ConstraintNetwork.track_changes)
+        self._changed_objvars:typing.Set[str] = set()
+        self._tracking_level:int|None = None
+        # undo log of the changes made to the structures above (see ConstraintNetwork.backup and ConstraintNetwork.backtrack)
+        self._trail:Trail = Trail()
         # NOTE: general relations inefficient but good enough for now... B+Tree ???
         # linear arithmetic constraints ? for example for durations...
         # ANSWER : through general relation constraints (corresponding to formula) and fape-type linking between binding constraint net and temporal net
 
     @property
-    def domains(self) -> typing.Dict[str, Domain]:
-        return self._domains_list[-1]
+    def domains(self) -> DomainsView:
+        return self._domains_view
 
     @property
-    def unifications(self) -> UnionFind2():
-        return self._unifications_list[-1]
+    def unifications(self) -> UnionFind3:
+        return self._unifications
 
     @property
     def disj_unifications(self) -> typing.Dict[str, typing.Set[str]]:
-        return self._disj_unifications_list[-1]
+        return self._disj_unifications
 
     @property
     def separations(self) -> typing.Dict[str, typing.Set[str]]:
-        return self._separations_list[-1]
+        return self._separations
+
+    @property
+    def class_separations(self) -> typing.Dict[str, typing.Set[str]]:
+        return self._class_separations
 
     @property
-    def general_relations(self) -> typing.Dict[str,typing.Tuple[typing.Tuple[str,...], typing.List[typing.Tuple[object,...]]]]:
-        return self._general_relations_list[-1]
+    def general_relations(self) -> typing.Dict[str,typing.Tuple[typing.List[str], CompactTable|FactorizedTable]]:
+        return self._general_relations
 
-    def _domains_backup(self) -> None:
-        self._domains_list.append({ k:deepcopy(self.domains[k]) for k in self.domains })
+    @property
+    def disj_unification_owners(self) -> typing.Dict[str, typing.Set[str]]:
+        return self._disj_unification_owners
 
-    def _unifications_backup(self) -> None:
-        self._unifications_list.append(deepcopy(self.unifications))
+    @property
+    def general_relations_by_var(self) -> typing.Dict[str, typing.Set[str]]:
+        return self._general_relations_by_var
 
-    def _disj_unifications_backup(self) -> None:
-        self._disj_unifications_list.append({ k:self.disj_unifications[k].copy() for k in self.disj_unifications })
+    # Domains, relation tables and the sets of disjunctive unifications, (class) separations and reverse indexes are modified in place.
+    # Before their first modification at the current backup level (or since the last fork), they are replaced by a copy (the original being kept in the trail).
+    # The union-find records its changes one by one in the trail instead, and copies its dictionaries itself once after a fork (see src.utility.unionfind.UnionFind3).
 
-    def _separations_backup(self) -> None:
-        self._separations_list.append({ k:self.separations[k].copy() for k in self.separations })
+    def _root(self, p_var:str) -> str:
+        if p_var in self._unifications.parent_node:
+            return self._unifications.find(p_var)
+        return p_var
 
-    def _general_relations_backup(self) -> None:
-        self._general_relations_list.append({ k: (self.general_relations[k][0],deepcopy(self.general_relations[k][1])) for k in self.general_relations })
+    def _domain_for_write(self, p_var:str) -> Domain:
+        root = self._root(p_var)
+        if self._trail.save_once(("domain", root)):
+            self._trail.set_item(self._domains, root, self._domains[root].copy())
+        return self._domains[root]
+
+    def _general_relation_for_write(
+        self,
+        p_name:str,
+        p_param_vars:typing.List[str],
+        p_new_rows:typing.Iterable[typing.Tuple[object,...]]|FactorizedTable=(),
+    ) -> CompactTable|FactorizedTable:
+        if p_name not in self._general_relations:
+            # a relation declared with a factorized table keeps it (rows are never enumerated)
+            if isinstance(p_new_rows, FactorizedTable):
+                (table, p_new_rows) = (p_new_rows.copy(), ())
+            else:
+                table = CompactTable(len(p_param_vars))
+            self._trail.set_item(self._general_relations, p_name, (p_param_vars, table))
+            self._trail.save_once(("general_relation", p_name))
+            for var in p_param_vars:
+                self._add_to_set_entry("_general_relations_by_var", var, p_name)
+        elif self._trail.save_once(("general_relation", p_name)):
+            self._trail.set_item(self._general_relations, p_name,
+                (self._general_relations[p_name][0], self._general_relations[p_name][1].copy()))
+        table = self._general_relations[p_name][1]
+        if len(p_new_rows) > 0:
+            table.add_rows(p_new_rows)
+        return table
+
+    def _add_domain(self, p_var:str, p_domain:Domain) -> None:
+        self._trail.set_item(self._domains, p_var, p_domain)
+        self._trail.save_once(("domain", p_var))
+
+    def _set_entry_for_write(self, p_name:str, p_key) -> typing.Set:
+        p_dict = getattr(self, p_name)
+        if p_key not in p_dict:
+            self._trail.set_item(p_dict, p_key, set())
+            self._trail.save_once((p_name, p_key))
+        elif self._trail.save_once((p_name, p_key)):
+            self._trail.set_item(p_dict, p_key, p_dict[p_key].copy())
+        return p_dict[p_key]
+
+    def _add_to_set_entry(self, p_name:str, p_key, p_element) -> None:
+        self._set_entry_for_write(p_name, p_key).add(p_element)
+
+    def _merge_class_separations(self, p_old_root:str, p_new_root:str) -> None:
+        """
+        Transfers the separations of a component whose root was linked to another root (by a union) to the new root.
+        If both components were separated, the merged component is separated from itself (its variables aren't unifiable).
+        """
+        if p_old_root not in self._class_separations:
+            return
+        new_root_separations = self._set_entry_for_write("_class_separations", p_new_root)
+        for root in self._class_separations[p_old_root]:
+            if root == p_old_root or root == p_new_root:
+                new_root_separations.add(p_new_root)
+            else:
+                root_separations = self._set_entry_for_write("_class_separations", root)
+                root_separations.discard(p_old_root)
+                root_separations.add(p_new_root)
+                new_root_separations.add(root)
+        new_root_separations.discard(p_old_root)
+
+    def _constraint_key(self, p_constr_type:ConstraintType, p_constr) -> typing.Hashable:
+        """
+        Returns the identity of a constraint in the propagation worklist (None for unary constraints, which are never queued again).
+        """
+        if p_constr_type == ConstraintType.UNIFICATION or p_constr_type == ConstraintType.SEPARATION:
+            return (p_constr_type, p_constr[0], p_constr[1])
+        if p_constr_type == ConstraintType.DISJ_UNIFICATION:
+            return (p_constr_type, p_constr[0], frozenset(p_constr[1]))
+        if p_constr_type == ConstraintType.GENERAL_RELATION:
+            return (p_constr_type, p_constr[0])
+        return None
+
+    def _constraint_vars(self, p_constr_type:ConstraintType, p_constr) -> typing.Iterable[str]:
+        if p_constr_type == ConstraintType.DISJ_UNIFICATION:
+            return [p_constr[0]] + list(p_constr[1])
+        if p_constr_type == ConstraintType.GENERAL_RELATION:
+            return self._general_relations[p_constr[0]][0]
+        return p_constr
+
+    def _enqueue(self, p_worklist:typing.List, p_queued:typing.Set, p_constr_type:ConstraintType, p_constr) -> None:
+        key = self._constraint_key(p_constr_type, p_constr)
+        if key not in p_queued:
+            p_queued.add(key)
+            p_worklist.append((p_constr_type, p_constr))
+
+    def _component(self, p_var:str) -> typing.Iterable[str]:
+        # the variables unified with the specified one (including itself)
+        if self.unifications.contains([p_var]):
+            return self.unifications.connected_component(p_var)
+        return (p_var,)
+
+    def _record_changed_objvars(self, p_vars:typing.Iterable[str]) -> None:
+        if self._tracking_level is None:
+            return
+        for var in p_vars:
+            self._changed_objvars.add(var)
+            # if the change is backtracked, the variable changes again (only recorded once per backup level)
+            if self._trail.save_once(("changed_objvar", var)):
+                self._trail.record_call(self._changed_objvars, "add", var)
+
+    def _record_changed_components(self, p_vars:typing.Iterable[str]) -> None:
+        if self._tracking_level is not None:
+            for var in p_vars:
+                self._record_changed_objvars(self._component(var))
+
+    def _fork(self) -> BCN:
+        res = BCN()
+        res._domains = self._domains.copy()
+        res._unifications = self._unifications.fork()
+        res._disj_unifications = self._disj_unifications.copy()
+        res._separations = self._separations.copy()
+        res._class_separations = self._class_separations.copy()
+        res._general_relations = self._general_relations.copy()
+        res._disj_unification_owners = self._disj_unification_owners.copy()
+        res._general_relations_by_var = self._general_relations_by_var.copy()
+        res._changed_objvars = self._changed_objvars.copy()
+        # (the fork has no backups)
+        res._tracking_level = None if self._tracking_level is None else 0
+        self._trail.share()
+        res._trail.share()
+        return res
 
     def clear(self) -> None:
         """
@@ -423,11 +833,17 @@ class BCN():
         Side effects:
             Clears (by reinstantiating) all collections (including backups)
         """
-        self._domains_list[-1] = {}
-        self._unifications_list[-1] = UnionFind2()
-        self._disj_unifications_list[-1] = {}
-        self._separations_list[-1] = {}
-        self._general_relations_list[-1] = {}
+        self._domains = {}
+        self._unifications = UnionFind3()
+        self._disj_unifications = {}
+        self._separations = {}
+        self._class_separations = {}
+        self._general_relations = {}
+        self._disj_unification_owners = {}
+        self._general_relations_by_var = {}
+        self._changed_objvars = set()
+        self._tracking_level = None
+        self._trail.clear()
 
     # NOTE: quite an inefficient implementation because of the copying etc...
     # ideally - the domain objects should only contain pointers to values, not the values themselves
@@ -458,9 +874,26 @@ class BCN():
             return True
         # initial worklist (already shallow-copied in the main constraint network before calling this method)
         worklist = p_input_constraints
+        # keys of the constraints (re-)queued for revision in the worklist, so that they aren't queued several times (see _enqueue)
+        queued = set()
+        # stamps of the last revision of each constraint and of the last change of each variable's domain,
+        # so that a queued constraint isn't revised again if none of its variables' domains changed since its last revision
+        # (including during the revision itself, as a relation between unified variables may need to be revised again)
+        last_revision = {}
+        last_change = {}
+        stamp = 0
         while (len(worklist) > 0):
 
             (constr_type, constr) = worklist.pop()
+            stamp += 1
+
+            key = self._constraint_key(constr_type, constr)
+            if key in queued:
+                queued.discard(key)
+                if key in last_revision:
+                    revision_stamp = last_revision[key]
+                    if all(last_change.get(v, 0) < revision_stamp for v in self._constraint_vars(constr_type, constr)):
+                        continue
 
             change_info = []
             var1 = None
@@ -478,9 +911,9 @@ class BCN():
                 var1 = constr[0]
                 val = constr[1]
                 if constr_type == ConstraintType.DOMAIN_VAL_LEQ or constr_type == ConstraintType.DOMAIN_VAL_LE:
-                    changed = self.domains[var1].restrict_to_ls(val, constr_type == ConstraintType.DOMAIN_VAL_LE)
+                    changed = self._domain_for_write(var1).restrict_to_ls(val, constr_type == ConstraintType.DOMAIN_VAL_LE)
                 elif constr_type == ConstraintType.DOMAIN_VAL_GEQ or constr_type == ConstraintType.DOMAIN_VAL_GE:
-                    changed = self.domains[var1].restrict_to_gt(val, constr_type == ConstraintType.DOMAIN_VAL_GE)
+                    changed = self._domain_for_write(var1).restrict_to_gt(val, constr_type == ConstraintType.DOMAIN_VAL_GE)
 
                 if changed:
                     change_info.append((var1,val))
@@ -500,27 +933,41 @@ class BCN():
 
                 if var1 != Domain._ANY_VALUE_VAR and var2 != Domain._ANY_VALUE_VAR:
 
-                    self.unifications.add_and_union(var1, var2)
-                    changed = self.domains[var1].intersection(self.domains[var2])
-                    
-                    if changed:
-                        change_info.append((var1,var2))
-
-                    if self.domains[var1].is_empty():
-                        return False
+                    if not (self.unifications.contains([var1]) and self.unifications.contains([var2])
+                        and self.unifications.find(var1) == self.unifications.find(var2)
+                    ):
+                        # the (single) domain of the merged component is the intersection of the domains of both components
+                        domain = self.domains[var1].copy()
+                        changed = domain.intersection(self.domains[var2])
+                        changed = changed or domain.size() != self.domains[var2].size()
+                        (root1, root2) = (self._root(var1), self._root(var2))
+                        self.unifications.add_and_union(var1, var2, self._trail)
+                        root = self._root(var1)
+                        self._add_domain(root, domain)
+                        self._merge_class_separations(root2 if root == root1 else root1, root)
+
+                        if changed:
+                            change_info.append((var1,var2))
+                        else:
+                            self._record_changed_components((var1,))
+
+                        if domain.is_empty():
+                            return False
             
             elif constr_type == ConstraintType.DISJ_UNIFICATION:
                 
                 var1 = constr[0]
                 var2list = constr[1]
             
-                self.disj_unifications.setdefault(var1,set()).update(var2list)
+                for v in var2list:
+                    self._add_to_set_entry("_disj_unifications", var1, v)
+                    self._add_to_set_entry("_disj_unification_owners", v, var1)
             
-                _temp = deepcopy(self.domains[var2list[0]]) # deep copy so that the actual domain of var2list[0] doesn't get modified in the loop
+                _temp = self.domains[var2list[0]].copy() # copy so that the actual domain of var2list[0] doesn't get modified in the loop
                 for i in range(1,len(var2list)): # start at 1 instead of 0 because first element already taken care of on the previous line
                     _temp.union(self.domains[var2list[i]])
             
-                changed = self.domains[var1].intersection(_temp)
+                changed = self._domain_for_write(var1).intersection(_temp)
                 if changed:
                     change_info.append((var1,var2list))
             
@@ -535,13 +982,19 @@ class BCN():
                 if ((self.unifications.contains([var1])
                     and self.unifications.contains([var2])
                     and self.unifications.find(var1) == self.unifications.find(var2))
-                        or (self.domains[var1].size() == 1 and self.domains[var1].get_values() == self.domains[var2].get_values())
+                        or (self.domains[var1].size() == 1 and self.domains[var2].size() == 1
+                            and self.domains[var1].get_values() == self.domains[var2].get_values())
                 ):
                     return False
 
-                self.separations.setdefault(var1,set()).add(var2)
+                (root1, root2) = (self._root(var1), self._root(var2))
+                if not (root1 in self.class_separations and root2 in self.class_separations[root1]):
+                    self._record_changed_components((var1, var2))
 
-                changed = self.domains[var1].difference_if_other_is_singleton(self.domains[var2])
+                self._add_to_set_entry("_separations", var1, var2)
+                self._add_to_set_entry("_class_separations", root1, root2)
+
+                changed = self._domain_for_write(var1).difference_if_other_is_singleton(self.domains[var2])
                 if changed:
                     change_info.append((var1,var2))
                 
@@ -566,32 +1019,32 @@ class BCN():
                 
                 relation_name = constr[0]
                 relation_param_vars = list(constr[1][0])
-                relation_table = list(constr[1][1]) # copy (shallow) so that the input parameter doesn't get modified
-                self.general_relations.setdefault(relation_name,(relation_param_vars,[]))[1].extend(relation_table)
-
-                n_rows = len(self.general_relations[relation_name][1])
-                for row in range(n_rows-1,-1,-1): # backwards loop, so no problem removing elements from list
-                    for col in range(len(self.general_relations[relation_name][1][row])):
-                        if not self.domains[relation_param_vars[col]].contains(self.general_relations[relation_name][1][row][col]):
-                            self.general_relations[relation_name][1].pop(row)
-                            break
-                
-                proj_doms:typing.Dict[str,Domain] = {}
+                table = self._general_relation_for_write(relation_name, relation_param_vars, constr[1][1])
+                table.filter([self.domains[var] for var in relation_param_vars])
+
+                # restrict the domain of each variable to the values supported by (still valid) rows
+                domains_changed = False
                 for col in range(len(relation_param_vars)):
                     var = relation_param_vars[col]
-                    proj_doms[var] = Domain()
-                    for row in range(len(self.general_relations[relation_name][1])):
-                        proj_doms[var].add_discrete_value(self.general_relations[relation_name][1][row][col])
-
-                for var in proj_doms:
-
-                    changed = self.domains[var].intersection(proj_doms[var])
+                    values = table.supported_values(col)
+                    # (the supported values are all in the domain, unless it was restricted through another column of the same variable / component)
+                    if not domains_changed and self.domains[var].size() == len(values):
+                        continue
+                    proj_dom = self.domains[var].empty_copy()
+                    for v in values:
+                        proj_dom.add_discrete_value(v)
+
+                    changed = self._domain_for_write(var).intersection(proj_dom)
                     if changed:
+                        domains_changed = True
                         change_info.append((var,relation_name))
 
                     if self.domains[var].is_empty():
                         return False
 
+            if key is not None:
+                last_revision[key] = stamp
+
             # for all variables whose domains were updated during propagation of the popped constraints,
             # push the constraints they're involved in to the worklist
 
@@ -603,6 +1056,10 @@ class BCN():
                 var2list = []
                 relname = None
 
+                # the weights of the temporal constraints whose bound is this variable will have to be refreshed in the STN
+                if p_stn is not None and var1 in p_stn.involved_objvars:
+                    p_stn._dirty_objvars.add(var1)
+
                 if constr_type == ConstraintType.DOMAIN_VAL_LE or constr_type == ConstraintType.DOMAIN_VAL_GE:
                     val = arg
                 elif constr_type == ConstraintType.UNIFICATION or constr_type == ConstraintType.SEPARATION:
@@ -612,27 +1069,35 @@ class BCN():
                 elif constr_type == ConstraintType.GENERAL_RELATION:
                     relname = arg
 
-                if self.unifications.contains([var1]):
-                    for v in self.unifications.connected_component(var1):
-                        if v != var1 and v != var2:
-                            worklist.append((ConstraintType.UNIFICATION,(v, var1)))
-                            worklist.append((ConstraintType.UNIFICATION,(var1, v)))
+                # the domain of var1 is shared by all the variables unified with it, whose constraints have to be revised too
+                changed_vars = self._component(var1)
+                self._record_changed_objvars(changed_vars)
 
-                if var1 in self.disj_unifications:
-                    worklist.append((ConstraintType.DISJ_UNIFICATION,(var1,list(self.disj_unifications[var1]))))
-                for v in self.disj_unifications:
-                    if v != var1 and var1 in self.disj_unifications[v]:
-                        worklist.append((ConstraintType.DISJ_UNIFICATION,(v,list(self.disj_unifications[v]))))
+                for var in changed_vars:
 
-                if var1 in self.separations:
-                    for v in self.separations[var1]:
-                        if v != var2: #and obviously v can't be having a separation with itself anyway
-                            worklist.append((ConstraintType.SEPARATION,(v, var1)))
-                            worklist.append((ConstraintType.SEPARATION,(var1, v)))
+                    last_change[var] = stamp
 
-                for name in self.general_relations:
-                    if name != relname and var1 in self.general_relations[name][0]:
-                        worklist.append((ConstraintType.GENERAL_RELATION,(name, self.general_relations[name])))
+                    if var != var1 and p_stn is not None and var in p_stn.involved_objvars:
+                        p_stn._dirty_objvars.add(var)
+
+                    if var in self.disj_unifications:
+                        self._enqueue(worklist, queued, ConstraintType.DISJ_UNIFICATION,(var,list(self.disj_unifications[var])))
+                    if var in self.disj_unification_owners:
+                        for v in self.disj_unification_owners[var]:
+                            if v != var:
+                                self._enqueue(worklist, queued, ConstraintType.DISJ_UNIFICATION,(v,list(self.disj_unifications[v])))
+
+                    if var in self.separations:
+                        for v in self.separations[var]:
+                            if var != var1 or v != var2: #and obviously v can't be having a separation with itself anyway
+                                self._enqueue(worklist, queued, ConstraintType.SEPARATION,(v, var))
+                                self._enqueue(worklist, queued, ConstraintType.SEPARATION,(var, v))
+
+                    if var in self.general_relations_by_var:
+                        for name in self.general_relations_by_var[var]:
+                            if var != var1 or name != relname:
+                                # (no new rows, the relation's table is only revised)
+                                self._enqueue(worklist, queued, ConstraintType.GENERAL_RELATION,(name, (self.general_relations[name][0], ())))
 
                 #if p_stn is not None:
                 #    if var1 in p_stn.m_involved_objvars:
@@ -660,9 +1125,23 @@ class BCN():
 # Additional info is available in the notes above,
 # notably on the linkage in constraint propagation between the STN and BCN.
 
-# Currently, propagation is done in a non-incremental way using a direct computation of
-# the all-pairs shortest paths matrix using the Floyd-Warshall algorithm.
-# In the future, a more subtle and efficient approach (Johnson's algorithm, Planken 2008 path consistency, others...)
+# Currently, propagation is done incrementally: the minimal network (all-pairs shortest paths matrix) is kept up to date
+# by relaxing every pair of timepoints through each new (or tightened) edge, which is O(n^2) per edge instead of O(n^3).
+# Negative cycles are detected when an edge is inserted, before the matrix is updated.
+# The direct computation of the all-pairs shortest paths matrix using the Floyd-Warshall algorithm is still available as a fallback.
+# Both read edge weights from a weight table, which is updated when constraints are added, and refreshed only for the constraints
+# whose bound variables' domains changed in the BCN (instead of re-evaluating every constraint on every propagation).
+# Timepoints fixed relatively to another one when they're added (e.g. t1 - t2 <= d and t2 - t1 <= -d, such as the start of an action
+# and time "now", or the end of a supporter and the start of the supported assertion) are collapsed into the rigid component of the other one :
+# the minimal network is only built on the representative of each component, and each timepoint is mapped to it with an offset.
+# Queries are transparent (see the minimal_network property), and propagation / APSP run on the compressed network.
+# For sparse (loosely connected) networks, the minimal network can instead only keep the edges and Johnson potentials,
+# and compute distances on demand (see MinimalNetworkType.SPARSE in src.constraints.minimal_network).
+# In the future, a more subtle and efficient approach (Planken 2008 path consistency, others...)
+
+# When propagation fails because of a negative cycle, the temporal constraints forming the cycle are kept as an explanation
+# of the inconsistency (see ConstraintNetwork.temporal_inconsistency_explanation). Search can then discard resolvers whose constraints
+# would close the same cycle again (see ConstraintNetwork.closes_negative_cycle), without propagating them.
 
 # Extensions accounting for uncertainty, probability, and partial observability are kept for later.
 
@@ -699,42 +1178,104 @@ class BCN():
 
 class STN():
 
-    def __init__(self):
-        self._controllability_list = [{}]
+    def __init__(self, p_minimal_network_type:MinimalNetworkType=MinimalNetworkType.DICT):
+        self._minimal_network_type = p_minimal_network_type
+        self._controllability:typing.Dict[str, bool] = {}
         # bool indicates whether the variable is controllable or not.
-        self._constraints_list = [{}]
+        self._constraints:typing.Dict[typing.Tuple[str,str],typing.Set[(str|float,bool)]] = {}
         # (x,y,d,b) <-> x - y <= d (in that order!) (and if b is true : < instead of <=)
         # constraints of the form : t1 - t2 <= d (object variable) are interpreted as : t1 - t2 <= max{ v | v € dom(v) } : dom(v) = domain of v in binding constr net
-        self._involved_objvars_list = [{}]
-        self._minimal_network_list = [{}]
+        # d can also directly be a constant (numeric value), in which case it isn't linked to the binding constr net
+        self._involved_objvars:typing.Dict[str, typing.Set[typing.Tuple[str,str]]] = {}
+        self._weights:typing.Dict[typing.Tuple[str,str],float] = {}
+        # weight table : weight (tightest bound) of each edge (u,v) (i.e. v - u <= weight), i.e. the evaluation of constraints (v,u) (see _eval)
+        # maintained when constraints are added, and refreshed for the constraints of variables whose domains changed in the bcn (see _refresh_weights)
+        self._dirty_objvars:typing.Set[str] = set()
+        # object variables whose domains changed since the weights of the edges they're involved in were last refreshed
+        self._inconsistency_explanation:typing.List[typing.Tuple[str,str,str|float,bool]]|None = None
+        # temporal constraints forming the negative cycle found during the last (failed) propagation (see _explain_negative_cycle)
+        self._rigid_components:typing.Dict[str,typing.Tuple[str,float]] = {}
+        # representative r and offset o (i.e. tp = r + o) of each timepoint of the minimal network, see _compress_rigid_components
+        self._minimal_network = new_minimal_network(p_minimal_network_type)
+        # see src.constraints.minimal_network : either a dictionary, a dense matrix or a sparse graph (which can be read like a dictionary)
+        # only built on the representatives of the rigid components (see the minimal_network property to read it for any timepoint)
+        self._changed_tempvars:typing.Set[str] = set()
+        self._tracking_level:int|None = None
+        # timepoints which are new or whose minimal distances changed since they were last collected (see ConstraintNetwork.pop_changed_vars)
+        # only recorded once someone needs them, from the backup level given by _tracking_level (see ConstraintNetwork.track_changes)
+        # undo log of the changes made to the structures above (see ConstraintNetwork.backup and ConstraintNetwork.backtrack)
+        self._trail:Trail = Trail()
 
     @property
     def controllability(self) -> typing.Dict[str, bool]:
-        return self._controllability_list[-1]
+        return self._controllability
 
     @property
-    def constraints(self) -> typing.Dict[typing.Tuple[str,str],typing.Set[(str,bool)]]:
-        return self._constraints_list[-1]
+    def constraints(self) -> typing.Dict[typing.Tuple[str,str],typing.Set[(str|float,bool)]]:
+        return self._constraints
 
     @property
     def involved_objvars(self) -> typing.Dict[str, typing.Set[typing.Tuple[str,str]]]:
-        return self._involved_objvars_list[-1]
+        return self._involved_objvars
 
     @property
-    def minimal_network(self) -> typing.Dict[typing.Tuple[str,str],float]:
-        return self._minimal_network_list[-1]
+    def weights(self) -> typing.Dict[typing.Tuple[str,str],float]:
+        return self._weights
 
-    def _controllability_backup(self) -> None:
-        self._controllability_list.append({ k:deepcopy(self.controllability[k]) for k in self.controllability })
-
-    def _constraints_backup(self) -> None:
-        self._constraints_list.append({ k:self.constraints[k].copy() for k in self.constraints })
+    @property
+    def minimal_network(self) -> typing.Mapping[typing.Tuple[str,str],float]:
+        return RigidComponentsView(self._minimal_network, self._rigid_components)
 
-    def _involved_objvars_backup(self) -> None:
-        self._involved_objvars_list.append({ k:self.involved_objvars[k].copy() for k in self.involved_objvars })
+    @property
+    def rigid_components(self) -> typing.Dict[str,typing.Tuple[str,float]]:
+        return self._rigid_components
 
-    def _minimal_network_backup(self) -> None:
-        self._minimal_network_list.append({ k:self.minimal_network[k] for k in self.minimal_network })
+    @property
+    def minimal_network_type(self) -> MinimalNetworkType:
+        return self._minimal_network_type
+
+    # Like in the BCN, the sets of constraints and involved object variables are replaced by a copy before their first modification
+    # at the current backup level (or since the last fork). The minimal network does the same with its rows / matrix.
+
+    def _add_to_set_entry(self, p_name:str, p_key, p_element) -> None:
+        p_dict = getattr(self, p_name)
+        if p_key not in p_dict:
+            self._trail.set_item(p_dict, p_key, set())
+            self._trail.save_once((p_name, p_key))
+        elif self._trail.save_once((p_name, p_key)):
+            self._trail.set_item(p_dict, p_key, p_dict[p_key].copy())
+        p_dict[p_key].add(p_element)
+
+    def _record_changed_tempvars(self, p_timepoints:typing.Iterable[str]) -> None:
+        if self._tracking_level is None:
+            return
+        for tp in p_timepoints:
+            self._changed_tempvars.add(tp)
+            # if the change is backtracked, the timepoint changes again (only recorded once per backup level)
+            if self._trail.save_once(("changed_tempvar", tp)):
+                self._trail.record_call(self._changed_tempvars, "add", tp)
+
+    def _record_changed_representatives(self, p_representatives:typing.Set[str]|None) -> None:
+        # the distances of all the timepoints of a rigid component are those of its representative (with an offset)
+        if p_representatives:
+            self._record_changed_tempvars([tp for (tp, (r, _)) in self._rigid_components.items() if r in p_representatives])
+
+    def _fork(self) -> STN:
+        res = STN(self._minimal_network_type)
+        res._controllability = self._controllability.copy()
+        res._constraints = self._constraints.copy()
+        res._involved_objvars = self._involved_objvars.copy()
+        res._weights = self._weights.copy()
+        res._dirty_objvars = self._dirty_objvars.copy()
+        res._inconsistency_explanation = self._inconsistency_explanation
+        res._rigid_components = self._rigid_components.copy()
+        res._minimal_network = self._minimal_network.fork()
+        res._changed_tempvars = self._changed_tempvars.copy()
+        # (the fork has no backups)
+        res._tracking_level = None if self._tracking_level is None else 0
+        self._trail.share()
+        res._trail.share()
+        return res
 
     def clear(self) -> None:
         """
@@ -744,10 +1285,17 @@ class STN():
         Side effects:
             Clears (by reinstantiating) all collections (including backups)
         """
-        self._controllability_list[-1] = {}
-        self._constraints_list[-1] = {}
-        self._involved_objvars_list[-1] = {}
-        self._minimal_network_list[-1] = {}
+        self._controllability = {}
+        self._constraints = {}
+        self._involved_objvars = {}
+        self._weights = {}
+        self._dirty_objvars = set()
+        self._inconsistency_explanation = None
+        self._rigid_components = {}
+        self._minimal_network = new_minimal_network(self._minimal_network_type)
+        self._changed_tempvars = set()
+        self._tracking_level = None
+        self._trail.clear()
         
     def size(self) -> int:
         """
@@ -759,7 +1307,8 @@ class STN():
     def _propagate(
         self,
         p_input_constraints:typing.List[typing.Tuple[str,str,str|float,bool]],
-        p_bcn:BCN
+        p_bcn:BCN,
+        p_full_recomputation:bool=False,
     ) -> bool:
         """
         Propagates input constraints to network.
@@ -769,6 +1318,8 @@ class STN():
                 Input constraints, fed to the method in the same format as in ConstraintNetwork.propagate_constraints_partial (only temporal ones, obviously)
             p_bcn (BCN):
                 BCN to interface with.
+            p_full_recomputation (bool, False by default):
+                Whether to recompute the minimal network from scratch (Floyd-Warshall) instead of updating it incrementally.
         Returns:
             True if constraint propagation was successful, False otherwise
         Side effects:
@@ -778,59 +1329,326 @@ class STN():
             return True
         # initial worklist (already shallow-copied in the main constraint network before calling this method)
         worklist = p_input_constraints#list(p_input_constraints)
+        # pairs of timepoints (t1,t2,d) fixed relatively to each other (t1 - t2 = d) by two opposite constant constraints
+        rigid_pairs = []
         for (t1, t2, bound, strict) in worklist:
 
-            if type(bound) is str:
-                var = bound
-            else: # if the bound is not specified as a variable name (managed in the bcn), but as a value,
+            if type(bound) is not str: # if the bound is not specified as a variable name (managed in the bcn), but as a value,
                 # if the specified bound not strict, is given as the value 0, and the variables are identical, the constraint is trivial
                 # such checks can happen a lot in chronicle management, which is why it makes sense to deal with it early and avoid further unnecessary checks
                 if bound == 0 and not strict and t1 == t2:
                     break
-                # create a helper constant variable (singleton domain) in the bcn and use it instead
-                # "hcov" stands for "helper constant object variable"
-                var = "__hcov_{0}".format(new_int_id())
-                p_bcn.domains[var] = Domain(DomainType.DISCRETE, [bound])
+                # otherwise, the constant is directly used as the bound of the constraint (no need for a variable in the bcn)
 
-            self.controllability.setdefault(t1,True)# will deal with controllability later
-            self.controllability.setdefault(t2,True)# will deal with controllability later
+            if t1 not in self.controllability:
+                self._trail.set_item(self._controllability, t1, True)# will deal with controllability later
+            if t2 not in self.controllability:
+                self._trail.set_item(self._controllability, t2, True)# will deal with controllability later
 
             # register the constraint, and propagate a new one in the bcn
             # restricting the domain of the "bound" variable of the symmetric constraint in a "least-constraining fashion"
             # e.g. if the considered constraint is "t1 - t2 <= u", and we also have "l <= t1 - t2", then we restrict l to be >= -max(u).
-            self.constraints.setdefault((t1,t2),set()).add((var,strict))
-            self.involved_objvars.setdefault(var,set()).add((t1,t2))
+            # if the symmetric constraint's bound is a constant, it is checked the same way (it has to be >= -max(u))
+            self._add_to_set_entry("_constraints", (t1,t2), (bound,strict))
+            if type(bound) is str:
+                self._add_to_set_entry("_involved_objvars", bound, (t1,t2))
+            weight = self._bound_value(bound, p_bcn)
+            if strict:
+                weight -= sys.float_info.epsilon
+            if weight < self._weights.get((t2,t1), math.inf):
+                self._trail.set_item(self._weights, (t2,t1), weight)
             if (t2,t1) in self.constraints: # notice we have (t2,t1), not (t1,t2) !!
-                for (other_var, strict) in self.constraints[(t2,t1)]:
+                val = -self._bound_value(bound, p_bcn)
+                this_cstr = (t1, t2, bound, strict)
+                if type(bound) is not str and not strict and t1 != t2 and (-bound, False) in self.constraints[(t2,t1)]:
+                    rigid_pairs.append((t1, t2, bound))
+                for (other_bound, strict) in self.constraints[(t2,t1)]:
+                    # in case of failure, the explanation is the cycle formed by both constraints
+                    # (unless the failure comes from elsewhere in the bcn, i.e. the cycle isn't negative)
+                    other_val = self._bound_value(other_bound, p_bcn)
+                    if other_val < val or (strict and other_val == val):
+                        self._inconsistency_explanation = [this_cstr, (t2, t1, other_bound, strict)]
+                    if type(other_bound) is not str:
+                        if other_bound < val or (strict and other_bound == val):
+                            return False
+                        continue
                     if strict:
                         cstr_type = ConstraintType.DOMAIN_VAL_GE
                     else:
                         cstr_type = ConstraintType.DOMAIN_VAL_GEQ
-                    if (not p_bcn._propagate([(cstr_type,(other_var,-p_bcn.domains[var].max_value()))], self)):
+                    if (not p_bcn._propagate([(cstr_type,(other_bound,val))], self)):
                         return False
+                    self._inconsistency_explanation = None
+
+        self._compress_rigid_components(rigid_pairs)
+        self._refresh_weights(p_bcn)
+
+        if not p_full_recomputation:
+            return self._apsp_incremental(p_bcn)
 
         # compute the all pairs shortest paths graph (using floyd warshall)
-        # if there is a < 0 value on the diagonal, then the stn is inconsistent
+        # if there is a < 0 value on the diagonal, then the stn is inconsistent (the computation then stops right away)
         # NOTE: this is obviously inefficient, although easy. Planken incremental full path consistency algorithm, or johnson's algorithm
         # could be nice
-        res = self._apsp_fw(p_bcn)
-        for v in self.controllability:
-            if res[(v,v)] < 0:
-                return False
+        res = self._apsp_fw()
+        if res is None:
+            self._explain_negative_cycle(p_bcn)
+            return False
 
-        self._minimal_network_list[-1] = res
+        self._trail.set_attr(self, "_minimal_network", res)
+        self._record_changed_tempvars(self._rigid_components)
         return True
 
-    def _apsp_fw(self, p_bcn:BCN):
-        
-        res = {}
+    def _compress_rigid_components(self, p_rigid_pairs:typing.List[typing.Tuple[str,str,float]]) -> None:
+        """
+        Maps the timepoints which aren't in the minimal network yet to the representative of their rigid component.
+        A new timepoint fixed relatively to another one (t1 - t2 = d, i.e. t1 - t2 <= d and t2 - t1 <= -d)
+        joins the component of the other one (with offset(t1) = offset(t2) + d), instead of being added to the minimal network.
+        Other new timepoints are their own representative. Timepoints already in the network are never merged.
+        Arguments:
+            p_rigid_pairs (list((str,str,float))):
+                Pairs of timepoints (t1,t2,d) fixed relatively to each other (t1 - t2 = d)
+        Returns:
+            None
+        Side effects:
+            Updates the rigid components
+            Records the new timepoints as changed
+        """
+        components = self._rigid_components
+        new_timepoints = []
+        pending = p_rigid_pairs
+        while len(pending) > 0:
+            remaining = []
+            for (t1, t2, d) in pending:
+                if t1 in components and t2 in components:
+                    continue
+                if t2 in components:
+                    (r, o) = components[t2]
+                    self._trail.set_item(components, t1, (r, o + d))
+                    new_timepoints.append(t1)
+                elif t1 in components:
+                    (r, o) = components[t1]
+                    self._trail.set_item(components, t2, (r, o - d))
+                    new_timepoints.append(t2)
+                else:
+                    remaining.append((t1, t2, d))
+            # if no new timepoint could join a component, one of them starts a new component
+            if len(remaining) == len(pending):
+                self._trail.set_item(components, remaining[0][1], (remaining[0][1], 0))
+                new_timepoints.append(remaining[0][1])
+            pending = remaining
+        for tp in self.controllability:
+            if tp not in components:
+                self._trail.set_item(components, tp, (tp, 0))
+                new_timepoints.append(tp)
+        self._record_changed_tempvars(new_timepoints)
+
+    def _compressed_edge(self, p_source:str, p_target:str, p_weight:float) -> typing.Tuple[str,str,float]:
+        # edge u -> v (v - u <= w) <-> edge r_u -> r_v (r_v - r_u <= w + o_u - o_v)
+        # (edges inside a component become cycles on its representative, of weight >= 0 unless the stn is inconsistent)
+        (r_u, o_u) = self._rigid_components[p_source]
+        (r_v, o_v) = self._rigid_components[p_target]
+        if o_u == o_v:
+            return (r_u, r_v, p_weight)
+        return (r_u, r_v, p_weight + (o_u - o_v))
+
+    def _refresh_weights(self, p_bcn:BCN) -> None:
+        """
+        Refreshes the weight table for the constraints whose bound variables' domains changed since the last refresh.
+        Arguments:
+            p_bcn (BCN):
+                BCN to interface with (to evaluate edge weights)
+        Returns:
+            None
+        Side effects:
+            Updates the weight table
+        """
+        for var in self._dirty_objvars:
+            for (v,u) in self.involved_objvars.get(var, ()):
+                weight = self._eval((v,u), p_bcn)
+                if weight != self._weights.get((u,v), math.inf):
+                    self._trail.set_item(self._weights, (u,v), weight)
+        # (through the trail : the weights refreshed here are restored on backtrack, so their variables must be dirty again)
+        if len(self._dirty_objvars) > 0:
+            self._trail.set_attr(self, "_dirty_objvars", set())
+
+    def _apsp_incremental(self, p_bcn:BCN) -> bool:
+        """
+        Incrementally updates the minimal network (all pairs shortest paths) with the edges which are tighter than
+        the current minimal distance between their timepoints (i.e. new edges or edges whose bound variable's domain was restricted).
+        Each such edge is inserted in O(n^2) (see src.constraints.minimal_network).
+        Edge weights are read from the weight table.
+        Arguments:
+            p_bcn (BCN):
+                BCN to interface with (only used to explain an inconsistency)
+        Returns:
+            False as soon as an edge closes a negative cycle (i.e. the STN is inconsistent), True otherwise
+        Side effects:
+            Updates the minimal network in place
+            Records the timepoints whose minimal distances changed
+            Sets the inconsistency explanation in case of failure
+        """
+        # representatives which weren't in the network yet aren't connected to anything
+        self._minimal_network.add_timepoints((tp for (tp, (r, _)) in self._rigid_components.items() if tp == r), self._trail)
+        # (the minimal network only reports the representatives whose distances changed if they are recorded)
+        changed_representatives = None if self._tracking_level is None else set()
+        for ((u,v), weight) in self._weights.items():
+            # edge u -> v (of weight w) <-> constraint (v,u) <-> v - u <= w (notice the order !!)
+            if not self._minimal_network.relax_edge(*self._compressed_edge(u, v, weight), self._trail, changed_representatives):
+                self._record_changed_representatives(changed_representatives)
+                self._explain_negative_cycle(p_bcn, (u, v, weight))
+                return False
+        self._record_changed_representatives(changed_representatives)
+        return True
+
+    def _apsp_fw(self):
+
+        # shortest path from u to v, with the edge weights from the weight table
+        # None if a negative cycle is found
+        edges:typing.Dict[typing.Tuple[str,str],float] = {}
+        for ((u,v), weight) in self._weights.items():
+            (r_u, r_v, w) = self._compressed_edge(u, v, weight)
+            if w < edges.get((r_u,r_v), math.inf):
+                edges[(r_u,r_v)] = w
+        res = new_minimal_network(self._minimal_network_type)
+        if not res.floyd_warshall((tp for (tp, (r, _)) in self._rigid_components.items() if tp == r), edges):
+            return None
+        return res
+
+    def _explain_negative_cycle(self, p_bcn:BCN, p_edge:typing.Tuple[str,str,float]|None=None) -> None:
+        """
+        Finds a negative cycle in the weight table, and stores the temporal constraints forming it
+        as the explanation of the inconsistency (see ConstraintNetwork.temporal_inconsistency_explanation).
+        Arguments:
+            p_bcn (BCN):
+                BCN to interface with (to evaluate the bounds of the constraints)
+            p_edge ((str,str,float), None by default):
+                Edge (u,v,w) closing a negative cycle in the current (consistent) minimal network, if known.
+                The cycle is then made of this edge and of a shortest path from v back to u, found by following the minimal network
+                (in O(length of the path * degree)). Otherwise (or if that fails), the Bellman-Ford algorithm is used (in O(nm)).
+                As a last resort (when rounding errors on strict bounds hide the cycle from Bellman-Ford), the Floyd-Warshall
+                algorithm is replayed (in O(n^3)), keeping track of the shortest paths.
+        Returns:
+            None
+        Side effects:
+            Sets the inconsistency explanation
+        """
+        cycle = None
+        if p_edge is not None:
+            cycle = self._negative_cycle_through_edge(*p_edge, self.minimal_network)
+        if cycle is None:
+            cycle = self._negative_cycle_bellman_ford()
+        if cycle is None:
+            cycle = self._negative_cycle_floyd_warshall()
+        if cycle is not None:
+            self._inconsistency_explanation = [self._tightest_constraint(v, u, p_bcn) for (u,v) in cycle]
+
+    def _negative_cycle_through_edge(self,
+        p_source:str,
+        p_target:str,
+        p_weight:float,
+        p_network:typing.Mapping[typing.Tuple[str,str],float],
+    ) -> typing.List[typing.Tuple[str,str]]|None:
+
+        (u, v) = (p_source, p_target)
+        out_edges:typing.Dict[str,typing.List[typing.Tuple[str,float]]] = {}
+        for ((a,b),w) in self._weights.items():
+            out_edges.setdefault(a,[]).append((b,w))
+        # greedily follow the edges leading to u along a shortest path (the distances to u are given by the minimal network)
+        # if each step is tight (i.e. the path found is the shortest path v -> u given by the network), the cycle is the one which was detected
+        cycle = [(u,v)]
+        cycle_weight = p_weight
+        tight = True
+        visited = set([v])
+        current = v
+        while current != u:
+            best = None
+            for (x,w) in out_edges.get(current,[]):
+                if x in visited and x != u:
+                    continue
+                dist = w + (0 if x == u else p_network[(x,u)])
+                if best is None or dist < best[0] or (dist == best[0] and x == u):
+                    best = (dist, x, w)
+            if best is None or best[0] == math.inf:
+                return None
+            tight = tight and best[0] <= p_network[(current,u)]
+            cycle.append((current, best[1]))
+            cycle_weight += best[2]
+            current = best[1]
+            visited.add(current)
+        if tight or cycle_weight < 0:
+            return cycle
+        return None
+
+    def _negative_cycle_bellman_ford(self) -> typing.List[typing.Tuple[str,str]]|None:
+
+        # (implicit) source connected to all timepoints with 0 weight edges
+        dist = { tp:0 for tp in self.controllability }
+        pred:typing.Dict[str,str] = {}
+        last_relaxed = None
+        for _ in range(len(dist)+1):
+            last_relaxed = None
+            for ((a,b),w) in self._weights.items():
+                if dist[a] + w < dist[b]:
+                    dist[b] = dist[a] + w
+                    pred[b] = a
+                    last_relaxed = b
+            if last_relaxed is None:
+                return None
+        # a timepoint relaxed in the last iteration leads back to a negative cycle through its predecessors
+        x = last_relaxed
+        for _ in range(len(dist)):
+            x = pred[x]
+        cycle = []
+        y = x
+        while True:
+            cycle.append((pred[y], y))
+            y = pred[y]
+            if y == x:
+                break
+        cycle.reverse()
+        return cycle
+
+    def _negative_cycle_floyd_warshall(self) -> typing.List[typing.Tuple[str,str]]|None:
+
+        # same computations as in the minimal network's floyd_warshall (hence the same rounding errors),
+        # along with the next timepoint on each shortest path
+        dist:typing.Dict[str,typing.Dict[str,float]] = { u:{} for u in self.controllability }
+        nxt:typing.Dict[str,typing.Dict[str,str]] = { u:{} for u in self.controllability }
+        for ((u,v),w) in self._weights.items():
+            if w < math.inf:
+                dist[u][v] = w
+                nxt[u][v] = v
         for q in self.controllability:
-            for u in self.controllability:
-                for v in self.controllability:
-                    # shortest path from u to v (notice the order given to "eval" : v,u instead of u,v !!)
-                    res[(u,v)] = min(
-                        res.setdefault((u,v),self._eval((v,u), p_bcn)),
-                        res.setdefault((u,q),self._eval((q,u), p_bcn)) + res.setdefault((q,v),self._eval((v,q), p_bcn)))
+            row_q = dist[q]
+            for (u,row_u) in dist.items():
+                if q not in row_u:
+                    continue
+                d_uq = row_u[q]
+                for (v,d_qv) in list(row_q.items()):
+                    if d_uq + d_qv < row_u.get(v, math.inf):
+                        row_u[v] = d_uq + d_qv
+                        nxt[u][v] = nxt[u][q]
+            for u in dist:
+                if dist[u].get(u, math.inf) < 0:
+                    # follow the shortest "path" from u to itself, until a timepoint repeats
+                    path = [u]
+                    x = nxt[u][u]
+                    while x not in path:
+                        path.append(x)
+                        x = nxt[x][u]
+                    path = path[path.index(x):] + [x]
+                    return [(path[i], path[i+1]) for i in range(len(path)-1)]
+        return None
+
+    def _tightest_constraint(self, p_tp1:str, p_tp2:str, p_bcn:BCN) -> typing.Tuple[str,str,str|float,bool]:
+        # the constraint between the specified timepoints (p_tp1 - p_tp2 <= bound) whose evaluation gives the weight of the edge (p_tp2,p_tp1)
+        res = None
+        res_weight = math.inf
+        for (bound, strict) in self.constraints[(p_tp1,p_tp2)]:
+            weight = self._bound_value(bound, p_bcn) - (sys.float_info.epsilon if strict else 0)
+            if res is None or weight < res_weight:
+                (res, res_weight) = ((p_tp1, p_tp2, bound, strict), weight)
         return res
 
     def _eval(self, p_cstr:typing.Tuple[str,str], p_bcn:BCN):
@@ -842,13 +1660,19 @@ class STN():
         if p_cstr in self.constraints:
             min = 0
             res = math.inf
-            for (objvar, strict) in self.constraints[p_cstr]:
+            for (bound, strict) in self.constraints[p_cstr]:
                 if not strict:
-                    min = p_bcn.domains[objvar].max_value()
+                    min = self._bound_value(bound, p_bcn)
                 else:
-                    min = p_bcn.domains[objvar].max_value() - sys.float_info.epsilon
+                    min = self._bound_value(bound, p_bcn) - sys.float_info.epsilon
                 if min <= res:
                     res = min
             return res
         else:
             return math.inf
+
+    def _bound_value(self, p_bound:str|float, p_bcn:BCN) -> float:
+        # a bound is either a constant or an object variable, in which case its least constraining value (max) is used
+        if type(p_bound) is str:
+            return p_bcn.domains[p_bound].max_value()
+        return p_bound
@@ -4,6 +4,9 @@ import sys
 sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
 
 import typing
+import math
+import numbers
+import bisect
 from enum import Enum
 
 ############################################
@@ -17,7 +20,17 @@ from enum import Enum
 # They are already heavily used in the constraint networks. (see src.constraints)
 
 # Currently, only discrete domains are supported.
-# Moreover, they are implemented in a quite naive way, which could certainly be optimised. (trailing / double linked list representation)
+# They can be represented in two ways :
+# - DISCRETE : a (python) set of values, which is simple but makes most operations iterate over the values one by one.
+# - BITSET : values are interned to integer ids in a "universe" of values (robots, locations, ...) (see DomainUniverse),
+#   and the domain is an integer bitmask over these ids. Intersection, emptiness, size, etc. then become word-level operations on integers.
+#   Order restrictions (see restrict_to_ls / restrict_to_gt) too, with the masks of the values of the universe below or above a value (kept in sorted order).
+#   Domains from the same universe are the most efficient to combine. Domains of different types or universes can still be combined,
+#   in which case the operations fall back to (slower) operations on the values.
+# Numeric domains can also be represented by an INTERVAL (bounds domain) : lower and upper bounds (each one closed or open),
+# optionally restricted to integer values. Bounds (min/max), restrictions and intersections are then O(1), and continuous values are supported.
+# As "holes" can't be represented, operations which would create some (e.g. removing a value strictly inside the interval, or intersecting with
+# a discrete domain) keep the smallest enclosing interval instead ("bounds consistency").
 
 # Discrete domains are good enough for now.
 # Infinite (continuous) domains support would be very welcome.
@@ -25,64 +38,326 @@ from enum import Enum
 
 # A lot could be redesigned, especially if support for infinite domains is considered.
 # As a matter of fact, using "get_values()" to return a set of values makes sense for discrete domains, but not really for infinite domains.
+# (for now, get_values() raises a ValueError for infinite INTERVAL domains, and callers check the size of a domain before enumerating it when it can be infinite)
 # Considering python is a dynamic language it could be easily achieved, but ideally the implementation should be rigorous and portable to other (strongly-typed) languages.
 
 ############################################
 
 class DomainType(Enum):
     DISCRETE=0
+    BITSET=1
+    INTERVAL=2
+
+class DomainUniverse():
+    """
+    Interning table mapping the values of a "universe" of values (robots, locations, ...) to integer ids (bit positions for BITSET domains).
+    Values are only ever added to a universe, so it can safely be shared by all domains (and copies of domains) using it.
+    """
+
+    def __init__(self, p_values:typing.Iterable=[]):
+        self._m_values:typing.List = []
+        self._m_ids:typing.Dict[object,int] = {}
+        # values of the universe in increasing order, and bitmasks of the first i of them (for each i), used for order restrictions
+        # (None if they need to be computed again, False if the values can't be ordered)
+        self._m_order:typing.Tuple[typing.List,typing.List[int]]|bool|None = None
+        for v in p_values:
+            self.intern(v)
+
+    def __copy__(self) -> DomainUniverse:
+        return self
+
+    def __deepcopy__(self, p_memo) -> DomainUniverse:
+        return self
+
+    def intern(self, p_value) -> int:
+        """
+        Returns the id of the specified value, adding it to the universe if it isn't already in it.
+        """
+        res = self._m_ids.get(p_value)
+        if res is None:
+            res = len(self._m_values)
+            self._m_ids[p_value] = res
+            self._m_values.append(p_value)
+            self._m_order = None
+        return res
+
+    def id_of(self, p_value) -> int|None:
+        return self._m_ids.get(p_value)
+
+    def bits_of(self, p_values:typing.Iterable) -> int:
+        """
+        Returns the bitmask of the specified values (interning them if needed).
+        """
+        res = 0
+        for v in p_values:
+            res |= 1 << self.intern(v)
+        return res
+
+    def bits_less_than(self, p_value, p_strict:bool) -> int|None:
+        """
+        Returns the bitmask of the values of the universe less than (or equal to, if p_strict is False) the specified value,
+        or None if the values of the universe (and the specified value) can't be ordered.
+        """
+        if self._m_order is None:
+            try:
+                order = sorted(range(len(self._m_values)), key=self._m_values.__getitem__)
+                prefixes = [0]
+                for i in order:
+                    prefixes.append(prefixes[-1] | (1 << i))
+                self._m_order = ([self._m_values[i] for i in order], prefixes)
+            except TypeError:
+                self._m_order = False
+        if self._m_order is False:
+            return None
+        (sorted_values, prefixes) = self._m_order
+        try:
+            if p_strict:
+                return prefixes[bisect.bisect_left(sorted_values, p_value)]
+            return prefixes[bisect.bisect_right(sorted_values, p_value)]
+        except TypeError:
+            return None
+
+    def bits_greater_than(self, p_value, p_strict:bool) -> int|None:
+        """
+        Returns the bitmask of the values of the universe greater than (or equal to, if p_strict is False) the specified value,
+        or None if the values of the universe (and the specified value) can't be ordered.
+        """
+        res = self.bits_less_than(p_value, not p_strict)
+        if res is None:
+            return None
+        return ((1 << len(self._m_values)) - 1) & ~res
+
+    def values_of(self, p_bits:int) -> typing.Iterator:
+        """
+        Returns (an iterator over) the values whose bits are set in the specified bitmask.
+        """
+        while p_bits:
+            low_bit = p_bits & -p_bits
+            yield self._m_values[low_bit.bit_length()-1]
+            p_bits ^= low_bit
+
+# universe used by BITSET domains for which no universe is specified
+# it lives as long as the program and is shared by all the domains (and constraint networks) created without a universe :
+# as values are never removed from a universe, it grows with all the values ever used in such domains.
+# Passing a universe explicitly (e.g. one per planning problem) bounds its lifetime and size to those of the domains using it.
+_DEFAULT_UNIVERSE = DomainUniverse()
 
 class Domain():
 
-    _UNKNOWN_VALUE_VAR = "__unknown_value_var" # special variable, which is not unifiable with any other, even itself
+    _UNKNOWN_VALUE_VAR = "__unknown_value_var" # special variable, which is not unifiable with any other, even itself
     _ANY_VALUE_VAR = "__any_value_var" # special variable, which is unifiable with everything, including itself
 
     def __init__(
         self,
         p_type:DomainType=DomainType.DISCRETE,
-        p_initial_allowed_values:typing.Iterable=[]
+        p_initial_allowed_values:typing.Iterable=[],
+        p_universe:DomainUniverse|None=None,
+        p_bounds:typing.Tuple[float,float]|None=None,
+        p_open_bounds:typing.Tuple[bool,bool]=(False,False),
+        p_integer:bool=False,
     ):
+        """
+        Arguments:
+            p_type (DomainType): type (representation) of the domain
+            p_initial_allowed_values (Iterable): initial values of the domain.
+                For an INTERVAL domain (if p_bounds isn't specified), the smallest closed interval containing them.
+            p_universe (DomainUniverse, None by default): universe of values of a BITSET domain (a default, shared one if not specified)
+            p_bounds ((float,float), None by default): lower and upper bounds of an INTERVAL domain
+            p_open_bounds ((bool,bool), (False,False) by default): whether the lower and upper bounds of an INTERVAL domain are open
+            p_integer (bool, False by default): whether an INTERVAL domain only contains integer values
+        """
         self.m_type:DomainType = p_type
-        self._m_discrete_values:typing.Set = set(p_initial_allowed_values)
+        self.m_universe:DomainUniverse|None = None
+        if p_type == DomainType.INTERVAL:
+            self._m_integer:bool = p_integer
+            (self._m_lb, self._m_lb_open, self._m_ub, self._m_ub_open) = (math.inf, False, -math.inf, False)
+            if p_bounds is None:
+                values = list(p_initial_allowed_values)
+                if len(values) > 0:
+                    self._set_interval(min(values), False, max(values), False)
+            else:
+                self._set_interval(p_bounds[0], p_open_bounds[0], p_bounds[1], p_open_bounds[1])
+        elif p_type == DomainType.BITSET:
+            if p_universe is None:
+                p_universe = _DEFAULT_UNIVERSE
+            self.m_universe = p_universe
+            self._m_bits:int = p_universe.bits_of(p_initial_allowed_values)
+        else:
+            self._m_discrete_values:typing.Set = set(p_initial_allowed_values)
 
-    def get_values(self):
+    def copy(self) -> Domain:
+
+        if self.m_type == DomainType.INTERVAL:
+            res = Domain(self.m_type, p_integer=self._m_integer)
+            (res._m_lb, res._m_lb_open, res._m_ub, res._m_ub_open) = (self._m_lb, self._m_lb_open, self._m_ub, self._m_ub_open)
+            return res
+        if self.m_type == DomainType.BITSET:
+            res = Domain(self.m_type, p_universe=self.m_universe)
+            res._m_bits = self._m_bits
+            return res
+        return Domain(self.m_type, self._m_discrete_values)
+
+    def empty_copy(self) -> Domain:
+        """
+        Returns an empty domain of the same type (and universe) as this one.
+        """
+        if self.m_type == DomainType.INTERVAL:
+            return Domain(self.m_type, p_integer=self._m_integer)
+        return Domain(self.m_type, p_universe=self.m_universe)
+
+    def _interval_is_empty(self) -> bool:
+
+        return self._m_lb > self._m_ub or (self._m_lb == self._m_ub and (self._m_lb_open or self._m_ub_open))
+
+    def _set_interval(self, p_lb, p_lb_open:bool, p_ub, p_ub_open:bool) -> bool:
+        # sets the bounds of an INTERVAL domain (integer intervals are normalized to closed bounds)
+        # returns whether the domain changed
+        if self._m_integer:
+            if not math.isinf(p_lb):
+                (p_lb, p_lb_open) = (math.ceil(p_lb) + (1 if p_lb_open and p_lb == math.ceil(p_lb) else 0), False)
+            if not math.isinf(p_ub):
+                (p_ub, p_ub_open) = (math.floor(p_ub) - (1 if p_ub_open and p_ub == math.floor(p_ub) else 0), False)
+        was_empty = self._interval_is_empty()
+        old_bounds = (self._m_lb, self._m_lb_open, self._m_ub, self._m_ub_open)
+        (self._m_lb, self._m_lb_open, self._m_ub, self._m_ub_open) = (p_lb, p_lb_open, p_ub, p_ub_open)
+        if self._interval_is_empty():
+            return not was_empty
+        return old_bounds != (p_lb, p_lb_open, p_ub, p_ub_open)
+
+    def _set_interval_hull(self, p_values:typing.Iterable) -> bool:
+        # sets an INTERVAL domain to the smallest closed interval containing the specified values (empty if there are none)
+        values = list(p_values)
+        if len(values) == 0:
+            return self._set_interval(math.inf, False, -math.inf, False)
+        return self._set_interval(min(values), False, max(values), False)
+
+    def _remove_interval_bound(self, p_value) -> bool:
+        # only values on the bounds can be removed from an INTERVAL domain (it can't have "holes")
+        # returns whether the domain changed
+        if self.contains(p_value):
+            if p_value == self._m_lb:
+                return self._set_interval(self._m_lb, True, self._m_ub, self._m_ub_open)
+            if p_value == self._m_ub:
+                return self._set_interval(self._m_lb, self._m_lb_open, self._m_ub, True)
+        return False
+
+    def _same_universe(self, other_domain:Domain) -> bool:
 
+        return (self.m_type == DomainType.BITSET and other_domain.m_type == DomainType.BITSET
+            and self.m_universe is other_domain.m_universe)
+
+    def _value_set(self) -> typing.Set:
+        # the set of values of the domain, without copying it if the domain is DISCRETE (must then not be modified)
+        if self.m_type == DomainType.INTERVAL:
+            return self.get_values()
+        if self.m_type == DomainType.BITSET:
+            return set(self.m_universe.values_of(self._m_bits))
+        return self._m_discrete_values
+
+    def get_values(self):
+        """
+        Returns the set of values of this domain.
+        Only finite domains can be enumerated : raises a ValueError for continuous or unbounded INTERVAL domains (see size).
+        """
         if self.m_type == DomainType.DISCRETE:
             return set(self._m_discrete_values)
+        if self.m_type == DomainType.BITSET:
+            return set(self.m_universe.values_of(self._m_bits))
+        if self.m_type == DomainType.INTERVAL:
+            if self._interval_is_empty():
+                return set()
+            if self._m_lb == self._m_ub:
+                return {self._m_lb}
+            if self._m_integer and not math.isinf(self._m_lb) and not math.isinf(self._m_ub):
+                return set(range(self._m_lb, self._m_ub+1))
+            raise ValueError("the values of an infinite (continuous or unbounded) interval domain can't be enumerated")
         return NotImplemented
 
     def contains(self, value):
         
-        return value in self.get_values()
+        if self.m_type == DomainType.INTERVAL:
+            # (infinite values aren't integers, and can't be floored)
+            if not isinstance(value, numbers.Real) or (self._m_integer and (not math.isfinite(value) or value != math.floor(value))):
+                return False
+            return ((self._m_lb < value or (self._m_lb == value and not self._m_lb_open))
+                and (value < self._m_ub or (value == self._m_ub and not self._m_ub_open)))
+        if self.m_type == DomainType.BITSET:
+            value_id = self.m_universe.id_of(value)
+            return value_id is not None and (self._m_bits >> value_id) & 1 == 1
+        return value in self._m_discrete_values
 
     def is_empty(self):
         
         if self.m_type == DomainType.DISCRETE:
             return self.size() == 0
+        if self.m_type == DomainType.BITSET:
+            return self._m_bits == 0
+        if self.m_type == DomainType.INTERVAL:
+            return self._interval_is_empty()
         return NotImplemented
 
     def size(self):
         
         if self.m_type == DomainType.DISCRETE:
             return len(self._m_discrete_values)
+        if self.m_type == DomainType.BITSET:
+            return self._m_bits.bit_count()
+        if self.m_type == DomainType.INTERVAL:
+            if self._interval_is_empty():
+                return 0
+            if self._m_lb == self._m_ub:
+                return 1
+            if self._m_integer:
+                return self._m_ub - self._m_lb + 1
+            return math.inf
         return NotImplemented
 
     def intersects(self, other_domain:Domain):
         
-        if self.m_type == DomainType.DISCRETE and other_domain.m_type == DomainType.DISCRETE:
-            for v in self._m_discrete_values:
-                if v in other_domain._m_discrete_values:
+        if self._same_universe(other_domain):
+            return self._m_bits & other_domain._m_bits != 0
+        if self.m_type == DomainType.INTERVAL and other_domain.m_type == DomainType.INTERVAL:
+            res = self.copy()
+            res.intersection(other_domain)
+            return not res.is_empty()
+        if self.m_type == DomainType.INTERVAL:
+            return other_domain.intersects(self)
+        if self.m_type == DomainType.DISCRETE or self.m_type == DomainType.BITSET:
+            for v in self._value_set():
+                if other_domain.contains(v):
                     return True
             return False
         return NotImplemented
 
     def intersection(self, other_domain:Domain):
         
-        if self.m_type == DomainType.DISCRETE and other_domain.m_type == DomainType.DISCRETE:
+        if self._same_universe(other_domain):
+            new_bits = self._m_bits & other_domain._m_bits
+            res = new_bits != self._m_bits
+            self._m_bits = new_bits
+            return res
+        if self.m_type == DomainType.INTERVAL and other_domain.m_type == DomainType.INTERVAL:
+            (lb, lb_open, ub, ub_open) = (self._m_lb, self._m_lb_open, self._m_ub, self._m_ub_open)
+            if other_domain._m_lb > lb or (other_domain._m_lb == lb and other_domain._m_lb_open):
+                (lb, lb_open) = (other_domain._m_lb, other_domain._m_lb_open)
+            if other_domain._m_ub < ub or (other_domain._m_ub == ub and other_domain._m_ub_open):
+                (ub, ub_open) = (other_domain._m_ub, other_domain._m_ub_open)
+            return self._set_interval(lb, lb_open, ub, ub_open)
+        if self.m_type == DomainType.INTERVAL:
+            return self._set_interval_hull([v for v in other_domain._value_set() if self.contains(v)])
+        if self.m_type == DomainType.BITSET:
+            new_bits = self._m_bits
+            for v in self.m_universe.values_of(self._m_bits):
+                if not other_domain.contains(v):
+                    new_bits &= ~(1 << self.m_universe.id_of(v))
+            res = new_bits != self._m_bits
+            self._m_bits = new_bits
+            return res
+        if self.m_type == DomainType.DISCRETE:
             res = False
             new_set = set()
             for v in self._m_discrete_values:
-                if v in other_domain._m_discrete_values:
+                if other_domain.contains(v):
                     new_set.add(v)
                 else:
                     res = True
@@ -92,9 +367,37 @@ class Domain():
 
     def union(self, other_domain:Domain):
         
-        if self.m_type == DomainType.DISCRETE and other_domain.m_type == DomainType.DISCRETE:
+        if self._same_universe(other_domain):
+            new_bits = self._m_bits | other_domain._m_bits
+            res = new_bits != self._m_bits
+            self._m_bits = new_bits
+            return res
+        if self.m_type == DomainType.INTERVAL and other_domain.m_type == DomainType.INTERVAL:
+            if other_domain.is_empty():
+                return False
+            if self.is_empty():
+                return self._set_interval(other_domain._m_lb, other_domain._m_lb_open, other_domain._m_ub, other_domain._m_ub_open)
+            (lb, lb_open, ub, ub_open) = (self._m_lb, self._m_lb_open, self._m_ub, self._m_ub_open)
+            if other_domain._m_lb < lb or (other_domain._m_lb == lb and not other_domain._m_lb_open):
+                (lb, lb_open) = (other_domain._m_lb, other_domain._m_lb_open)
+            if other_domain._m_ub > ub or (other_domain._m_ub == ub and not other_domain._m_ub_open):
+                (ub, ub_open) = (other_domain._m_ub, other_domain._m_ub_open)
+            return self._set_interval(lb, lb_open, ub, ub_open)
+        if self.m_type == DomainType.INTERVAL:
             res = False
-            for v in other_domain._m_discrete_values:
+            for v in other_domain._value_set():
+                if not self.contains(v):
+                    self.add_discrete_value(v)
+                    res = True
+            return res
+        if self.m_type == DomainType.BITSET:
+            new_bits = self._m_bits | self.m_universe.bits_of(other_domain._value_set())
+            res = new_bits != self._m_bits
+            self._m_bits = new_bits
+            return res
+        if self.m_type == DomainType.DISCRETE:
+            res = False
+            for v in other_domain._value_set():
                 if v not in self._m_discrete_values:
                     res = True
                 self._m_discrete_values.add(v)
@@ -106,17 +409,20 @@ class Domain():
     def difference_if_other_is_singleton(self, other_domain:Domain):
         
         # for the special case of separation
-        if self.m_type == DomainType.DISCRETE and other_domain.m_type == DomainType.DISCRETE:
-            res = False
+        if self._same_universe(other_domain):
+            if other_domain.size() == 1 and self._m_bits & other_domain._m_bits != 0:
+                self._m_bits &= ~other_domain._m_bits
+                return True
+            return False
+        if self.m_type == DomainType.DISCRETE or self.m_type == DomainType.BITSET or self.m_type == DomainType.INTERVAL:
             if other_domain.size() == 1:
-                for v in other_domain.get_values(): # there is actually only 1 value, so only 1 iteration. iterating because it's a set - there is no indexing
-                    for i_v1 in self.get_values():
-                        if i_v1 == v:
-                            res = True
-                            break                
-                if res == True:
-                    self._m_discrete_values.remove(v)
-            return res
+                for v in other_domain._value_set(): # there is actually only 1 value, so only 1 iteration. iterating because it's a set - there is no indexing
+                    if self.contains(v):
+                        if self.m_type == DomainType.INTERVAL:
+                            return self._remove_interval_bound(v)
+                        self.remove_discrete_value(v)
+                        return True
+            return False
         # below : general case (with != operator for separation : for other constraints only need to adapt the operator)
         #if self.m_type == DomainType.DISCRETE and other_domain.m_type == DomainType.DISCRETE:
         #    res = False
@@ -136,11 +442,28 @@ class Domain():
 
     def restrict_to_ls(self, value, strict=False):
         
+        if self.m_type == DomainType.INTERVAL:
+            if value < self._m_ub or (value == self._m_ub and strict and not self._m_ub_open):
+                return self._set_interval(self._m_lb, self._m_lb_open, value, strict)
+            return False
+        if self.m_type == DomainType.BITSET:
+            # (a single mask, if the values of the universe can be ordered)
+            mask = self.m_universe.bits_less_than(value, strict)
+            if mask is not None:
+                new_bits = self._m_bits & mask
+            else:
+                new_bits = self._m_bits
+                for v in self.m_universe.values_of(self._m_bits):
+                    if not (v < value if strict else v <= value):
+                        new_bits &= ~(1 << self.m_universe.id_of(v))
+            res = new_bits != self._m_bits
+            self._m_bits = new_bits
+            return res
         if self.m_type == DomainType.DISCRETE:
             res = False
             new_set = set()
             for v in self._m_discrete_values:
-                if (strict and v < value) or v <= value:
+                if v < value if strict else v <= value:
                     new_set.add(v)
                 else:
                     res = True
@@ -150,11 +473,28 @@ class Domain():
 
     def restrict_to_gt(self, value, strict=False):
         
+        if self.m_type == DomainType.INTERVAL:
+            if value > self._m_lb or (value == self._m_lb and strict and not self._m_lb_open):
+                return self._set_interval(value, strict, self._m_ub, self._m_ub_open)
+            return False
+        if self.m_type == DomainType.BITSET:
+            # (a single mask, if the values of the universe can be ordered)
+            mask = self.m_universe.bits_greater_than(value, strict)
+            if mask is not None:
+                new_bits = self._m_bits & mask
+            else:
+                new_bits = self._m_bits
+                for v in self.m_universe.values_of(self._m_bits):
+                    if not (v > value if strict else v >= value):
+                        new_bits &= ~(1 << self.m_universe.id_of(v))
+            res = new_bits != self._m_bits
+            self._m_bits = new_bits
+            return res
         if self.m_type == DomainType.DISCRETE:
             res = False
             new_set = set()
             for v in self._m_discrete_values:
-                if (strict and v > value) or v >= value:
+                if v > value if strict else v >= value:
                     new_set.add(v)
                 else:
                     res = True
@@ -164,20 +504,49 @@ class Domain():
 
     def add_discrete_value(self, value):
         
-        self._m_discrete_values.add(value)
+        if self.m_type == DomainType.INTERVAL:
+            # the domain becomes the smallest interval containing both its previous values and the new one
+            if self.is_empty():
+                self._set_interval(value, False, value, False)
+            elif not self.contains(value):
+                (lb, lb_open, ub, ub_open) = (self._m_lb, self._m_lb_open, self._m_ub, self._m_ub_open)
+                if value <= lb:
+                    (lb, lb_open) = (value, False)
+                if value >= ub:
+                    (ub, ub_open) = (value, False)
+                self._set_interval(lb, lb_open, ub, ub_open)
+        elif self.m_type == DomainType.BITSET:
+            self._m_bits |= 1 << self.m_universe.intern(value)
+        else:
+            self._m_discrete_values.add(value)
     
     def remove_discrete_value(self, value):
         
-        self._m_discrete_values.discard(value)
+        if self.m_type == DomainType.INTERVAL:
+            self._remove_interval_bound(value)
+        elif self.m_type == DomainType.BITSET:
+            value_id = self.m_universe.id_of(value)
+            if value_id is not None:
+                self._m_bits &= ~(1 << value_id)
+        else:
+            self._m_discrete_values.discard(value)
 
     def min_value(self):
         
         if self.m_type == DomainType.DISCRETE:
             return min(self._m_discrete_values)
+        if self.m_type == DomainType.BITSET:
+            return min(self.m_universe.values_of(self._m_bits))
+        if self.m_type == DomainType.INTERVAL:
+            return self._m_lb
         return NotImplemented
 
     def max_value(self):
         
         if self.m_type == DomainType.DISCRETE:
             return max(self._m_discrete_values)
+        if self.m_type == DomainType.BITSET:
+            return max(self.m_universe.values_of(self._m_bits))
+        if self.m_type == DomainType.INTERVAL:
+            return self._m_ub
         return NotImplemented
@@ -0,0 +1,689 @@
+from __future__ import annotations
+
+import sys
+sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
+
+import typing
+import math
+import heapq
+from enum import Enum
+from collections.abc import Mapping
+import numpy as np
+from src.utility.trail import Trail
+
+############################################
+
+# NOTE: Minimal Network, 18 / 10 / 2022
+
+# This file contains the representations of the minimal network (all pairs shortest paths) of the STN (see src.constraints.constraints).
+# The minimal network associates to each (ordered) pair of timepoints (u,v) the minimal distance from u to v through a path of length >= 1,
+# i.e. the tightest upper bound on v - u.
+
+# Two representations are available :
+# - dictionaries (one per timepoint / row), which are simple but quite heavy (one key and one float object per finite entry),
+# - a dense (numpy) matrix, where timepoints are mapped to integer indices. Relaxations and the Floyd-Warshall algorithm are then vectorized,
+#   which is much faster and lighter in memory for big networks.
+
+# - a sparse representation, for loosely connected networks (e.g. chronicles with many actions, each only constraining its own timepoints
+#   and a few neighbours), which only stores the edges and a potential per timepoint (Johnson's algorithm).
+#   The potentials are kept feasible (h(v) <= h(u) + w for each edge u -> v) when an edge is inserted, by only updating the timepoints
+#   reachable from it, which also detects negative cycles. Distances are computed on demand, with one Dijkstra search (on the reduced,
+#   non negative weights w + h(u) - h(v)) per queried source timepoint, and cached until the next edge insertion.
+#   Memory and time then scale with the number of edges instead of n^2 / n^3.
+
+# All representations can be read like a dictionary (minimal_network[(u,v)]), so queries don't need to know which one is used.
+# The STN builds them on the representatives of its rigid components only, and reads them through a RigidComponentsView.
+
+# The dictionary representation stores its (finite) distances by rows : d(u,v) = rows[u][v].
+
+# Changes can be recorded in a trail (see src.utility.trail) to be backtracked :
+# by saving a row (resp. the matrix) before its first change at the current level for the dictionary (resp. dense) representation.
+# The same mechanism allows forks of a network to share their rows (resp. matrix) until they write to them (copy-on-write).
+# The sparse representation saves its (edge) rows the same way (as well as the reverse rows of predecessors), records the changes of potentials one by one,
+# and replaces its cache of distances (rather than clearing it) on each edge insertion, so that backtracking restores the previous one.
+
+# Edge insertions can also report the timepoints whose distances (to or from another timepoint) decreased, so that the users
+# of the network (e.g. the conflicts of a chronicle) only have to re-examine them. The dictionary and dense representations report them exactly.
+# The sparse representation doesn't compute distances on insertion, so it reports a superset of them : the timepoints from which
+# the source of the edge is reachable, and the timepoints reachable from its target (found through the reverse rows of predecessors,
+# so that this costs O(size of these sets of timepoints) and not a pass over all the edges).
+
+############################################
+
+class MinimalNetworkType(Enum):
+    DICT = 0
+    DENSE = 1
+    SPARSE = 2
+
+def new_minimal_network(p_type:MinimalNetworkType) -> DictMinimalNetwork | DenseMinimalNetwork | SparseMinimalNetwork:
+    if p_type == MinimalNetworkType.DENSE:
+        return DenseMinimalNetwork()
+    if p_type == MinimalNetworkType.SPARSE:
+        return SparseMinimalNetwork()
+    return DictMinimalNetwork()
+
+class DictMinimalNetwork(Mapping):
+
+    def __init__(self):
+        # timepoints of the network (ordered, values are unused)
+        self._timepoints:typing.Dict[str,None] = {}
+        # finite distances only, stored by rows : self._rows[u][v] = d(u,v). Missing entries are infinite.
+        self._rows:typing.Dict[str,typing.Dict[str,float]] = {}
+
+    def __getitem__(self, p_key:typing.Tuple[str,str]) -> float:
+        row = self._rows[p_key[0]]
+        if p_key[1] not in self._timepoints:
+            raise KeyError(p_key)
+        return row.get(p_key[1], math.inf)
+
+    def __contains__(self, p_key) -> bool:
+        return p_key[0] in self._timepoints and p_key[1] in self._timepoints
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[str,str]]:
+        for u in self._timepoints:
+            for v in self._timepoints:
+                yield (u,v)
+
+    def __len__(self) -> int:
+        return len(self._timepoints)**2
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def copy(self) -> DictMinimalNetwork:
+        res = DictMinimalNetwork()
+        res._timepoints = self._timepoints.copy()
+        res._rows = { u: row.copy() for (u,row) in self._rows.items() }
+        return res
+
+    def fork(self) -> DictMinimalNetwork:
+        """
+        Returns a copy of the network sharing its rows with this one. Rows are then copied on their first write (see _row_for_write),
+        so the trails of both the copy and this network must be shared (see src.utility.trail).
+        """
+        res = DictMinimalNetwork()
+        res._timepoints = self._timepoints.copy()
+        res._rows = self._rows.copy()
+        return res
+
+    def distances(self, p_sources:typing.Sequence[str], p_targets:typing.Sequence[str]) -> np.ndarray:
+        """
+        Returns the matrix of minimal distances from each of the specified source timepoints to each of the specified target timepoints.
+        """
+        for v in p_targets:
+            if v not in self._timepoints:
+                raise KeyError(v)
+        rows = [self._rows[u] for u in p_sources]
+        return np.array([[row.get(v, math.inf) for v in p_targets] for row in rows], dtype=float).reshape(len(p_sources),len(p_targets))
+
+    def _row_for_write(self, p_timepoint:str, p_trail:Trail) -> typing.Dict[str,float]:
+        if p_trail is not None and p_trail.save_once(("minimal_network_row", p_timepoint)):
+            p_trail.set_item(self._rows, p_timepoint, self._rows[p_timepoint].copy())
+        return self._rows[p_timepoint]
+
+    def add_timepoints(self, p_timepoints:typing.Iterable[str], p_trail:Trail=None) -> None:
+        """
+        Adds the specified timepoints to the network (if they aren't already in it), without connecting them to anything.
+        Arguments:
+            p_timepoints (Iterable[str]): timepoints to add
+            p_trail (Trail, None by default): trail where to record the changes
+        Returns:
+            None
+        Side effects:
+            Adds infinite distances from and to the new timepoints (i.e. an empty row)
+        """
+        for u in p_timepoints:
+            if u not in self._timepoints:
+                if p_trail is None:
+                    self._timepoints[u] = None
+                    self._rows[u] = {}
+                else:
+                    p_trail.set_item(self._timepoints, u, None)
+                    p_trail.set_item(self._rows, u, {})
+                    p_trail.save_once(("minimal_network_row", u))
+
+    def relax_edge(self,
+        p_source:str,
+        p_target:str,
+        p_weight:float,
+        p_trail:Trail=None,
+        p_changed:typing.Set[str]=None,
+    ) -> bool:
+        """
+        Inserts the edge p_source -> p_target (i.e. p_target - p_source <= p_weight) in the network,
+        by relaxing every pair (i,j) through it : d(i,j) = min(d(i,j), d(i,p_source) + p_weight + d(p_target,j)), in O(n^2).
+        Arguments:
+            p_source (str): source timepoint
+            p_target (str): target timepoint
+            p_weight (float): weight of the edge
+            p_trail (Trail, None by default): trail where to record the changes
+            p_changed (Set[str], None by default): set where to add the timepoints i and j of the pairs whose distance decreased
+        Returns:
+            False if the edge closes a negative cycle (the network is then left unchanged), True otherwise
+        Side effects:
+            Updates the minimal distances
+        """
+        (u, v, w) = (p_source, p_target, p_weight)
+        if w >= self[(u,v)]:
+            return True
+        # a path of length >= 1 from v back to u closes a cycle with the new edge
+        if u == v:
+            back = 0
+        else:
+            back = self[(v,u)]
+        if w + back < 0:
+            return False
+        # "static" paths (of length 0) are allowed before and after the new edge
+        to_u = [(i, 0 if i == u else row[u]) for (i,row) in self._rows.items() if i == u or u in row]
+        from_v = [(j, 0 if j == v else d_vj) for (j,d_vj) in self._rows[v].items()]
+        if v not in self._rows[v]:
+            from_v.append((v,0))
+        for (i, d_iu) in to_u:
+            row = self._rows[i]
+            written = False
+            for (j, d_vj) in from_v:
+                if d_iu + w + d_vj < row.get(j, math.inf):
+                    if not written:
+                        row = self._row_for_write(i, p_trail)
+                        written = True
+                    row[j] = d_iu + w + d_vj
+                    if p_changed is not None:
+                        p_changed.add(i)
+                        p_changed.add(j)
+        return True
+
+    def floyd_warshall(self,
+        p_timepoints:typing.Iterable[str],
+        p_edges:typing.Dict[typing.Tuple[str,str],float],
+    ) -> bool:
+        """
+        Recomputes the whole network from scratch (Floyd-Warshall algorithm), in O(n^3).
+        Stops as soon as a negative cycle appears (the content of the network is then meaningless).
+        Arguments:
+            p_timepoints (Iterable[str]): timepoints of the network
+            p_edges (Dict[(str,str),float]): weights of the edges (u,v) (i.e. v - u <= weight)
+        Returns:
+            False if a negative cycle was found, True otherwise
+        Side effects:
+            Replaces the content of the network
+        """
+        self._timepoints = dict.fromkeys(p_timepoints)
+        self._rows = { u: {} for u in self._timepoints }
+        for ((u,v),w) in p_edges.items():
+            if w < math.inf:
+                self._rows[u][v] = w
+        for q in self._timepoints:
+            row_q = self._rows[q]
+            for row_u in self._rows.values():
+                if q not in row_u:
+                    continue
+                d_uq = row_u[q]
+                for (v,d_qv) in list(row_q.items()):
+                    if d_uq + d_qv < row_u.get(v, math.inf):
+                        row_u[v] = d_uq + d_qv
+            for (u,row_u) in self._rows.items():
+                if row_u.get(u, math.inf) < 0:
+                    return False
+        return True
+
+class DenseMinimalNetwork(Mapping):
+
+    def __init__(self):
+        self._index:typing.Dict[str,int] = {}
+        self._timepoints:typing.List[str] = []
+        self._matrix:np.ndarray = np.full((0,0), np.inf)
+
+    def __getitem__(self, p_key:typing.Tuple[str,str]) -> float:
+        return float(self._matrix[self._index[p_key[0]], self._index[p_key[1]]])
+
+    def __contains__(self, p_key) -> bool:
+        return p_key[0] in self._index and p_key[1] in self._index
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[str,str]]:
+        for u in self._timepoints:
+            for v in self._timepoints:
+                yield (u,v)
+
+    def __len__(self) -> int:
+        return len(self._timepoints)**2
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    @property
+    def _n(self) -> int:
+        return len(self._timepoints)
+
+    def copy(self) -> DenseMinimalNetwork:
+        res = DenseMinimalNetwork()
+        res._index = self._index.copy()
+        res._timepoints = self._timepoints.copy()
+        res._matrix = self._matrix.copy()
+        return res
+
+    def fork(self) -> DenseMinimalNetwork:
+        """
+        Returns a copy of the network sharing its matrix with this one. The matrix is then copied on its first write (see _save),
+        so the trails of both the copy and this network must be shared (see src.utility.trail).
+        """
+        res = DenseMinimalNetwork()
+        res._index = self._index
+        res._timepoints = self._timepoints
+        res._matrix = self._matrix
+        return res
+
+    def distances(self, p_sources:typing.Sequence[str], p_targets:typing.Sequence[str]) -> np.ndarray:
+        """
+        Returns the matrix of minimal distances from each of the specified source timepoints to each of the specified target timepoints
+        (a single gather on the matrix).
+        """
+        rows = np.array([self._index[u] for u in p_sources], dtype=np.int64)
+        cols = np.array([self._index[v] for v in p_targets], dtype=np.int64)
+        return self._matrix[np.ix_(rows,cols)]
+
+    def _save(self, p_trail:Trail) -> None:
+        if p_trail is not None and p_trail.save_once("dense_minimal_network"):
+            p_trail.set_attr(self, "_index", self._index.copy())
+            p_trail.set_attr(self, "_timepoints", self._timepoints.copy())
+            p_trail.set_attr(self, "_matrix", self._matrix.copy())
+
+    def add_timepoints(self, p_timepoints:typing.Iterable[str], p_trail:Trail=None) -> None:
+        """
+        Adds the specified timepoints to the network (if they aren't already in it), without connecting them to anything.
+        The underlying matrix grows geometrically, so that adding timepoints one by one is amortized.
+        Arguments:
+            p_timepoints (Iterable[str]): timepoints to add
+            p_trail (Trail, None by default): trail where to record the changes
+        Returns:
+            None
+        Side effects:
+            Adds infinite distances from and to the new timepoints
+        """
+        new_tps = [tp for tp in p_timepoints if tp not in self._index]
+        if len(new_tps) == 0:
+            return
+        self._save(p_trail)
+        for tp in new_tps:
+            if tp not in self._index:
+                self._index[tp] = len(self._timepoints)
+                self._timepoints.append(tp)
+        n = self._n
+        cap = self._matrix.shape[0]
+        if n > cap:
+            new_cap = max(n, 2*cap, 8)
+            new_matrix = np.full((new_cap,new_cap), np.inf)
+            new_matrix[:cap,:cap] = self._matrix
+            self._matrix = new_matrix
+
+    def relax_edge(self,
+        p_source:str,
+        p_target:str,
+        p_weight:float,
+        p_trail:Trail=None,
+        p_changed:typing.Set[str]=None,
+    ) -> bool:
+        """
+        Inserts the edge p_source -> p_target (i.e. p_target - p_source <= p_weight) in the network,
+        by relaxing every pair (i,j) through it : d(i,j) = min(d(i,j), d(i,p_source) + p_weight + d(p_target,j)).
+        The relaxation is a single vectorized (row-column) operation on the matrix.
+        Arguments:
+            p_source (str): source timepoint
+            p_target (str): target timepoint
+            p_weight (float): weight of the edge
+            p_trail (Trail, None by default): trail where to record the changes
+            p_changed (Set[str], None by default): set where to add the timepoints i and j of the pairs whose distance decreased
+        Returns:
+            False if the edge closes a negative cycle (the network is then left unchanged), True otherwise
+        Side effects:
+            Updates the minimal distances
+        """
+        u = self._index[p_source]
+        v = self._index[p_target]
+        w = p_weight
+        if w >= self._matrix[u,v]:
+            return True
+        # a path of length >= 1 from v back to u closes a cycle with the new edge
+        if u == v:
+            back = 0
+        else:
+            back = self._matrix[v,u]
+        if w + back < 0:
+            return False
+        self._save(p_trail)
+        m = self._matrix[:self._n,:self._n]
+        # "static" paths (of length 0) are allowed before and after the new edge
+        to_u = m[:,u].copy()
+        to_u[u] = 0
+        from_v = m[v,:].copy()
+        from_v[v] = 0
+        relaxed = (to_u[:,None] + w) + from_v[None,:]
+        if p_changed is not None:
+            decreased = relaxed < m
+            for i in np.flatnonzero(decreased.any(axis=1) | decreased.any(axis=0)):
+                p_changed.add(self._timepoints[i])
+        np.minimum(m, relaxed, out=m)
+        return True
+
+    def floyd_warshall(self,
+        p_timepoints:typing.Iterable[str],
+        p_edges:typing.Dict[typing.Tuple[str,str],float],
+    ) -> bool:
+        """
+        Recomputes the whole network from scratch (Floyd-Warshall algorithm), each of the n iterations being vectorized.
+        Stops as soon as a negative cycle appears (the content of the network is then meaningless).
+        Arguments:
+            p_timepoints (Iterable[str]): timepoints of the network
+            p_edges (Dict[(str,str),float]): weights of the edges (u,v) (i.e. v - u <= weight)
+        Returns:
+            False if a negative cycle was found, True otherwise
+        Side effects:
+            Replaces the content of the network
+        """
+        self._index = {}
+        self._timepoints = []
+        self._matrix = np.full((0,0), np.inf)
+        self.add_timepoints(p_timepoints)
+        m = self._matrix[:self._n,:self._n]
+        for ((u,v),w) in p_edges.items():
+            m[self._index[u],self._index[v]] = w
+        for q in range(self._n):
+            np.minimum(m, m[:,q].copy()[:,None] + m[q,:].copy()[None,:], out=m)
+            if np.any(np.diagonal(m) < 0):
+                return False
+        return True
+
+class SparseMinimalNetwork(Mapping):
+
+    def __init__(self):
+        # timepoints of the network (ordered, values are unused)
+        self._timepoints:typing.Dict[str,None] = {}
+        # edges only (not distances), stored by rows : self._edges[u][v] = weight of the edge u -> v
+        self._edges:typing.Dict[str,typing.Dict[str,float]] = {}
+        # the same edges, stored by columns : self._predecessors[v][u] = weight of the edge u -> v
+        self._predecessors:typing.Dict[str,typing.Dict[str,float]] = {}
+        # feasible potential of each timepoint (i.e. h(v) <= h(u) + w for each edge u -> v), used to reduce the weights of the edges
+        self._potentials:typing.Dict[str,float] = {}
+        # finite distances from the source timepoints queried since the last edge insertion : self._cache[u][v] = d(u,v)
+        self._cache:typing.Dict[str,typing.Dict[str,float]] = {}
+
+    def __getitem__(self, p_key:typing.Tuple[str,str]) -> float:
+        if p_key[0] not in self._timepoints or p_key[1] not in self._timepoints:
+            raise KeyError(p_key)
+        dists = self._cache.get(p_key[0])
+        if dists is None:
+            dists = self._dijkstra(p_key[0])
+            self._cache[p_key[0]] = dists
+        return dists.get(p_key[1], math.inf)
+
+    def __contains__(self, p_key) -> bool:
+        return p_key[0] in self._timepoints and p_key[1] in self._timepoints
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[str,str]]:
+        for u in self._timepoints:
+            for v in self._timepoints:
+                yield (u,v)
+
+    def __len__(self) -> int:
+        return len(self._timepoints)**2
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def copy(self) -> SparseMinimalNetwork:
+        res = SparseMinimalNetwork()
+        res._timepoints = self._timepoints.copy()
+        res._edges = { u: row.copy() for (u,row) in self._edges.items() }
+        res._predecessors = { v: row.copy() for (v,row) in self._predecessors.items() }
+        res._potentials = self._potentials.copy()
+        return res
+
+    def fork(self) -> SparseMinimalNetwork:
+        """
+        Returns a copy of the network sharing its rows of edges (and predecessors) with this one. Rows are then copied on their first write (see _row_for_write),
+        so the trails of both the copy and this network must be shared (see src.utility.trail).
+        The cache of distances is shared as well, as it is replaced (not modified) when the edges change.
+        """
+        res = SparseMinimalNetwork()
+        res._timepoints = self._timepoints.copy()
+        res._edges = self._edges.copy()
+        res._predecessors = self._predecessors.copy()
+        res._potentials = self._potentials.copy()
+        res._cache = self._cache
+        return res
+
+    def distances(self, p_sources:typing.Sequence[str], p_targets:typing.Sequence[str]) -> np.ndarray:
+        """
+        Returns the matrix of minimal distances from each of the specified source timepoints to each of the specified target timepoints
+        (with one Dijkstra search per source timepoint which isn't cached yet).
+        """
+        return np.array([[self[(u,v)] for v in p_targets] for u in p_sources], dtype=float).reshape(len(p_sources),len(p_targets))
+
+    def _row_for_write(self, p_timepoint:str, p_trail:Trail, p_predecessors:bool=False) -> typing.Dict[str,float]:
+        # row of edges from the specified timepoint (or row of predecessors of the specified timepoint)
+        (rows, key) = ((self._predecessors, "sparse_minimal_network_predecessors") if p_predecessors
+            else (self._edges, "sparse_minimal_network_row"))
+        if p_trail is not None and p_trail.save_once((key, p_timepoint)):
+            p_trail.set_item(rows, p_timepoint, rows[p_timepoint].copy())
+        return rows[p_timepoint]
+
+    def _dijkstra(self, p_source:str) -> typing.Dict[str,float]:
+        """
+        Computes the (finite) minimal distances from the specified timepoint, through paths of length >= 1.
+        The search is ordered by reduced distances (which are non negative thanks to the potentials), but the distances themselves
+        are summed from the actual weights, and a timepoint is visited again if its distance improves (in case of rounding errors).
+        """
+        potentials = self._potentials
+        dists = { p_source: 0 }
+        cycle = math.inf
+        heap = [(0, 0, p_source)]
+        while heap:
+            (_, d_x, x) = heapq.heappop(heap)
+            if d_x != dists[x]:
+                continue
+            for (y, w) in self._edges[x].items():
+                d_y = d_x + w
+                # a path back to the source is a cycle (the "static" path of length 0 from the source to itself isn't a distance)
+                if y == p_source:
+                    if d_y < cycle:
+                        cycle = d_y
+                elif d_y < dists.get(y, math.inf):
+                    dists[y] = d_y
+                    heapq.heappush(heap, (d_y - potentials[y], d_y, y))
+        if cycle < math.inf:
+            dists[p_source] = cycle
+        else:
+            del dists[p_source]
+        return dists
+
+    def _reachable(self, p_source:str, p_edges:typing.Dict[str,typing.Dict[str,float]]) -> typing.Set[str]:
+        # timepoints reachable from the specified one (including itself) through the specified edges
+        res = { p_source }
+        stack = [p_source]
+        while stack:
+            for y in p_edges.get(stack.pop(), ()):
+                if y not in res:
+                    res.add(y)
+                    stack.append(y)
+        return res
+
+    def add_timepoints(self, p_timepoints:typing.Iterable[str], p_trail:Trail=None) -> None:
+        """
+        Adds the specified timepoints to the network (if they aren't already in it), without connecting them to anything.
+        Arguments:
+            p_timepoints (Iterable[str]): timepoints to add
+            p_trail (Trail, None by default): trail where to record the changes
+        Returns:
+            None
+        Side effects:
+            Adds the timepoints, without edges and with a 0 potential
+        """
+        for u in p_timepoints:
+            if u not in self._timepoints:
+                if p_trail is None:
+                    self._timepoints[u] = None
+                    self._edges[u] = {}
+                    self._predecessors[u] = {}
+                    self._potentials[u] = 0
+                else:
+                    p_trail.set_item(self._timepoints, u, None)
+                    p_trail.set_item(self._edges, u, {})
+                    p_trail.set_item(self._predecessors, u, {})
+                    p_trail.set_item(self._potentials, u, 0)
+                    p_trail.save_once(("sparse_minimal_network_row", u))
+                    p_trail.save_once(("sparse_minimal_network_predecessors", u))
+
+    def relax_edge(self,
+        p_source:str,
+        p_target:str,
+        p_weight:float,
+        p_trail:Trail=None,
+        p_changed:typing.Set[str]=None,
+    ) -> bool:
+        """
+        Inserts the edge p_source -> p_target (i.e. p_target - p_source <= p_weight) in the network.
+        The potentials of the timepoints reachable from p_target are decreased if needed (h(x) = min(h(x), h(p_source) + p_weight + d(p_target,x))),
+        visiting them in increasing order of decrease. If the potential of p_source itself has to be decreased, the edge closes a negative cycle.
+        Arguments:
+            p_source (str): source timepoint
+            p_target (str): target timepoint
+            p_weight (float): weight of the edge
+            p_trail (Trail, None by default): trail where to record the changes
+            p_changed (Set[str], None by default): set where to add the timepoints whose distances may have decreased
+                (the timepoints from which p_source is reachable, and the timepoints reachable from p_target, see _reachable)
+        Returns:
+            False if the edge closes a negative cycle (the network is then left unchanged), True otherwise
+        Side effects:
+            Inserts the edge, updates the potentials, and invalidates the cached distances
+        """
+        (u, v, w) = (p_source, p_target, p_weight)
+        if w >= self._edges[u].get(v, math.inf):
+            return True
+        if v not in self._timepoints:
+            raise KeyError((u,v))
+
+        potentials = self._potentials
+        new_potentials:typing.Dict[str,float] = {}
+        if potentials[u] + w < potentials[v]:
+            if u == v:
+                return False
+            new_potentials[v] = potentials[u] + w
+            heap = [(new_potentials[v] - potentials[v], v)]
+            while heap:
+                (decrease, x) = heapq.heappop(heap)
+                h_x = new_potentials[x]
+                if decrease != h_x - potentials[x]:
+                    continue
+                for (y, w_xy) in self._edges[x].items():
+                    if h_x + w_xy < new_potentials.get(y, potentials[y]):
+                        if y == u:
+                            return False
+                        new_potentials[y] = h_x + w_xy
+                        heapq.heappush(heap, (new_potentials[y] - potentials[y], y))
+
+        if p_changed is not None:
+            p_changed.update(self._reachable(v, self._edges))
+            p_changed.update(self._reachable(u, self._predecessors))
+
+        self._row_for_write(u, p_trail)[v] = w
+        self._row_for_write(v, p_trail, p_predecessors=True)[u] = w
+        for (x, h_x) in new_potentials.items():
+            if p_trail is None:
+                potentials[x] = h_x
+            else:
+                p_trail.set_item(potentials, x, h_x)
+        if p_trail is None:
+            self._cache = {}
+        else:
+            p_trail.set_attr(self, "_cache", {})
+        return True
+
+    def floyd_warshall(self,
+        p_timepoints:typing.Iterable[str],
+        p_edges:typing.Dict[typing.Tuple[str,str],float],
+    ) -> bool:
+        """
+        Recomputes the whole network from scratch. Despite its name (kept for consistency with the other representations),
+        no closure is computed : the edges are inserted one by one (see relax_edge), and distances are computed on demand.
+        Stops as soon as a negative cycle appears (the content of the network is then meaningless).
+        Arguments:
+            p_timepoints (Iterable[str]): timepoints of the network
+            p_edges (Dict[(str,str),float]): weights of the edges (u,v) (i.e. v - u <= weight)
+        Returns:
+            False if a negative cycle was found, True otherwise
+        Side effects:
+            Replaces the content of the network
+        """
+        self._timepoints = {}
+        self._edges = {}
+        self._predecessors = {}
+        self._potentials = {}
+        self._cache = {}
+        self.add_timepoints(p_timepoints)
+        for ((u,v),w) in p_edges.items():
+            if w < math.inf and not self.relax_edge(u, v, w):
+                return False
+        return True
+
+class RigidComponentsView(Mapping):
+    """
+    Read-only view of a minimal network built on the representatives of rigid components of timepoints
+    (i.e. timepoints whose distances to each other are fixed, see STN), giving the distances between any timepoints of these components.
+    Each timepoint tp is mapped to its representative r and its offset o (i.e. tp = r + o).
+    Edges between timepoints of a same component are expected to be inserted as cycles on their representative,
+    so that the distance from a timepoint to itself (shortest cycle) is read from the network.
+    """
+
+    def __init__(self,
+        p_network:typing.Mapping[typing.Tuple[str,str],float],
+        p_components:typing.Dict[str,typing.Tuple[str,float]],
+    ):
+        self._network = p_network
+        self._components = p_components
+
+    def __getitem__(self, p_key:typing.Tuple[str,str]) -> float:
+        (r_u, o_u) = self._components[p_key[0]]
+        (r_v, o_v) = self._components[p_key[1]]
+        if r_u == r_v and p_key[0] != p_key[1]:
+            return o_v - o_u
+        d = self._network[(r_u, r_v)]
+        if o_u == o_v:
+            return d
+        return d + (o_v - o_u)
+
+    def __contains__(self, p_key) -> bool:
+        return p_key[0] in self._components and p_key[1] in self._components
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[str,str]]:
+        for u in self._components:
+            for v in self._components:
+                yield (u,v)
+
+    def __len__(self) -> int:
+        return len(self._components)**2
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def distances(self, p_sources:typing.Sequence[str], p_targets:typing.Sequence[str]) -> np.ndarray:
+        """
+        Returns the matrix of minimal distances from each of the specified source timepoints to each of the specified target timepoints.
+        The distances between their representatives are read from the network at once, and then shifted by the offsets in a single vectorized operation.
+        """
+        (reps_u, offsets_u) = zip(*(self._components[u] for u in p_sources)) if len(p_sources) > 0 else ((),())
+        (reps_v, offsets_v) = zip(*(self._components[v] for v in p_targets)) if len(p_targets) > 0 else ((),())
+        sources_index = {}
+        targets_index = {}
+        iu = np.array([sources_index.setdefault(r, len(sources_index)) for r in reps_u], dtype=np.int64)
+        iv = np.array([targets_index.setdefault(r, len(targets_index)) for r in reps_v], dtype=np.int64)
+        rep_dists = self._network.distances(list(sources_index), list(targets_index))
+        shifts = np.array(offsets_v, dtype=float)[None,:] - np.array(offsets_u, dtype=float)[:,None]
+        res = rep_dists[iu[:,None],iv[None,:]] + shifts
+        # distinct timepoints of a same component are at a fixed distance from each other
+        # (representatives and timepoints are compared through integer ids)
+        ids = {}
+        same_component = ((np.array([ids.setdefault(r, len(ids)) for r in reps_u], dtype=np.int64)[:,None]
+                == np.array([ids.setdefault(r, len(ids)) for r in reps_v], dtype=np.int64)[None,:])
+            & (np.array([ids.setdefault(tp, len(ids)) for tp in p_sources], dtype=np.int64)[:,None]
+                != np.array([ids.setdefault(tp, len(ids)) for tp in p_targets], dtype=np.int64)[None,:]))
+        res[same_component] = shifts[same_component]
+        return res
@@ -28,3 +28,16 @@ class GoalNode():
         self.m_committed_expansion:ActionMethod = None
         self.m_metrics:typing.Dict = {}
 
+
+    def copy_goal_node(self) -> GoalNode:
+        """
+        Returns a copy of this goal node, whose lists of expansions and metrics can be modified without affecting this goal node
+        (the parent goal node and the action/method instances are shared).
+        """
+        res = GoalNode()
+        res.m_mode = self.m_mode
+        res.m_parent = self.m_parent
+        res.m_possible_expansions = self.m_possible_expansions.copy()
+        res.m_committed_expansion = self.m_committed_expansion
+        res.m_metrics = self.m_metrics.copy()
+        return res
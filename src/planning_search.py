@@ -13,6 +13,7 @@ from src.utility.new_int_id import new_int_id
 from src.utility.powerset import powerset
 from src.constraints.domain import Domain
 from src.constraints.constraints import ConstraintNetwork, ConstraintType
+from src.constraints.compact_table import FactorizedTable
 from src.assertion import Assertion, AssertionType
 from src.actionmethod import ActionMethodTemplate, ActionMethod
 from src.chronicle import Chronicle
@@ -158,6 +159,8 @@ class SearchNode():
                     transformed_chronicle.m_constraint_network = ri.m_new_constraint_network
                     # Remove the adressed conflict from the collection of current conflicts in the chronicle of the child search node currently being built
                     transformed_chronicle.m_conflicts.remove((self.m_flaw_node_info.m_assertion1,self.m_flaw_node_info.m_assertion2))
+                    # Re-examine the conflicts involving the assertions whose variables were affected by these constraints
+                    transformed_chronicle.update_conflicts()
 
                 elif ri.m_type == ResolverType.EXISTING_DIRECT_PERSISTENCE_SUPPORT_NOW or ri.m_type == ResolverType.NEW_DIRECT_PERSISTENCE_SUPPORT_NOW:
 
@@ -195,7 +198,7 @@ class SearchNode():
 
                     # Setting the assertion from unsupported to supported and adding its supporter to the causal network
                     # in the chronicle of the child search node currently being built
-                    transformed_chronicle.m_assertions[self.m_flaw_node_info.m_assertion1] = True
+                    transformed_chronicle.add_assertion(self.m_flaw_node_info.m_assertion1, True)
                     transformed_chronicle.m_causal_network[self.m_flaw_node_info.m_assertion1] = ri.m_direct_support_assertion
                     
                     # Transitioning the goal corresponding to the flawed assertion to "committed" mode with the action introduced above as its committed expansion
@@ -228,7 +231,7 @@ class SearchNode():
                         # where it is introduced in directly "committed" mode (see below)
 
                         # Same as in the above part
-                        transformed_chronicle.m_assertions[ri.m_direct_support_assertion] = True
+                        transformed_chronicle.add_assertion(ri.m_direct_support_assertion, True)
                         transformed_chronicle.m_causal_network[ri.m_direct_support_assertion] = ri.m_direct_support_assertion_supporter
 
                         # Same as in the above part
@@ -243,6 +246,8 @@ class SearchNode():
                     # Update the collection of current conflicts in the chronicle of the child search node currently being built
                     # with all the conflicts which may have appeared after the application of these constraints and possilby new direct supporter assertion
                     transformed_chronicle.m_conflicts.update(transformed_chronicle.get_induced_conflicts([ri.m_direct_support_assertion]))
+                    # and re-examine the conflicts involving the assertions whose variables were affected by these constraints
+                    transformed_chronicle.update_conflicts()
 
                 elif ri.m_type == ResolverType.METHOD_INSERTION_NOW or ri.m_type == ResolverType.ACTION_INSERTION_NOW:
                     
@@ -268,7 +273,7 @@ class SearchNode():
                     # Update the chronicle of the child search node currently being built by adding the assertions of the action/method chosen in the resolver to it
                     for i_asrt in ri.m_action_or_method_instance.assertions:
                         
-                        transformed_chronicle.m_assertions[i_asrt] = False
+                        transformed_chronicle.add_assertion(i_asrt, False)
 
                         transformed_chronicle.m_goal_nodes[i_asrt] = GoalNode()
                         transformed_chronicle.m_goal_nodes[i_asrt].m_mode = GoalMode.SELECTED
@@ -282,7 +287,7 @@ class SearchNode():
                         # But those that do not start at the same time as it (and as such don't have to be supported by the chronicle)
                         # still need to be introduced, which is done in the loop above. 
                         
-                        transformed_chronicle.m_assertions[i_asrt_supportee] = True
+                        transformed_chronicle.add_assertion(i_asrt_supportee, True)
                         transformed_chronicle.m_causal_network[i_asrt_supportee] = i_asrt_supporter
 
                         # Also, at least one of the chronicle's assertions must be supported by an assertion from the action/method
@@ -304,6 +309,8 @@ class SearchNode():
                     # Update the collection of current conflicts in the chronicle of the child search node currently being built
                     # with all the conflicts which may have appeared after the application of the action/method
                     transformed_chronicle.m_conflicts.update(transformed_chronicle.get_induced_conflicts(ri.m_action_or_method_instance.assertions))
+                    # and re-examine the conflicts involving the assertions whose variables were affected by the application of the action/method
+                    transformed_chronicle.update_conflicts()
 
                 self.m_children.append(SearchNode(p_node_type=SearchNodeType.FLAW,
                     p_parent=self,
@@ -329,16 +336,17 @@ class SearchNode():
             tp_decisions = self.select_tp_decisions()
             for tpdi in tp_decisions:
 
-                transformed_chronicle = deepcopy(old_chronicle)
+                transformed_chronicle = old_chronicle.copy_chronicle()
 
                 constrs = [
-                    (ConstraintType.TEMPORAL, (tpdi.m_timepoint, "_REFERENCE_TIMEPOINT", tpdi.m_assigned_time, False)),
-                    (ConstraintType.TEMPORAL, ("_REFERENCE_TIMEPOINT", tpdi.m_timepoint, tpdi.m_assigned_time, False)),
+                    (ConstraintType.TEMPORAL, (tpdi.m_timepoint, ConstraintNetwork._REFERENCE_TIMEPOINT, tpdi.m_assigned_time, False)),
+                    (ConstraintType.TEMPORAL, (ConstraintNetwork._REFERENCE_TIMEPOINT, tpdi.m_timepoint, tpdi.m_assigned_time, False)),
                 ]
 
                 for otp in tpdi.m_other_timepoints:
                     constrs.extend([(ConstraintType.TEMPORAL, (tpdi.m_timepoint, otp, 0, False))])
                 transformed_chronicle.m_constraint_network.propagate_constraints(constrs)
+                transformed_chronicle.update_conflicts()
 
                 asrts_starting_at_ctr_tp = []
                 for _asrt in transformed_chronicle.m_assertions:
@@ -390,10 +398,9 @@ class SearchNode():
 
             # direct support resolvers
 
-            for i_asrt in self.m_chronicle.m_assertions:
+            for i_asrt in self.m_chronicle.timeline(self.m_flaw_node_info.m_assertion1.head):
 
                 if (i_asrt.type == AssertionType.PERSISTENCE
-                    and i_asrt.has_same_head(self.m_flaw_node_info.m_assertion1)
                     and i_asrt != self.m_flaw_node_info.m_assertion1
                 ):
                     if (self.m_chronicle.m_constraint_network.propagate_constraints([
@@ -472,6 +479,10 @@ class SearchNode():
             # action/method insertion resolvers
             # lots of heuristics (both lifted and grounded ?) will need to be used and search space reduction techniques (reachability analysis etc)
 
+            # negative cycles (temporal inconsistency explanations) found when propagating the constraints of previous templates.
+            # a template whose constraints would close one of them again is pruned without forking / propagating anything.
+            temporal_nogoods = []
+
             for i_act_or_meth_template in self.m_action_method_templates_library:
 
                 # Only consider action templates which have an assertion with the same header as the flawed unsupported one
@@ -489,17 +500,10 @@ class SearchNode():
                 if not _b:
                     continue
     
-                _n = len(i_act_or_meth_template.params)
-                rows = []
-                def _recursion(_i, _row:typing.List[str]):
-                    if _i < _n:
-                        for _v in self.m_chronicle.m_constraint_network.objvar_domain(i_act_or_meth_template.params[_i][1]).get_values():
-                            _newrow = _row.copy()
-                            _newrow[_i] = _v
-                            _recursion(_i+1,_newrow)
-                    else:
-                        rows.append(tuple(_row))
-                _recursion(0, [""]*_n)
+                # the rows (cartesian product of the parameters' domains) are kept factorized, instead of being enumerated
+                # (the domains of the parameters must be finite though, see Domain.get_values)
+                rows = FactorizedTable([self.m_chronicle.m_constraint_network.objvar_domain(param[1]).get_values()
+                    for param in i_act_or_meth_template.params])
                 
                 if same_sv_as_flaw_asrt.type == AssertionType.TRANSITION:
                     unif_constr = (ConstraintType.UNIFICATION, 
@@ -534,12 +538,16 @@ class SearchNode():
                 
                 if propagated:
 
-                    new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
-                    propagated = new_constraint_network.propagate_constraints(
-                        i_act_or_meth_template.constraints_func(
+                    constrs = (i_act_or_meth_template.constraints_func(
                             self.m_now_timepoint, self.m_flaw_node_info.m_assertion1.time_start, { pair[0] for pair in i_act_or_meth_template.params })
-                        .union([unif_constr])
-                    )
+                        .union([unif_constr]))
+                    if any(self.m_chronicle.m_constraint_network.closes_negative_cycle(ng, constrs) for ng in temporal_nogoods):
+                        continue
+
+                    new_constraint_network = self.m_chronicle.m_constraint_network.fork()
+                    propagated = new_constraint_network.propagate_constraints(constrs)
+                    if not propagated and new_constraint_network.temporal_inconsistency_explanation() is not None:
+                        temporal_nogoods.append(new_constraint_network.temporal_inconsistency_explanation())
                 
                     if propagated:
         
@@ -550,7 +558,7 @@ class SearchNode():
                             arg_objvar_name = "__actmethinst{0}_{1}{2}_arg_{3}".format(
                                 _n, i_act_or_meth_template.name, i_act_or_meth_template.params, param[0])
                             #objvars_domains[arg_objvar_name] = deepcopy(new_constraint_network.objvar_domain(param[1]))
-                            objvars_domains[arg_objvar_name] = Domain(p_initial_allowed_values=new_constraint_network.objvar_domain(param[1]).get_values())
+                            objvars_domains[arg_objvar_name] = new_constraint_network.objvar_domain(param[1]).copy()
                             args += ((param[0],arg_objvar_name),)
                         new_constraint_network.init_objvars(objvars_domains)
                         
@@ -567,6 +575,7 @@ class SearchNode():
                             p_time=self.m_now_timepoint,
                             p_cn=new_constraint_network,
                             p_assertions=self.m_chronicle.m_assertions,
+                            p_timelines=self.m_chronicle.m_timelines,
                             p_assertion_to_support=self.m_flaw_node_info.m_assertion1,
                             p_backtrack=False,
                         )
@@ -596,15 +605,18 @@ class SearchNode():
         else:
                                 
             # temporal separation resolver
+            # (the separation constraint is first probed on the minimal network, so that it is only propagated if it can be satisfied)
 
             if (self.m_chronicle.m_constraint_network.tempvars_minimal_directed_distance(
                 self.m_now_timepoint, self.m_flaw_node_info.m_assertion1.time_start) > 0
             ):
-                if (self.m_chronicle.m_constraint_network.propagate_constraints([
+                if (self.m_chronicle.m_constraint_network.tempvars_probe([
+                        (self.m_flaw_node_info.m_assertion2.time_end, self.m_flaw_node_info.m_assertion1.time_start, 0, True)])[0]
+                    and self.m_chronicle.m_constraint_network.propagate_constraints([
                     (ConstraintType.TEMPORAL, (self.m_flaw_node_info.m_assertion2.time_end, self.m_flaw_node_info.m_assertion1.time_start, 0, True))
                     ])
                 ):
-                    new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                    new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                     self.m_chronicle.m_constraint_network.backtrack()
 
                     res.append(ResolverNodeInfo(
@@ -620,11 +632,13 @@ class SearchNode():
             if (self.m_chronicle.m_constraint_network.tempvars_minimal_directed_distance(
                 self.m_now_timepoint, self.m_flaw_node_info.m_assertion2.time_start) > 0
             ):
-                if (self.m_chronicle.m_constraint_network.propagate_constraints([
+                if (self.m_chronicle.m_constraint_network.tempvars_probe([
+                        (self.m_flaw_node_info.m_assertion1.time_end, self.m_flaw_node_info.m_assertion2.time_start, 0, True)])[0]
+                    and self.m_chronicle.m_constraint_network.propagate_constraints([
                     (ConstraintType.TEMPORAL, (self.m_flaw_node_info.m_assertion1.time_end, self.m_flaw_node_info.m_assertion2.time_start, 0, True))
                     ])
                 ):
-                    new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                    new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                     self.m_chronicle.m_constraint_network.backtrack()
 
                     res.append(ResolverNodeInfo(
@@ -646,7 +660,7 @@ class SearchNode():
                     (ConstraintType.UNIFICATION, (self.m_flaw_node_info.m_assertion1.sv_val, self.m_flaw_node_info.m_assertion2.sv_val))
                     ])
                 ):
-                    new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                    new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                     self.m_chronicle.m_constraint_network.backtrack()
 
                     res.append(ResolverNodeInfo(
@@ -673,7 +687,7 @@ class SearchNode():
                         (ConstraintType.TEMPORAL, (self.m_flaw_node_info.m_assertion1.time_start, self.m_flaw_node_info.m_assertion2.time_end, 0, False)),
                         ])
                     ):
-                        new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                        new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                         self.m_chronicle.m_constraint_network.backtrack()
 
                         res.append(ResolverNodeInfo(
@@ -695,7 +709,7 @@ class SearchNode():
                         (ConstraintType.TEMPORAL, (self.m_flaw_node_info.m_assertion2.time_start, self.m_flaw_node_info.m_assertion1.time_end, 0, False)),
                         ])
                     ):
-                        new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                        new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                         self.m_chronicle.m_constraint_network.backtrack()
 
                         res.append(ResolverNodeInfo(
@@ -728,7 +742,7 @@ class SearchNode():
                         (ConstraintType.TEMPORAL, (_pers_asrt.time_start, _trans_asrt.time_end, 0, False)),
                         ])
                     ):
-                        new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                        new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                         self.m_chronicle.m_constraint_network.backtrack()
 
                         res.append(ResolverNodeInfo(
@@ -750,7 +764,7 @@ class SearchNode():
                         (ConstraintType.TEMPORAL, (_trans_asrt.time_start, _pers_asrt.time_end, 0, False)),
                         ])
                     ):
-                        new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                        new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                         self.m_chronicle.m_constraint_network.backtrack()
 
                         res.append(ResolverNodeInfo(
@@ -787,7 +801,7 @@ class SearchNode():
                     [(ConstraintType.SEPARATION, (self.m_flaw_node_info.m_assertion1.sv_params[_i][1], self.m_flaw_node_info.m_assertion2.sv_params[_i][1]))
                     for _i in _tpl])
                 ):
-                    new_constraint_network = deepcopy(self.m_chronicle.m_constraint_network)
+                    new_constraint_network = self.m_chronicle.m_constraint_network.fork()
                     self.m_chronicle.m_constraint_network.backtrack()
 
                     res.append(ResolverNodeInfo(
@@ -4,8 +4,9 @@ sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-play
 from src.constraints.domain import Domain
 from src.constraints.constraints import ConstraintNetwork, ConstraintType
 
-from src.assertion import Assertion, AssertionType
-from src.chronicle import Chronicle
+from src.assertion import Assertion, AssertionType, check_conflicts
+from src.chronicle import Chronicle, ConflictSet
+from src.goal_node import GoalMode, GoalNode
 
 import time
 
@@ -124,7 +125,7 @@ def test1(verbose=False):
         print("---")
     else:            
         ts = time.perf_counter()
-        chronicle.m_assertions[asrt1] = False
+        chronicle.add_assertion(asrt1, False)
         res = chronicle.get_induced_conflicts([asrt2])
         es = time.perf_counter()
         print("---")
@@ -202,7 +203,7 @@ def test2(verbose=False):
         print("---")
     else:
         ts = time.perf_counter()
-        chronicle.m_assertions[asrt1] = False
+        chronicle.add_assertion(asrt1, False)
         res = chronicle.get_induced_conflicts([asrt2])
         es = time.perf_counter()
         print("---")
@@ -280,7 +281,7 @@ def test3(verbose=False):
         print("---")
     else:            
         ts = time.perf_counter()
-        chronicle.m_assertions[asrt1] = False
+        chronicle.add_assertion(asrt1, False)
         res = chronicle.get_induced_conflicts([asrt2])
         es = time.perf_counter()
         print("---")
@@ -358,7 +359,7 @@ def test4(verbose=False):
         print("---")
     else:
         ts = time.perf_counter()
-        chronicle.m_assertions[asrt1] = False        
+        chronicle.add_assertion(asrt1, False)
         res = chronicle.get_induced_conflicts([asrt2])
         es = time.perf_counter()
         print("---")
@@ -436,7 +437,7 @@ def test5(verbose=False):
         print("---")
     else:
         ts = time.perf_counter()
-        chronicle.m_assertions[asrt1] = False        
+        chronicle.add_assertion(asrt1, False)
         res = chronicle.get_induced_conflicts([asrt2])
         es = time.perf_counter()
         print("---")
@@ -584,7 +585,7 @@ def test7(verbose=False):
         print("---")
     else:
         ts = time.perf_counter()
-        chronicle.m_assertions[asrt1] = False
+        chronicle.add_assertion(asrt1, False)
         res = chronicle.get_induced_conflicts([asrt2])
         es = time.perf_counter()
         print("---")
@@ -598,10 +599,437 @@ def test7(verbose=False):
         print("---")
 
 
+def test8(verbose=False):
+    """
+    Timelines (assertions grouped by head) maintained by add_assertion and copy_chronicle,
+    and conflicts only searched in the timeline of the new assertions.
+    """
+
+    init_situation1()
+    constrs = []
+
+    asrt1 = Assertion(
+        p_type=AssertionType.PERSISTENCE,
+        p_sv_name="sv_location",
+        p_sv_params=(("param_robot","objvar_robots_grp1"),),
+        p_sv_val="objvar_location_A",
+        p_sv_val_sec=None,
+    )
+    asrt2 = Assertion(
+        p_type=AssertionType.PERSISTENCE,
+        p_sv_name="sv_location",
+        p_sv_params=(("param_robot","objvar_robots_grp1"),),
+        p_sv_val="objvar_location_B",
+        p_sv_val_sec=None,
+    )
+    asrt3 = Assertion(
+        p_type=AssertionType.PERSISTENCE,
+        p_sv_name="sv_holding",
+        p_sv_params=(("param_robot","objvar_robots_grp1"),),
+        p_sv_val="objvar_location_C",
+        p_sv_val_sec=None,
+    )
+    for asrt in [asrt1, asrt2, asrt3]:
+        constrs.extend([
+            (ConstraintType.TEMPORAL,(asrt.time_start, "t0", 0, False)),
+            (ConstraintType.TEMPORAL,("t0", asrt.time_start, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_end, "t1", 0, False)),
+            (ConstraintType.TEMPORAL,("t1", asrt.time_end, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_start, asrt.time_end, 0, asrt.type == AssertionType.TRANSITION)),
+        ])
+
+    ok = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    chronicle.m_constraint_network = constraint_network
+
+    if not ok:
+        print("---")
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+        print("---")
+        return
+
+    for asrt in [asrt1, asrt2, asrt3]:
+        chronicle.m_goal_nodes[asrt] = GoalNode()
+    chronicle.add_assertion(asrt1, False)
+    chronicle.add_assertion(asrt3, False)
+    chronicle.add_assertion(asrt1, True)
+
+    ok = (asrt1.head == asrt2.head and asrt1.head != asrt3.head
+        and chronicle.timeline(asrt1.head) == [asrt1]
+        and chronicle.timeline(asrt3.head) == [asrt3]
+        and chronicle.timeline(("sv_none",())) == []
+        and chronicle.m_assertions[asrt1])
+
+    chronicle_copy = chronicle.copy_chronicle()
+    chronicle_copy.add_assertion(asrt2, False)
+    ok = (ok and chronicle_copy.timeline(asrt1.head) == [asrt1, asrt2]
+        and chronicle.timeline(asrt1.head) == [asrt1])
+
+    res = chronicle.get_induced_conflicts([asrt2])
+    ok = ok and res == set([(asrt1, asrt2)])
+
+    print("---")
+    if verbose:
+        print("timelines : {0}".format(chronicle.m_timelines))
+        print("conflicts : {0}".format(res))
+    if ok:
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+
+def test9(verbose=False):
+    """
+    Conflicts kept up to date (update_conflicts) when propagating (and backtracking) constraints
+    on the variables of assertions already in the chronicle.
+    """
+
+    reset()
+    constraint_network.init_objvars({
+        "objvar_robots_grp1":Domain(p_initial_allowed_values=["robot1","robot2"]),
+        "objvar_robots_grp2":Domain(p_initial_allowed_values=["robot1","robot2"]),
+        "objvar_location_A":Domain(p_initial_allowed_values=["location1", "location2"]),
+        "objvar_location_B":Domain(p_initial_allowed_values=["location1", "location2"]),
+    })
+    constraint_network.init_tempvars({"t0":True})
+    chronicle.m_constraint_network = constraint_network
+
+    asrt1 = Assertion(
+        p_type=AssertionType.PERSISTENCE,
+        p_sv_name="sv_location",
+        p_sv_params=(("param_robot","objvar_robots_grp1"),),
+        p_sv_val="objvar_location_A",
+        p_sv_val_sec=None,
+    )
+    asrt2 = Assertion(
+        p_type=AssertionType.PERSISTENCE,
+        p_sv_name="sv_location",
+        p_sv_params=(("param_robot","objvar_robots_grp2"),),
+        p_sv_val="objvar_location_B",
+        p_sv_val_sec=None,
+    )
+    constrs = []
+    for asrt in [asrt1, asrt2]:
+        constrs.extend([
+            (ConstraintType.TEMPORAL,("t0", asrt.time_start, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_start, asrt.time_end, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_end, "t0", 10, False)),
+        ])
+    ok = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+
+    for asrt in [asrt1, asrt2]:
+        chronicle.m_goal_nodes[asrt] = GoalNode()
+        chronicle.add_assertion(asrt, False)
+        chronicle.m_conflicts.update(chronicle.get_induced_conflicts([asrt]))
+    chronicle.update_conflicts()
+    res = [chronicle.m_conflicts.copy()]
+
+    # the values of the assertions are unified (without restricting their domains) : no conflict anymore
+    constraint_network.propagate_constraints([(ConstraintType.UNIFICATION,("objvar_location_A","objvar_location_B"))],
+        p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    chronicle.update_conflicts()
+    res.append(chronicle.m_conflicts.copy())
+
+    # and back
+    constraint_network.backtrack()
+    chronicle.update_conflicts()
+    res.append(chronicle.m_conflicts.copy())
+
+    # the robots are separated : no conflict anymore
+    constraint_network.propagate_constraints([(ConstraintType.SEPARATION,("objvar_robots_grp1","objvar_robots_grp2"))],
+        p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    chronicle.update_conflicts()
+    res.append(chronicle.m_conflicts.copy())
+    constraint_network.backtrack()
+    chronicle.update_conflicts()
+
+    # the first assertion ends before the second one starts : no conflict anymore
+    constraint_network.propagate_constraints([(ConstraintType.TEMPORAL,(asrt1.time_end, asrt2.time_start, -1, False))],
+        p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    chronicle.update_conflicts()
+    res.append(chronicle.m_conflicts.copy())
+
+    print("---")
+    if verbose:
+        print("conflicts : {0}".format(res))
+    if ok and res == [set([(asrt1, asrt2)]), set(), set([(asrt1, asrt2)]), set(), set()]:
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test10(verbose=False):
+    """
+    Conflicts of a timeline checked in one batch (check_conflicts and detect_conflicts),
+    compared to the pairs of assertions checked one by one (check_conflict).
+    """
+
+    reset()
+    constraint_network.init_objvars({
+        "objvar_robots_grp1":Domain(p_initial_allowed_values=["robot1","robot2"]),
+        "objvar_robots_grp2":Domain(p_initial_allowed_values=["robot2","robot3"]),
+        "objvar_robot1":Domain(p_initial_allowed_values=["robot1"]),
+        "objvar_location_A":Domain(p_initial_allowed_values=["location1", "location2"]),
+        "objvar_location_B":Domain(p_initial_allowed_values=["location2", "location3"]),
+        "objvar_location_1":Domain(p_initial_allowed_values=["location1"]),
+        "objvar_location_2":Domain(p_initial_allowed_values=["location2"]),
+    })
+    constraint_network.init_tempvars({"t0":True})
+    chronicle.m_constraint_network = constraint_network
+
+    robots = ["objvar_robots_grp1", "objvar_robots_grp2", "objvar_robot1"]
+    locations = ["objvar_location_A", "objvar_location_B", "objvar_location_1", "objvar_location_2"]
+    asrts = []
+    constrs = []
+    for i in range(12):
+        if i % 3 == 0:
+            asrt = Assertion(
+                p_type=AssertionType.TRANSITION,
+                p_sv_name="sv_location",
+                p_sv_params=(("param_robot",robots[i % 3]),),
+                p_sv_val=locations[i % 4],
+                p_sv_val_sec=locations[(i+1) % 4],
+            )
+        else:
+            # persistences starting at the end of the previous assertion (some of them supported by it)
+            asrt = Assertion(
+                p_type=AssertionType.PERSISTENCE,
+                p_sv_name="sv_location",
+                p_sv_params=(("param_robot",robots[i % 3]),),
+                p_sv_val=locations[i % 4],
+                p_sv_val_sec=None,
+                p_time_start=asrts[-1].time_end,
+            )
+        asrts.append(asrt)
+        constrs.extend([
+            (ConstraintType.TEMPORAL,("t0", asrt.time_start, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_start, asrt.time_end, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_end, "t0", 50, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_start, asrt.time_end, -(i % 4), False)),
+        ])
+        if i > 0:
+            constrs.append((ConstraintType.TEMPORAL,(asrts[i-1].time_start, asrt.time_start, 2*i, False)))
+    ok = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    ok = ok and constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("objvar_location_A","objvar_location_B")),
+        (ConstraintType.SEPARATION,("objvar_robots_grp2","objvar_robot1"))],
+        p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+
+    for asrt in asrts:
+        chronicle.m_goal_nodes[asrt] = GoalNode()
+        chronicle.add_assertion(asrt, False)
+
+    expected = [[asrt1.check_conflict(asrt2, constraint_network) for asrt2 in asrts] for asrt1 in asrts]
+    res = check_conflicts(asrts, asrts, constraint_network).tolist()
+    expected_pairs = set((asrts[i], asrts[j]) for i in range(len(asrts)) for j in range(i+1, len(asrts)) if expected[i][j])
+
+    print("---")
+    if verbose:
+        print("conflicts : {0}".format(res))
+    if (ok and res == expected and len(expected_pairs) > 0
+        and chronicle.detect_conflicts() == expected_pairs
+        and chronicle.get_induced_conflicts(asrts[-2:]) == set((asrt1, asrt2) for asrt1 in asrts for asrt2 in asrts[-2:]
+            if asrt1.check_conflict(asrt2, constraint_network))
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test11(verbose=False):
+    """
+    Conflicts restricted to the assertions whose temporal windows (relative to the reference timepoint) intersect,
+    with windows kept up to date when temporal constraints are propagated (and backtracked).
+    """
+
+    reset()
+    constraint_network.init_objvars({
+        "objvar_robot1":Domain(p_initial_allowed_values=["robot1"]),
+        "objvar_location_1":Domain(p_initial_allowed_values=["location1"]),
+        "objvar_location_2":Domain(p_initial_allowed_values=["location2"]),
+    })
+    ref = ConstraintNetwork._REFERENCE_TIMEPOINT
+    constraint_network.init_tempvars({ref:True})
+    chronicle.m_constraint_network = constraint_network
+
+    # persistences of alternating locations, all within [0,60]
+    asrts = []
+    constrs = []
+    for i in range(6):
+        asrt = Assertion(
+            p_type=AssertionType.PERSISTENCE,
+            p_sv_name="sv_location",
+            p_sv_params=(("param_robot","objvar_robot1"),),
+            p_sv_val="objvar_location_1" if i % 2 == 0 else "objvar_location_2",
+            p_sv_val_sec=None,
+        )
+        asrts.append(asrt)
+        constrs.extend([
+            (ConstraintType.TEMPORAL,(asrt.time_start, asrt.time_end, 0, False)),
+            (ConstraintType.TEMPORAL,(ref, asrt.time_start, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_end, ref, 60, False)),
+        ])
+    ok = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+
+    for asrt in asrts:
+        chronicle.m_goal_nodes[asrt] = GoalNode()
+        chronicle.add_assertion(asrt, False)
+    chronicle.update_conflicts()
+    res = [len(chronicle.m_conflicts), chronicle.detect_conflicts() == chronicle.m_conflicts, chronicle.m_windows[asrts[0].head][asrts[1]]]
+
+    # each assertion in its own time slot [10*i, 10*i+5] : no conflict anymore
+    constrs = []
+    for (i,asrt) in enumerate(asrts):
+        constrs.extend([
+            (ConstraintType.TEMPORAL,(ref, asrt.time_start, -10*i, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_end, ref, 10*i+5, False)),
+        ])
+    ok = ok and constraint_network.propagate_constraints(constrs, p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    chronicle.update_conflicts()
+    res.extend([len(chronicle.m_conflicts), chronicle.detect_conflicts() == chronicle.m_conflicts, chronicle.m_windows[asrts[0].head][asrts[1]]])
+
+    # and back
+    constraint_network.backtrack()
+    chronicle.update_conflicts()
+    res.extend([len(chronicle.m_conflicts), chronicle.detect_conflicts() == chronicle.m_conflicts, chronicle.m_windows[asrts[0].head][asrts[1]]])
+
+    print("---")
+    if verbose:
+        print("conflicts and windows : {0}".format(res))
+    if ok and res == [9, True, (0, 60), 0, True, (10, 15), 9, True, (0, 60)]:
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test12(verbose=False):
+    """
+    Copies of a chronicle (sharing the structure of its collections) modified independently of each other.
+    """
+
+    reset()
+    constraint_network.init_objvars({
+        "objvar_robot1":Domain(p_initial_allowed_values=["robot1"]),
+        "objvar_location_1":Domain(p_initial_allowed_values=["location1"]),
+        "objvar_location_2":Domain(p_initial_allowed_values=["location2"]),
+    })
+    ref = ConstraintNetwork._REFERENCE_TIMEPOINT
+    constraint_network.init_tempvars({ref:True})
+    chronicle.m_constraint_network = constraint_network
+
+    asrts = []
+    constrs = []
+    for i in range(4):
+        asrt = Assertion(
+            p_type=AssertionType.PERSISTENCE,
+            p_sv_name="sv_location",
+            p_sv_params=(("param_robot","objvar_robot1"),),
+            p_sv_val="objvar_location_1" if i % 2 == 0 else "objvar_location_2",
+            p_sv_val_sec=None,
+        )
+        asrts.append(asrt)
+        constrs.extend([
+            (ConstraintType.TEMPORAL,(asrt.time_start, asrt.time_end, 0, False)),
+            (ConstraintType.TEMPORAL,(ref, asrt.time_start, 0, False)),
+            (ConstraintType.TEMPORAL,(asrt.time_end, ref, 60, False)),
+        ])
+    ok = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+
+    for asrt in asrts[:3]:
+        chronicle.m_goal_nodes[asrt] = GoalNode()
+        chronicle.add_assertion(asrt, False)
+    chronicle.update_conflicts()
+    conflicts = set(chronicle.m_conflicts)
+
+    chronicle_copy = chronicle.copy_chronicle()
+    chronicle_copy.m_goal_nodes[asrts[0]].m_mode = GoalMode.COMMITTED
+    chronicle_copy.m_goal_nodes[asrts[0]].m_possible_expansions.append(None)
+    chronicle_copy.m_goal_nodes[asrts[3]] = GoalNode()
+    chronicle_copy.add_assertion(asrts[3], False)
+    chronicle_copy.m_conflicts.update(chronicle_copy.get_induced_conflicts([asrts[3]]))
+    chronicle_copy.m_causal_network[asrts[1]] = asrts[0]
+    # the third assertion in its own time slot [15,20] in the copy
+    ok = ok and chronicle_copy.m_constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,(asrts[2].time_end, ref, 20, False)),
+        (ConstraintType.TEMPORAL,(ref, asrts[2].time_start, -15, False))],
+        p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    chronicle_copy.update_conflicts()
+    # modified in the original chronicle after the copy
+    chronicle.m_goal_nodes[asrts[1]].m_mode = GoalMode.EXPANDED
+    chronicle.m_conflicts.clear()
+
+    res = [
+        chronicle.m_goal_nodes[asrts[0]].m_mode, len(chronicle.m_goal_nodes[asrts[0]].m_possible_expansions),
+        chronicle_copy.m_goal_nodes[asrts[0]].m_mode, len(chronicle_copy.m_goal_nodes[asrts[0]].m_possible_expansions),
+        chronicle.m_goal_nodes[asrts[1]].m_mode, chronicle_copy.m_goal_nodes[asrts[1]].m_mode,
+        len(chronicle.timeline(asrts[0].head)), len(chronicle_copy.timeline(asrts[0].head)),
+        asrts[3] in chronicle.m_assertions, asrts[3] in chronicle_copy.m_assertions,
+        asrts[3] in chronicle.m_tempvar_dependents.get(asrts[3].time_start, ()), len(chronicle.m_causal_network),
+        chronicle.m_windows[asrts[0].head][asrts[2]], chronicle_copy.m_windows[asrts[0].head][asrts[2]],
+        len(chronicle.m_conflicts), chronicle_copy.detect_conflicts() == chronicle_copy.m_conflicts,
+    ]
+
+    print("---")
+    if verbose:
+        print("original and copy : {0}".format(res))
+    if (ok and len(conflicts) == 2 and res == [
+            GoalMode.FORMULATED, 0, GoalMode.COMMITTED, 1, GoalMode.EXPANDED, GoalMode.FORMULATED,
+            3, 4, False, True, False, 0, (0, 60), (15, 20), 0, True]
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+
+def test13(verbose=False):
+    """
+    Conflicts indexed by assertion (ConflictSet), in a set and its copy modified independently of each other.
+    """
+
+    asrts = [Assertion(
+        p_type=AssertionType.PERSISTENCE,
+        p_sv_name="sv_location",
+        p_sv_params=(("param_robot","objvar_robot1"),),
+        p_sv_val="objvar_location_1",
+        p_sv_val_sec=None,
+    ) for _ in range(4)]
+
+    conflicts = ConflictSet([(asrts[0], asrts[1]), (asrts[0], asrts[2]), (asrts[1], asrts[3])])
+    conflicts_copy = conflicts.copy()
+    conflicts.remove((asrts[0], asrts[1]))
+    conflicts_copy.update([(asrts[2], asrts[3])])
+    conflicts_copy.clear()
+    conflicts_copy.add((asrts[3], asrts[0]))
+
+    res = [
+        conflicts.involving([asrts[0]]), conflicts.involving([asrts[1], asrts[2]]), conflicts.involving([asrts[3]]),
+        conflicts_copy.involving(asrts), conflicts_copy.involving([asrts[1]]),
+    ]
+
+    print("---")
+    if verbose:
+        print("conflicts involving assertions : {0}".format(res))
+    if (conflicts == set([(asrts[0], asrts[2]), (asrts[1], asrts[3])]) and res == [
+            set([(asrts[0], asrts[2])]), set([(asrts[0], asrts[2]), (asrts[1], asrts[3])]), set([(asrts[1], asrts[3])]),
+            set([(asrts[3], asrts[0])]), set()]
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+
 test1()
 test2()
 test3()
 test4()
 test5()
 test6()
-test7()
\ No newline at end of file
+test7()
+test8()
+test9()
+test10()
+test11()
+test12()
+test13()
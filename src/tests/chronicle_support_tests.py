@@ -628,9 +628,9 @@ def test10(verbose=False):
         for v in main_chronicle.m_constraint_network.m_bcn.domains:
             print("{0} initial domain : {1}".format(v, main_chronicle.m_constraint_network.objvar_domain(v).get_values()))
 
-    main_chronicle.m_assertions[asrt1] = False
+    main_chronicle.add_assertion(asrt1, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt1,GoalNode()).m_mode = GoalMode.SELECTED
-    main_chronicle.m_assertions[asrt2] = False
+    main_chronicle.add_assertion(asrt2, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt2,GoalNode()).m_mode = GoalMode.SELECTED
 
     ok = main_chronicle.m_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
@@ -742,9 +742,9 @@ def test11(verbose=False):
         for v in main_chronicle.m_constraint_network.m_bcn.domains:
             print("{0} initial domain : {1}".format(v, main_chronicle.m_constraint_network.objvar_domain(v).get_values()))
 
-    main_chronicle.m_assertions[asrt1] = False
+    main_chronicle.add_assertion(asrt1, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt1,GoalNode()).m_mode = GoalMode.SELECTED
-    main_chronicle.m_assertions[asrt2] = False
+    main_chronicle.add_assertion(asrt2, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt2,GoalNode()).m_mode = GoalMode.SELECTED
 
     ok = main_chronicle.m_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
@@ -870,9 +870,9 @@ def test12(verbose=False):
         for v in main_chronicle.m_constraint_network.m_bcn.domains:
             print("{0} initial domain : {1}".format(v, main_chronicle.m_constraint_network.objvar_domain(v).get_values()))
 
-    main_chronicle.m_assertions[asrt1] = False
+    main_chronicle.add_assertion(asrt1, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt1,GoalNode()).m_mode = GoalMode.SELECTED
-    main_chronicle.m_assertions[asrt2] = False
+    main_chronicle.add_assertion(asrt2, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt2,GoalNode()).m_mode = GoalMode.SELECTED
 
     ok = main_chronicle.m_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
@@ -995,9 +995,9 @@ def test13(verbose=False):
         for v in main_chronicle.m_constraint_network.m_bcn.domains:
             print("{0} initial domain : {1}".format(v, main_chronicle.m_constraint_network.objvar_domain(v).get_values()))
 
-    main_chronicle.m_assertions[asrt1] = False
+    main_chronicle.add_assertion(asrt1, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt1,GoalNode()).m_mode = GoalMode.SELECTED
-    main_chronicle.m_assertions[asrt2] = False
+    main_chronicle.add_assertion(asrt2, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt2,GoalNode()).m_mode = GoalMode.SELECTED
 
     ok = main_chronicle.m_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
@@ -1123,9 +1123,9 @@ def test14(verbose=False):
         for v in main_chronicle.m_constraint_network.m_bcn.domains:
             print("{0} initial domain : {1}".format(v, main_chronicle.m_constraint_network.objvar_domain(v).get_values()))
 
-    main_chronicle.m_assertions[asrt1] = False
+    main_chronicle.add_assertion(asrt1, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt1,GoalNode()).m_mode = GoalMode.SELECTED
-    main_chronicle.m_assertions[asrt2] = False
+    main_chronicle.add_assertion(asrt2, False)
     #main_chronicle.m_goal_nodes.setdefault(asrt2,GoalNode()).m_mode = GoalMode.SELECTED
 
     ok = main_chronicle.m_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
@@ -1,10 +1,13 @@
 import sys
 sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
 
-from src.constraints.domain import Domain
+from src.constraints.domain import Domain, DomainType, DomainUniverse
 from src.constraints.constraints import ConstraintNetwork, ConstraintType
+from src.constraints.minimal_network import MinimalNetworkType
+from src.constraints.compact_table import FactorizedTable
 
 import time
+import math
 
 class bcolors:
     HEADER = '\033[95m'
@@ -583,6 +586,941 @@ def test16(verbose=False):
         print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
     print("---")
 
+def test17(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True,"t3":True,"t4":True})
+    constraint_network.init_objvars({
+        "c_l01":Domain(p_initial_allowed_values=[-10]),
+        "c_u01":Domain(p_initial_allowed_values=[15]),
+        "c_l12":Domain(p_initial_allowed_values=[-10]),
+        "c_u12":Domain(p_initial_allowed_values=[15]),
+        "c_l03":Domain(p_initial_allowed_values=[0]),
+        "c_u03":Domain(p_initial_allowed_values=[3]),
+        "c_l34":Domain(p_initial_allowed_values=[-8]),
+        "c_u34":Domain(p_initial_allowed_values=[12]),
+    })
+
+    constrs1 = [
+        (ConstraintType.TEMPORAL,("t0","t1","c_l01",False)),
+        (ConstraintType.TEMPORAL,("t1","t0","c_u01",False)),
+        (ConstraintType.TEMPORAL,("t1","t2","c_l12",False)),
+        (ConstraintType.TEMPORAL,("t2","t1","c_u12",False)),
+    ]
+    constrs2 = [
+        (ConstraintType.TEMPORAL,("t0","t3","c_l03",False)),
+        (ConstraintType.TEMPORAL,("t3","t0","c_u03",False)),
+        (ConstraintType.TEMPORAL,("t3","t4","c_l34",False)),
+        (ConstraintType.TEMPORAL,("t4","t3","c_u34",False)),
+        (ConstraintType.TEMPORAL,("t4","t1",0,False)),
+        (ConstraintType.TEMPORAL,("t1","t4",2,True)),
+    ]
+    ts = time.perf_counter()
+    res = (constraint_network.propagate_constraints(constrs1, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+        and constraint_network.propagate_constraints(constrs2, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False))
+    es = time.perf_counter()
+    incremental_network = dict(constraint_network.m_stn.minimal_network)
+
+    full_network = constraint_network.m_stn._apsp_fw()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0}".format(res))
+        print("time : {0}".format(es-ts))
+        print(incremental_network)
+        print(full_network)
+    if res == True and incremental_network == full_network:
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test18(verbose=False):
+    
+    dense_constraint_network = ConstraintNetwork(MinimalNetworkType.DENSE)
+    for cn in [constraint_network, dense_constraint_network]:
+        cn.m_bcn.clear()
+        cn.m_stn.clear()
+        cn.init_tempvars({"t0":True,"t1":True,"t2":True,"t3":True})
+        cn.init_objvars({
+            "c_l01":Domain(p_initial_allowed_values=[-10]),
+            "c_u01":Domain(p_initial_allowed_values=[15]),
+            "c_l12":Domain(p_initial_allowed_values=[-3]),
+            "c_u12":Domain(p_initial_allowed_values=[5]),
+        })
+
+    constrs = [
+        (ConstraintType.TEMPORAL,("t0","t1","c_l01",False)),
+        (ConstraintType.TEMPORAL,("t1","t0","c_u01",False)),
+        (ConstraintType.TEMPORAL,("t1","t2","c_l12",False)),
+        (ConstraintType.TEMPORAL,("t2","t1","c_u12",False)),
+        (ConstraintType.TEMPORAL,("t3","t2",4,True)),
+    ]
+    res = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    ts = time.perf_counter()
+    res_dense = dense_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0}".format(res_dense))
+        print("time : {0}".format(es-ts))
+        print(dense_constraint_network.m_stn.minimal_network)
+    if res == True and res_dense == True and dense_constraint_network.m_stn.minimal_network == constraint_network.m_stn.minimal_network:
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test19(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True})
+    constraint_network.init_objvars({
+        "var1":Domain(p_initial_allowed_values=[1,2,3,4,5]),
+        "var2":Domain(p_initial_allowed_values=[0,1,2,3,4]),
+        "var3":Domain(p_initial_allowed_values=[1,2,3]),
+    })
+    constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0",10,False)),
+        (ConstraintType.TEMPORAL,("t0","t1",-2,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+
+    domains_before = { v:constraint_network.objvar_domain(v).get_values() for v in constraint_network.m_bcn.domains }
+    network_before = dict(constraint_network.m_stn.minimal_network)
+
+    ts = time.perf_counter()
+    constraint_network.backup()
+    res1 = constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("var1","var3")),
+        (ConstraintType.TEMPORAL,("t2","t1",3,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.SEPARATION,("var2","var3")),
+        (ConstraintType.TEMPORAL,("t1","t2",-1,False)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=True)
+    unified_inside = constraint_network.objvars_unified("var1","var3")
+    constraint_network.backtrack()
+    es = time.perf_counter()
+
+    domains_after = { v:constraint_network.objvar_domain(v).get_values() for v in constraint_network.m_bcn.domains }
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1}".format(res1, res2))
+        print("time : {0}".format(es-ts))
+        print(domains_after)
+        print(constraint_network.m_stn.minimal_network)
+    if (res1 == True and res2 == True and unified_inside == True
+        and not constraint_network.objvars_unified("var1","var3")
+        and not "var2" in constraint_network.m_bcn.separations
+        and domains_after == domains_before
+        and dict(constraint_network.m_stn.minimal_network) == network_before
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+# fork : the child shares its structures with its parent until one of them writes to them (copy-on-write)
+def test20(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True})
+    constraint_network.init_objvars({
+        "var1":Domain(p_initial_allowed_values=[1,2,3,4,5]),
+        "var2":Domain(p_initial_allowed_values=[0,1,2,3,4]),
+        "var3":Domain(p_initial_allowed_values=[1,2,3]),
+    })
+    constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0",10,False)),
+        (ConstraintType.TEMPORAL,("t0","t1",-2,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+
+    domains_before = { v:constraint_network.objvar_domain(v).get_values() for v in constraint_network.m_bcn.domains }
+    network_before = dict(constraint_network.m_stn.minimal_network)
+
+    ts = time.perf_counter()
+    child_network = constraint_network.fork()
+    res1 = child_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("var1","var3")),
+        (ConstraintType.SEPARATION,("var2","var3")),
+        (ConstraintType.TEMPORAL,("t2","t1",3,False)),
+        (ConstraintType.TEMPORAL,("t1","t2",-1,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    parent_unchanged = ({ v:constraint_network.objvar_domain(v).get_values() for v in constraint_network.m_bcn.domains } == domains_before
+        and dict(constraint_network.m_stn.minimal_network) == network_before
+        and not constraint_network.objvars_unified("var1","var3"))
+    child_domains = { v:child_network.objvar_domain(v).get_values() for v in child_network.m_bcn.domains }
+    child_network_before = dict(child_network.m_stn.minimal_network)
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0",5,False)),
+        (ConstraintType.UNIFICATION,("var2","var3")),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    es = time.perf_counter()
+
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1}".format(res1, res2))
+        print("time : {0}".format(es-ts))
+        print(child_domains)
+        print(child_network.m_stn.minimal_network)
+    if (res1 == True and res2 == True and parent_unchanged
+        and child_network.objvars_unified("var1","var3")
+        and not child_network.objvars_unified("var2","var3")
+        and constraint_network.objvars_unified("var2","var3")
+        and { v:child_network.objvar_domain(v).get_values() for v in child_network.m_bcn.domains } == child_domains
+        and dict(child_network.m_stn.minimal_network) == child_network_before
+        and constraint_network.tempvars_minimal_directed_distance("t0","t1") == 5
+        and child_network.tempvars_minimal_directed_distance("t0","t1") == 10
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+# bitset domains : same propagation results as with (set based) discrete domains, including when mixing both types of domains
+def test21(verbose=False):
+    
+    universe = DomainUniverse()
+    constrs = [
+        (ConstraintType.DISJ_UNIFICATION,("var1", ["var2","var4"])),
+        (ConstraintType.GENERAL_RELATION,("relation", (("var2","var3"),[(0,1),(1,1),(0,3),(1,3)]))),
+        (ConstraintType.SEPARATION,("var4", "var5")),
+        (ConstraintType.UNIFICATION,("var3", "var5")),
+    ]
+    results = []
+    ts = time.perf_counter()
+    for domain_types in [(DomainType.DISCRETE,)*5, (DomainType.BITSET,)*5, (DomainType.BITSET,DomainType.DISCRETE)*2+(DomainType.BITSET,)]:
+        reset_constraint_network()
+        constraint_network.init_objvars({
+            "var1":Domain(domain_types[0], [1,2,3,4,5], universe),
+            "var2":Domain(domain_types[1], [0,1,2,3,4], universe),
+            "var3":Domain(domain_types[2], [1,2,3], universe),
+            "var4":Domain(domain_types[3], [3,4,5], universe),
+            "var5":Domain(domain_types[4], [1,6,7], universe),
+        })
+        res = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+        results.append((res, { v:constraint_network.objvar_domain(v).get_values() for v in constraint_network.m_bcn.domains }))
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("input constraints : {0}".format(constrs))
+        print("results : {0}".format(results))
+        print("time : {0}".format(es-ts))
+    if results[0][0] == True and results[0] == results[1] and results[0] == results[2]:
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+# interval domains : continuous temporal bound (duration) variable, restricted through temporal and domain value constraints
+def test22(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True})
+    constraint_network.init_objvars({
+        "dur":Domain(DomainType.INTERVAL, p_bounds=(2.5,7.5)),
+    })
+    ts = time.perf_counter()
+    res1 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0","dur",False)),
+        (ConstraintType.TEMPORAL,("t0","t1",-3,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    dist1 = constraint_network.tempvars_minimal_directed_distance("t0","t1")
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LEQ,("dur",5.25)),
+        (ConstraintType.TEMPORAL,("t1","t0",6,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    dist2 = constraint_network.tempvars_minimal_directed_distance("t0","t1")
+    res3 = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LE,("dur",3)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2}".format(res1, res2, res3))
+        print("time : {0}".format(es-ts))
+        print("dur : [{0}, {1}]".format(constraint_network.objvar_domain("dur").min_value(), constraint_network.objvar_domain("dur").max_value()))
+        print(constraint_network.m_stn.minimal_network)
+    if (res1 == True and res2 == True and res3 == False
+        and dist1 == 7.5 and dist2 == 5.25
+        and constraint_network.objvar_domain("dur").min_value() == 3
+        and constraint_network.objvar_domain("dur").max_value() == 5.25
+        and constraint_network.objvar_domain("dur").contains(4.2)
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+# constant temporal bounds are directly stored as edge weights in the stn : no helper variables in the bcn
+def test23(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True})
+    constraint_network.init_objvars({
+        "var1":Domain(p_initial_allowed_values=[4,8]),
+    })
+    ts = time.perf_counter()
+    res1 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0",10,False)),
+        (ConstraintType.TEMPORAL,("t1","t0",10,False)),
+        (ConstraintType.TEMPORAL,("t0","t1","var1",False)),
+        (ConstraintType.TEMPORAL,("t2","t1",5,True)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0",-9,False)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1}".format(res1, res2))
+        print("time : {0}".format(es-ts))
+        print(constraint_network.m_bcn.domains)
+        print(constraint_network.m_stn.constraints)
+        print(constraint_network.m_stn.minimal_network)
+    if (res1 == True and res2 == False
+        and set(constraint_network.m_bcn.domains) == {"var1"}
+        and constraint_network.m_stn.constraints[("t1","t0")] == {(10,False)}
+        and constraint_network.objvar_domain("var1").get_values() == {4,8}
+        and constraint_network.tempvars_minimal_directed_distance("t0","t2") == 15 - sys.float_info.epsilon
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+# weight table : edge weights are refreshed when the domains of their bound variables change, and restored on backtrack
+def test24(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True})
+    constraint_network.init_objvars({
+        "var1":Domain(p_initial_allowed_values=[3,6,9]),
+    })
+    constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0","var1",False)),
+        (ConstraintType.TEMPORAL,("t2","t1",2,True)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    weights_before = dict(constraint_network.m_stn.weights)
+
+    ts = time.perf_counter()
+    constraint_network.backup()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LEQ,("var1",7)),
+        (ConstraintType.TEMPORAL,("t2","t0",20,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    weights_inside = dict(constraint_network.m_stn.weights)
+    weights_consistent = all(constraint_network.m_stn.weights[(u,v)] == constraint_network.m_stn._eval((v,u), constraint_network.m_bcn)
+        for (u,v) in constraint_network.m_stn.weights)
+    dist_inside = constraint_network.tempvars_minimal_directed_distance("t0","t2")
+    constraint_network.backtrack()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0}".format(res))
+        print("time : {0}".format(es-ts))
+        print(weights_before)
+        print(weights_inside)
+    if (res == True
+        and weights_before[("t0","t1")] == 9 and weights_inside[("t0","t1")] == 6
+        and weights_inside[("t0","t2")] == 20
+        and weights_consistent
+        and dist_inside == 8 - sys.float_info.epsilon
+        and constraint_network.m_stn.weights == weights_before
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test25(verbose=False):
+
+    constrs = [
+        (ConstraintType.TEMPORAL,("t1","t0","var1",False)),
+        (ConstraintType.TEMPORAL,("t2","t1",2,False)),
+        (ConstraintType.TEMPORAL,("t3","t0",10,False)),
+        (ConstraintType.TEMPORAL,("t0","t2",-8,False)),
+    ]
+    expected = set([("t1","t0","var1",False), ("t2","t1",2,False), ("t0","t2",-8,False)])
+    explanations = []
+    ts = time.perf_counter()
+    for full_recomputation in [False, True]:
+        reset_constraint_network()
+        constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True,"t3":True})
+        constraint_network.init_objvars({
+            "var1":Domain(p_initial_allowed_values=[3,5]),
+        })
+        res = constraint_network.propagate_constraints(constrs, p_backup=True, p_revert_on_failure=True, p_revert_on_success=False,
+            p_stn_full_recomputation=full_recomputation)
+        explanations.append(constraint_network.temporal_inconsistency_explanation())
+    # the cycle is closed (or not) by the last constraint, without propagating it
+    closed = constraint_network.closes_negative_cycle(explanations[0], [constrs[-1]])
+    not_closed = constraint_network.closes_negative_cycle(explanations[0], [(ConstraintType.TEMPORAL,("t0","t2",-7,False))])
+    res_ok = constraint_network.propagate_constraints(constrs[:-1], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    closed_after = constraint_network.closes_negative_cycle(explanations[0], [constrs[-1]])
+    explanation_ok = constraint_network.temporal_inconsistency_explanation()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0}".format(res))
+        print("time : {0}".format(es-ts))
+        print(explanations)
+    if (res == False
+        and all(expl is not None and len(expl) == 3 and set(expl) == expected for expl in explanations)
+        and not closed and not not_closed
+        and res_ok == True and closed_after and explanation_ok is None
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test26(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True})
+    constraint_network.init_objvars({
+        "var1":Domain(p_initial_allowed_values=[3,5]),
+    })
+    constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0","var1",False)),
+        (ConstraintType.TEMPORAL,("t0","t1",-2,False)),
+        (ConstraintType.TEMPORAL,("t2","t1",4,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    network_before = dict(constraint_network.m_stn.minimal_network)
+
+    ts = time.perf_counter()
+    (res_ok, dists) = constraint_network.tempvars_probe([("t0","t2",-7,False)], [("t2","t0"),("t0","t2"),("t1","t2")])
+    (res_ko, dists_ko) = constraint_network.tempvars_probe([("t0","t2",-10,False)], [("t2","t0")])
+    (res_two, _) = constraint_network.tempvars_probe([("t0","t2",-6,False),("t1","t2",-5,True)])
+    es = time.perf_counter()
+    network_after = dict(constraint_network.m_stn.minimal_network)
+
+    fork = constraint_network.fork()
+    fork.propagate_constraints([(ConstraintType.TEMPORAL,("t0","t2",-7,False))], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    print("---")
+    if verbose:
+        print("probes successful ? : {0} {1} {2}".format(res_ok, res_ko, res_two))
+        print("time : {0}".format(es-ts))
+        print(dists)
+    if (res_ok == True and res_ko == False and dists_ko is None and res_two == False
+        and all(dists[pair] == fork.tempvars_minimal_directed_distance(*pair) for pair in dists)
+        and dists[("t2","t0")] == -7 and dists[("t0","t2")] == 9
+        and network_before == network_after
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test27(verbose=False):
+
+    sparse_constraint_network = ConstraintNetwork(MinimalNetworkType.SPARSE)
+    for cn in [constraint_network, sparse_constraint_network]:
+        cn.m_bcn.clear()
+        cn.m_stn.clear()
+        cn.init_tempvars({"s1":True,"e1":True,"s2":True,"e2":True,"s3":True,"e3":True})
+        cn.init_objvars({
+            "dur1":Domain(p_initial_allowed_values=[2,4]),
+        })
+        cn.propagate_constraints([
+            (ConstraintType.TEMPORAL,("e1","s1","dur1",False)),
+            (ConstraintType.TEMPORAL,("s1","e1",-2,False)),
+            (ConstraintType.TEMPORAL,("e2","s2",3,False)),
+            (ConstraintType.TEMPORAL,("s2","e2",-3,False)),
+            (ConstraintType.TEMPORAL,("e3","s3",5,True)),
+        ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+
+    constrs = [
+        (ConstraintType.TEMPORAL,("e1","s2",0,False)),
+        (ConstraintType.TEMPORAL,("s3","e2",10,False)),
+        (ConstraintType.TEMPORAL,("e2","s3",-1,False)),
+    ]
+    ts = time.perf_counter()
+    sparse_constraint_network.backup()
+    res_sparse = sparse_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    network_sparse = dict(sparse_constraint_network.m_stn.minimal_network)
+    fork = sparse_constraint_network.fork()
+    sparse_constraint_network.backtrack()
+    network_sparse_backtracked = dict(sparse_constraint_network.m_stn.minimal_network)
+    es = time.perf_counter()
+    network_fork = dict(fork.m_stn.minimal_network)
+
+    network_before = dict(constraint_network.m_stn.minimal_network)
+    res = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    network = dict(constraint_network.m_stn.minimal_network)
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0}".format(res_sparse))
+        print("time : {0}".format(es-ts))
+        print(network_sparse)
+    if (res == True and res_sparse == True
+        and network_sparse == network and network_fork == network
+        and network_sparse_backtracked == network_before
+        and network[("s2","s3")] == 13 and network[("s3","e1")] == -4 and network[("e3","e3")] == math.inf
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test28(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_tempvars({"now":True,"s1":True,"e1":True,"s2":True,"e2":True})
+    constraint_network.init_objvars({
+        "dur2":Domain(p_initial_allowed_values=[3,4]),
+    })
+    ts = time.perf_counter()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("s1","now",0,False)),
+        (ConstraintType.TEMPORAL,("now","s1",0,False)),
+        (ConstraintType.TEMPORAL,("e1","s1",5,False)),
+        (ConstraintType.TEMPORAL,("s1","e1",-5,False)),
+        (ConstraintType.TEMPORAL,("e2","s2","dur2",False)),
+        (ConstraintType.TEMPORAL,("e1","s2",0,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    components = dict(constraint_network.m_stn.rigid_components)
+    constraint_network.backup()
+    # (e1 and s2 are already in the network, so they aren't merged)
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("s2","e1",0,False)),
+        (ConstraintType.TEMPORAL,("e1","s2",0,False)),
+    ], p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+    dist_e2 = constraint_network.tempvars_minimal_directed_distance("now","e2")
+    constraint_network.backtrack()
+    res_ko = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("e1","now",4,False)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2}".format(res, res2, res_ko))
+        print("time : {0}".format(es-ts))
+        print(components)
+    if (res == True and res2 == True and res_ko == False
+        and components["s1"][0] == components["e1"][0] == components["now"][0]
+        and components["s2"] == ("s2",0) and components["e2"] == ("e2",0)
+        and len(constraint_network.m_stn._minimal_network) == 3**2
+        and constraint_network.tempvars_minimal_directed_distance("now","e1") == 5
+        and constraint_network.tempvars_minimal_directed_distance("e1","now") == -5
+        and constraint_network.tempvars_unified("now","s1")
+        and constraint_network.tempvars_minimal_directed_distance("s1","s1") == 0
+        and constraint_network.tempvars_minimal_directed_distance("now","s2") == math.inf
+        and dist_e2 == 9
+        and set(constraint_network.temporal_inconsistency_explanation()) == set([("e1","now",4,False), ("s1","e1",-5,False), ("now","s1",0,False)])
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+
+def test29(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_objvars({
+        "v1":Domain(p_initial_allowed_values=["a","b","c"]),
+        "v2":Domain(p_initial_allowed_values=["a","b"]),
+        "v3":Domain(p_initial_allowed_values=["b","c"]),
+        "v4":Domain(p_initial_allowed_values=["a","b","c"]),
+    })
+    ts = time.perf_counter()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("v1","v2")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    cc1 = constraint_network.m_bcn.unifications.connected_component("v1")
+    forked = constraint_network.fork()
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("v2","v3")),
+        (ConstraintType.UNIFICATION,("v4","v3")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    cc2 = constraint_network.m_bcn.unifications.connected_component("v4")
+    res_fork = forked.propagate_constraints([
+        (ConstraintType.UNIFICATION,("v3","v4")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    constraint_network.backtrack()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2}".format(res, res2, res_fork))
+        print("time : {0}".format(es-ts))
+        print(cc1, cc2)
+    if (res == True and res2 == True and res_fork == True
+        and cc1 == set(["v1","v2"]) and cc2 == set(["v1","v2","v3","v4"])
+        and constraint_network.m_bcn.unifications.connected_component("v2") == set(["v1","v2"])
+        and constraint_network.m_bcn.unifications.connected_component("v3") == set(["v3"])
+        and constraint_network.objvars_unified("v1","v2")
+        and not constraint_network.objvars_unified("v2","v3")
+        and constraint_network.objvar_domain("v3").get_values() == set(["b","c"])
+        and forked.m_bcn.unifications.connected_component("v1") == set(["v1","v2"])
+        and forked.m_bcn.unifications.connected_component("v3") == set(["v3","v4"])
+        and not forked.objvars_unified("v1","v4")
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test30(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_objvars({
+        "v1":Domain(p_initial_allowed_values=[1,2,3,4]),
+        "v2":Domain(p_initial_allowed_values=[2,3,4,5]),
+        "v3":Domain(p_initial_allowed_values=[1,2,3,4,5]),
+        "v4":Domain(p_initial_allowed_values=[3,4,5]),
+        "v5":Domain(p_initial_allowed_values=[3]),
+    })
+    ts = time.perf_counter()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("v1","v2")),
+        (ConstraintType.UNIFICATION,("v2","v3")),
+        (ConstraintType.SEPARATION,("v4","v5")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    dom3 = constraint_network.objvar_domain("v3").get_values()
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("v3","v4")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    dom1 = constraint_network.objvar_domain("v1").get_values()
+    shared = constraint_network.objvar_domain("v1") is constraint_network.objvar_domain("v4")
+    res_ko = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LEQ,("v2",3)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    constraint_network.backtrack()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2}".format(res, res2, res_ko))
+        print("time : {0}".format(es-ts))
+        print(dom3, dom1)
+    if (res == True and res2 == True and res_ko == False
+        and dom3 == set([2,3,4]) and dom1 == set([4]) and shared
+        and constraint_network.objvar_domain("v1").get_values() == set([2,3,4])
+        and constraint_network.objvar_domain("v1") is constraint_network.objvar_domain("v3")
+        and constraint_network.objvar_domain("v4").get_values() == set([4,5])
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test31(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_objvars({
+        "v1":Domain(p_initial_allowed_values=["a","b","c"]),
+        "v2":Domain(p_initial_allowed_values=["a","b","c"]),
+        "v3":Domain(p_initial_allowed_values=["a","b","c"]),
+        "v4":Domain(p_initial_allowed_values=["a","b","c"]),
+        "v5":Domain(p_initial_allowed_values=["a","b","c"]),
+    })
+    ts = time.perf_counter()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("v1","v2")),
+        (ConstraintType.UNIFICATION,("v3","v4")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    unifiable_before = constraint_network.objvars_unifiable("v1","v4")
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.SEPARATION,("v2","v3")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    unifiable_after = constraint_network.objvars_unifiable("v1","v4")
+    res3 = constraint_network.propagate_constraints([
+        (ConstraintType.UNIFICATION,("v4","v5")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    unifiable_merged = constraint_network.objvars_unifiable("v5","v1")
+    constraint_network.backtrack()
+    constraint_network.backtrack()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2}".format(res, res2, res3))
+        print("time : {0}".format(es-ts))
+        print(constraint_network.m_bcn.class_separations)
+    if (res == True and res2 == True and res3 == True
+        and unifiable_before and not unifiable_after and not unifiable_merged
+        and constraint_network.objvars_unifiable("v1","v4")
+        and constraint_network.objvars_unifiable("v5","v1")
+        and constraint_network.objvars_unified("v2","v1")
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test32(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_objvars({
+        "v1":Domain(p_initial_allowed_values=[1,2,3,4]),
+        "v2":Domain(p_initial_allowed_values=[1,2]),
+        "v3":Domain(p_initial_allowed_values=[3,4]),
+        "v4":Domain(p_initial_allowed_values=[1,2,3,4]),
+    })
+    ts = time.perf_counter()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.DISJ_UNIFICATION,("v1",["v2","v3"])),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.GENERAL_RELATION,("rel",(["v1","v4"],[(1,4),(3,2),(4,1)]))),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    owners = dict(constraint_network.m_bcn.disj_unification_owners)
+    relations = dict(constraint_network.m_bcn.general_relations_by_var)
+    # v3 -> {3}, so v1 -> {1,3} (through the disjunctive unification), so v4 -> {2,4} (through the relation)
+    res3 = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LEQ,("v3",3)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    dom4 = constraint_network.objvar_domain("v4").get_values()
+    constraint_network.backtrack()
+    constraint_network.backtrack()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2}".format(res, res2, res3))
+        print("time : {0}".format(es-ts))
+        print(owners, relations, dom4)
+    if (res == True and res2 == True and res3 == True
+        and owners == {"v2":set(["v1"]), "v3":set(["v1"])}
+        and relations == {"v1":set(["rel"]), "v4":set(["rel"])}
+        and dom4 == set([2,4])
+        and constraint_network.m_bcn.general_relations_by_var == {}
+        and constraint_network.m_bcn.disj_unification_owners == {"v2":set(["v1"]), "v3":set(["v1"])}
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test33(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_objvars({
+        "v1":Domain(p_initial_allowed_values=[1,2,3]),
+        "v2":Domain(p_initial_allowed_values=[1,2,3]),
+        "v3":Domain(p_initial_allowed_values=[1,2,3]),
+    })
+    ts = time.perf_counter()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LEQ,("v1",2)),
+        (ConstraintType.DOMAIN_VAL_GEQ,("v3",2)),
+        (ConstraintType.SEPARATION,("v1","v3")),
+        (ConstraintType.SEPARATION,("v3","v1")),
+        (ConstraintType.GENERAL_RELATION,("rel1",(["v1","v2"],[(1,1),(2,2),(3,3)]))),
+        (ConstraintType.GENERAL_RELATION,("rel2",(["v2","v3"],[(1,2),(2,3),(3,1)]))),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0}".format(res))
+        print("time : {0}".format(es-ts))
+        print(constraint_network.m_bcn.general_relations)
+    # (relations queued again for revision don't add their rows to their own table again)
+    if (res == True
+        and constraint_network.objvar_domain("v1").get_values() == set([1,2])
+        and constraint_network.objvar_domain("v3").get_values() == set([2,3])
+        and sorted(constraint_network.m_bcn.general_relations["rel1"][1]) == [(1,1),(2,2)]
+        and sorted(constraint_network.m_bcn.general_relations["rel2"][1]) == [(1,2),(2,3)]
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test34(verbose=False):
+
+    reset_constraint_network()
+    constraint_network.init_objvars({
+        "v1":Domain(p_initial_allowed_values=[1,2,3]),
+        "v2":Domain(p_initial_allowed_values=["a","b","c"]),
+        "v3":Domain(p_initial_allowed_values=[True,False]),
+    })
+    ts = time.perf_counter()
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.GENERAL_RELATION,("rel",(["v1","v2","v3"],[(1,"a",True),(2,"a",False),(2,"b",True),(3,"c",False),(4,"c",True)]))),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    rows = sorted(constraint_network.m_bcn.general_relations["rel"][1], key=str)
+    forked = constraint_network.fork()
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LEQ,("v1",2)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    res3 = constraint_network.propagate_constraints([
+        (ConstraintType.GENERAL_RELATION,("rel",(["v1","v2","v3"],[]))),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    dom2 = constraint_network.objvar_domain("v2").get_values()
+    res_fork = forked.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_GEQ,("v1",3)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    constraint_network.backtrack()
+    constraint_network.backtrack()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2} {3}".format(res, res2, res3, res_fork))
+        print("time : {0}".format(es-ts))
+        print(rows, dom2)
+    if (res == True and res2 == True and res3 == True and res_fork == True
+        and rows == [(1,"a",True),(2,"a",False),(2,"b",True),(3,"c",False)]
+        and dom2 == set(["a","b"])
+        and len(constraint_network.m_bcn.general_relations["rel"][1]) == 4
+        and constraint_network.objvar_domain("v2").get_values() == set(["a","b","c"])
+        and list(forked.m_bcn.general_relations["rel"][1]) == [(3,"c",False)]
+        and forked.objvar_domain("v3").get_values() == set([False])
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+def test35(verbose=False):
+
+    reset_constraint_network()
+    params = ["p{0}".format(i) for i in range(6)]
+    constraint_network.init_objvars({ p:Domain(p_initial_allowed_values=list(range(15))) for p in params })
+    constraint_network.init_objvars({ "q1":Domain(p_initial_allowed_values=[1,2]), "q2":Domain(p_initial_allowed_values=[1,2]) })
+    ts = time.perf_counter()
+    # 15^6 rows, never enumerated
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.GENERAL_RELATION,("big_rel",(params,FactorizedTable([list(range(10))]*6)))),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.GENERAL_RELATION,("small_rel",(["q1","q2"],FactorizedTable([[1,2],[1,2,3]],[(1,1),(1,2)])))),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    rows = sorted(constraint_network.m_bcn.general_relations["small_rel"][1])
+    constraint_network.backtrack()
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1}".format(res, res2))
+        print("time : {0}".format(es-ts))
+        print(rows)
+    if (res == True and res2 == True
+        and all(constraint_network.objvar_domain(p).get_values() == set(range(10)) for p in params)
+        and len(constraint_network.m_bcn.general_relations["big_rel"][1]) == 10**6
+        and rows == [(2,1),(2,2)]
+        and "small_rel" not in constraint_network.m_bcn.general_relations
+        and constraint_network.objvar_domain("q1").get_values() == set([1,2])
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+# weight table : bound variables narrowed in the bcn only, then a reverted propagation (probe) refreshing the weights
+def test36(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_tempvars({"t0":True,"t1":True,"t2":True})
+    constraint_network.init_objvars({
+        "var1":Domain(p_initial_allowed_values=[3,9]),
+    })
+    ts = time.perf_counter()
+    res1 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t0","var1",False)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    res2 = constraint_network.propagate_constraints([
+        (ConstraintType.DOMAIN_VAL_LEQ,("var1",5)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    res3 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t2",0,False)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=True)
+    res4 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t2","t1",1,False)),
+        (ConstraintType.TEMPORAL,("t0","t2",-6,False)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    # (the weight refreshed by the reverted propagation is refreshed again)
+    res5 = constraint_network.propagate_constraints([
+        (ConstraintType.TEMPORAL,("t1","t2",0,False)),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0} {1} {2} {3} {4}".format(res1, res2, res3, res4, res5))
+        print("time : {0}".format(es-ts))
+        print(constraint_network.m_stn.weights)
+    if (res1 == True and res2 == True and res3 == True and res4 == False and res5 == True
+        and constraint_network.objvar_domain("var1").get_values() == {3}
+        and constraint_network.m_stn.weights[("t0","t1")] == 3
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+
+# interval domains : only finite domains can be enumerated
+def test37(verbose=False):
+    
+    reset_constraint_network()
+    constraint_network.init_objvars({
+        "dur":Domain(DomainType.INTERVAL, p_bounds=(2.5,7.5)),
+        "steps":Domain(DomainType.INTERVAL, p_bounds=(1,3), p_integer=True),
+        "unbounded":Domain(DomainType.INTERVAL, p_bounds=(0,math.inf), p_integer=True),
+        "bounded":Domain(DomainType.INTERVAL, p_bounds=(0,10), p_integer=True),
+        "var1":Domain(p_initial_allowed_values=[3]),
+        "var2":Domain(p_initial_allowed_values=[3,math.inf]),
+    })
+    ts = time.perf_counter()
+    errors = []
+    for var in ["dur", "unbounded"]:
+        try:
+            constraint_network.objvar_domain(var).get_values()
+        except ValueError:
+            errors.append(var)
+    res = constraint_network.propagate_constraints([
+        (ConstraintType.SEPARATION,("var1","dur")),
+        # (an infinite value isn't in an integer interval domain)
+        (ConstraintType.UNIFICATION,("bounded","var2")),
+    ], p_backup=True, p_revert_on_failure=True, p_revert_on_success=False)
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("propagation successful ? : {0}".format(res))
+        print("time : {0}".format(es-ts))
+        print("domains which can't be enumerated : {0}".format(errors))
+    if (res == True and errors == ["dur", "unbounded"]
+        and constraint_network.objvar_domain("steps").get_values() == {1,2,3}
+        and constraint_network.objvar_domain("var2").get_values() == {3}
+        and not constraint_network.objvar_domain("unbounded").contains(math.inf)
+        and not constraint_network.objvars_unified("var1","dur")
+        and not constraint_network.objvars_unified("var1","unbounded")
+    ):
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
+
+# domain value constraints : strict (DOMAIN_VAL_LE / GE) and non strict (DOMAIN_VAL_LEQ / GEQ) restrictions, for all types of domains
+def test38(verbose=False):
+    
+    universe = DomainUniverse()
+    constrs = [
+        (ConstraintType.DOMAIN_VAL_LE,("var1",4)),
+        (ConstraintType.DOMAIN_VAL_LEQ,("var2",4)),
+        (ConstraintType.DOMAIN_VAL_GE,("var1",1)),
+        (ConstraintType.DOMAIN_VAL_GEQ,("var2",1)),
+    ]
+    results = []
+    ts = time.perf_counter()
+    for domain_type in [DomainType.DISCRETE, DomainType.BITSET, DomainType.INTERVAL]:
+        reset_constraint_network()
+        constraint_network.init_objvars({
+            "var1":Domain(domain_type, [0,1,2,3,4,5], universe, p_integer=True),
+            "var2":Domain(domain_type, [0,1,2,3,4,5], universe, p_integer=True),
+        })
+        res = constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
+        results.append((res, { v:constraint_network.objvar_domain(v).get_values() for v in ["var1","var2"] }))
+    es = time.perf_counter()
+    print("---")
+    if verbose:
+        print("input constraints : {0}".format(constrs))
+        print("results : {0}".format(results))
+        print("time : {0}".format(es-ts))
+    if results[0] == (True, {"var1":{2,3}, "var2":{1,2,3,4}}) and results[0] == results[1] and results[0] == results[2]:
+        print(f"{bcolors.OKGREEN}SUCCESS !{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.FAIL}FAILURE !{bcolors.ENDC}")
+    print("---")
+
 
 test1()
 test2()
@@ -600,3 +1538,25 @@ test13()
 test14()
 test15()
 test16()
+test17()
+test18()
+test19()
+test20()
+test21()
+test22()
+test23()
+test24()
+test25()
+test26()
+test27()
+test28()
+test29()
+test30()
+test31()
+test32()
+test33()
+test34()
+test35()
+test36()
+test37()
+test38()
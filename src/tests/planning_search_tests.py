@@ -188,11 +188,11 @@ def test1(verbose=False):
 
     ok = root_chronicle.m_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
 
-    root_chronicle.m_assertions[asrt1] = True
+    root_chronicle.add_assertion(asrt1, True)
     root_chronicle.m_goal_nodes.setdefault(asrt1, GoalNode()).m_mode = GoalMode.COMMITTED
     root_chronicle.m_causal_network[asrt1] = None
 
-    root_chronicle.m_assertions[asrt2] = False
+    root_chronicle.add_assertion(asrt2, False)
     root_chronicle.m_goal_nodes.setdefault(asrt2, GoalNode()).m_mode = GoalMode.SELECTED
 
     #root_chronicle.m_constraint_network.init_tempvars({"t_now": True})
@@ -372,11 +372,11 @@ def test2(verbose=False):
 
     ok = root_chronicle.m_constraint_network.propagate_constraints(constrs, p_backup=False, p_revert_on_failure=False, p_revert_on_success=False)
 
-    root_chronicle.m_assertions[asrt1] = True
+    root_chronicle.add_assertion(asrt1, True)
     root_chronicle.m_goal_nodes.setdefault(asrt1, GoalNode()).m_mode = GoalMode.COMMITTED
     root_chronicle.m_causal_network[asrt1] = None
 
-    root_chronicle.m_assertions[asrt2] = False
+    root_chronicle.add_assertion(asrt2, False)
     root_chronicle.m_goal_nodes.setdefault(asrt2, GoalNode()).m_mode = GoalMode.SELECTED
 
     #root_chronicle.m_constraint_network.init_tempvars({"t_now": True})
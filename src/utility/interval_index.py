@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import sys
+sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
+
+import typing
+import heapq
+from src.utility.persistent_map import PersistentMap
+
+############################################
+
+# NOTE: Interval Index, 18 / 10 / 2022
+
+# An index of (closed) intervals [lower bound, upper bound] associated to items, used to find the pairs of items whose intervals intersect
+# (e.g. assertions whose temporal windows intersect, see Chronicle) without examining all the pairs of items.
+
+# Intersections are found with a sweep line : the bounds of the intervals are sorted, and swept in increasing order,
+# while maintaining the set of "active" intervals (whose lower bound was swept, but not their upper bound yet).
+# When an interval becomes active, it intersects exactly the intervals which are already active.
+# For A intervals in the index, q query intervals and k intersecting pairs, a query costs O((A + q) log(A + q) + k).
+# The sorted bounds of the intervals of the index are kept between queries, and only sorted again after a change
+# (which is cheap if few intervals changed, as the previous order is used as a starting point).
+# The intervals are kept in a persistent map (see src.utility.persistent_map), so that copying an index is constant time.
+
+# Lower bounds are swept before upper bounds at equal values, so that intervals which only share a bound intersect.
+# Bounds can be infinite. Empty intervals (lower bound greater than upper bound) don't intersect anything.
+
+############################################
+
+class IntervalIndex():
+
+    def __init__(self):
+        self._intervals:PersistentMap = PersistentMap()
+        # bounds of the intervals (value, 0 for a lower bound / 1 for an upper bound, item), sorted (None if they need to be sorted again)
+        self._bounds:typing.List[typing.Tuple[float,int,typing.Hashable]]|None = []
+        # previous order of the bounds, used as a starting point to sort them again
+        self._previous_bounds:typing.List[typing.Tuple[float,int,typing.Hashable]] = []
+
+    def __getitem__(self, p_item:typing.Hashable) -> typing.Tuple[float,float]:
+        return self._intervals[p_item]
+
+    def __contains__(self, p_item:typing.Hashable) -> bool:
+        return p_item in self._intervals
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __repr__(self) -> str:
+        return repr(self._intervals)
+
+    def copy(self) -> IntervalIndex:
+        res = IntervalIndex()
+        res._intervals = self._intervals.copy()
+        # the lists of bounds are replaced (never modified), so they can be shared
+        res._bounds = self._bounds
+        res._previous_bounds = self._previous_bounds
+        return res
+
+    def set(self, p_item:typing.Hashable, p_lower_bound:float, p_upper_bound:float) -> None:
+        """
+        Associates the interval [p_lower_bound, p_upper_bound] to the specified item (replacing its previous interval, if any).
+        """
+        if self._intervals.get(p_item) == (p_lower_bound, p_upper_bound):
+            return
+        self._intervals[p_item] = (p_lower_bound, p_upper_bound)
+        if self._bounds is not None:
+            self._previous_bounds = self._bounds
+            self._bounds = None
+
+    def remove(self, p_item:typing.Hashable) -> None:
+
+        if p_item in self._intervals:
+            del self._intervals[p_item]
+            if self._bounds is not None:
+                self._previous_bounds = self._bounds
+                self._bounds = None
+
+    def _sorted_bounds(self) -> typing.List[typing.Tuple[float,int,typing.Hashable]]:
+
+        if self._bounds is None:
+            # the bounds are listed in their previous order (followed by the bounds of new items) before being sorted
+            # (items are never compared, as an item has only one lower and one upper bound)
+            intervals = dict(self._intervals.items())
+            listed = set()
+            bounds = []
+            for (_, kind, item) in self._previous_bounds:
+                if item in intervals:
+                    bounds.append((intervals[item][kind], kind, item))
+                    listed.add(item)
+            for (item, (lb, ub)) in intervals.items():
+                if item not in listed:
+                    bounds.append((lb, 0, item))
+                    bounds.append((ub, 1, item))
+            # empty intervals don't intersect anything
+            bounds = [bound for bound in bounds if intervals[bound[2]][0] <= intervals[bound[2]][1]]
+            bounds.sort(key=lambda bound: (bound[0], bound[1]))
+            self._bounds = bounds
+        return self._bounds
+
+    def intersecting(
+        self,
+        p_queries:typing.Mapping[typing.Hashable,typing.Tuple[float,float]],
+    ) -> typing.Iterator[typing.Tuple[typing.Hashable,typing.Hashable]]:
+        """
+        Finds the items of the index whose intervals intersect the specified query intervals, with a single sweep.
+        Arguments:
+            p_queries (Mapping[Hashable,(float,float)]): query intervals (lower bound, upper bound), by key
+                (the keys can be items of the index, as they are kept apart from them)
+        Returns:
+            An iterator over the pairs (key of a query interval, item of the index) whose intervals intersect
+        Side effects:
+            Refreshes the cached sorted bounds of the intervals of the index, if they changed since the last query
+        """
+        query_bounds = []
+        for (key, (lb, ub)) in p_queries.items():
+            if lb <= ub:
+                query_bounds.append((lb, 0, key))
+                query_bounds.append((ub, 1, key))
+        query_bounds.sort(key=lambda bound: (bound[0], bound[1]))
+
+        active_items:typing.Dict[typing.Hashable,None] = {}
+        active_queries:typing.Dict[typing.Hashable,None] = {}
+        # bounds of the index (False) and of the queries (True), merged in a single sorted sequence
+        for (_, kind, elem, is_query) in heapq.merge(
+            ((value, kind, item, False) for (value, kind, item) in self._sorted_bounds()),
+            ((value, kind, key, True) for (value, kind, key) in query_bounds),
+            key=lambda bound: (bound[0], bound[1]),
+        ):
+            if is_query:
+                if kind == 0:
+                    for item in active_items:
+                        yield (elem, item)
+                    active_queries[elem] = None
+                else:
+                    del active_queries[elem]
+            else:
+                if kind == 0:
+                    for key in active_queries:
+                        yield (key, elem)
+                    active_items[elem] = None
+                else:
+                    del active_items[elem]
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import sys
+sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
+
+import typing
+from collections.abc import ItemsView, Mapping, MutableMapping, MutableSet, ValuesView
+
+############################################
+
+# NOTE: Persistent Map, 18 / 10 / 2022
+
+# Maps and sets sharing their structure with their copies, so that copying them is constant time
+# (used for the collections of chronicles, which are copied for each child of a search node, see Chronicle.copy_chronicle).
+
+# They are hash array mapped tries (HAMT) : the hash of a key is split in chunks of 5 bits, each chunk selecting one of (at most) 32 entries
+# in a node of the trie, until the entry is a (hash, key, value) leaf. Only the non empty entries of a node are stored, in a list,
+# along with a bitmap of the chunks they correspond to. Keys whose hashes are equal are stored in a "collision" node.
+
+# A copy shares the whole trie with the original. The nodes of the trie are then never modified in place : a modification copies
+# the nodes on the path from the root to the modified entry (at most 13 nodes of at most 32 entries for 64 bit hashes), and the other nodes are shared.
+# Each map (or set) has an owner token, recorded in the nodes it copied, and renewed when the map is copied : a map modifies
+# in place the nodes it owns, which no other map can reach. Successive modifications of a map between copies are thus as cheap as possible,
+# and a copy only pays for its own modifications.
+
+# The values of a map can also be mutable objects (e.g. goal nodes of a chronicle), copied (with the function given to the map)
+# the first time they are accessed through the map after a copy. They can then be modified in place, without affecting the other copies of the map.
+
+# Both classes implement the standard (mutable) mapping and set interfaces, and can be used in place of dict and set.
+
+############################################
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = (1 << 64) - 1
+
+class _Node():
+    __slots__ = ("_bitmap", "_entries", "_owner")
+
+    def __init__(self, p_bitmap:int, p_entries:typing.List, p_owner:object):
+        self._bitmap = p_bitmap
+        # leaves (hash, key, value, owner of the value) or sub-nodes (_Node or _CollisionNode)
+        self._entries = p_entries
+        self._owner = p_owner
+
+class _CollisionNode():
+    __slots__ = ("_hash", "_entries", "_owner")
+
+    def __init__(self, p_hash:int, p_entries:typing.List, p_owner:object):
+        self._hash = p_hash
+        # leaves (hash, key, value, owner of the value), all with the same hash
+        self._entries = p_entries
+        self._owner = p_owner
+
+def _entry_hash(p_entry) -> int:
+    return p_entry[0] if type(p_entry) is tuple else p_entry._hash
+
+def _merge(p_entry1, p_entry2, p_shift:int, p_owner:object):
+    """
+    Returns a node containing both specified entries (leaves or collision nodes), whose hashes are equal up to p_shift bits.
+    """
+    hash1 = _entry_hash(p_entry1)
+    hash2 = _entry_hash(p_entry2)
+    if hash1 == hash2:
+        # (only leaves can have the same hash, as a collision node is never merged with a leaf of the same hash)
+        return _CollisionNode(hash1, [p_entry1, p_entry2], p_owner)
+    chunk1 = (hash1 >> p_shift) & _MASK
+    chunk2 = (hash2 >> p_shift) & _MASK
+    if chunk1 == chunk2:
+        return _Node(1 << chunk1, [_merge(p_entry1, p_entry2, p_shift + _BITS, p_owner)], p_owner)
+    if chunk1 < chunk2:
+        return _Node((1 << chunk1) | (1 << chunk2), [p_entry1, p_entry2], p_owner)
+    return _Node((1 << chunk1) | (1 << chunk2), [p_entry2, p_entry1], p_owner)
+
+def _lookup(p_node:_Node, p_hash:int, p_key:typing.Hashable):
+    """
+    Returns the leaf of the specified key in the trie rooted in p_node, or None if there is none.
+    """
+    node = p_node
+    shift = 0
+    while True:
+        bit = 1 << ((p_hash >> shift) & _MASK)
+        bitmap = node._bitmap
+        if not bitmap & bit:
+            return None
+        entry = node._entries[(bitmap & (bit - 1)).bit_count()]
+        entry_type = type(entry)
+        if entry_type is tuple:
+            if entry[0] == p_hash and (entry[1] is p_key or entry[1] == p_key):
+                return entry
+            return None
+        if entry_type is _CollisionNode:
+            if entry._hash == p_hash:
+                for leaf in entry._entries:
+                    if leaf[1] is p_key or leaf[1] == p_key:
+                        return leaf
+            return None
+        node = entry
+        shift += _BITS
+
+def _assoc(p_node, p_shift:int, p_leaf:typing.Tuple, p_owner:object) -> typing.Tuple[typing.Any,bool]:
+    """
+    Returns the node resulting from the insertion of p_leaf in p_node (p_node itself if it is owned by p_owner,
+    a copy owned by p_owner otherwise) and whether the key of p_leaf wasn't already in p_node.
+    """
+    if type(p_node) is _CollisionNode:
+        entries = p_node._entries
+        for i in range(len(entries)):
+            if entries[i][1] is p_leaf[1] or entries[i][1] == p_leaf[1]:
+                if p_node._owner is not p_owner:
+                    p_node = _CollisionNode(p_node._hash, entries.copy(), p_owner)
+                p_node._entries[i] = p_leaf
+                return (p_node, False)
+        if p_node._owner is not p_owner:
+            p_node = _CollisionNode(p_node._hash, entries.copy(), p_owner)
+        p_node._entries.append(p_leaf)
+        return (p_node, True)
+
+    bit = 1 << ((p_leaf[0] >> p_shift) & _MASK)
+    index = (p_node._bitmap & (bit - 1)).bit_count()
+
+    if not p_node._bitmap & bit:
+        if p_node._owner is not p_owner:
+            p_node = _Node(p_node._bitmap, p_node._entries.copy(), p_owner)
+        p_node._bitmap |= bit
+        p_node._entries.insert(index, p_leaf)
+        return (p_node, True)
+
+    entry = p_node._entries[index]
+    added = True
+    if type(entry) is tuple:
+        if entry[0] == p_leaf[0] and (entry[1] is p_leaf[1] or entry[1] == p_leaf[1]):
+            new_entry = p_leaf
+            added = False
+        else:
+            new_entry = _merge(entry, p_leaf, p_shift + _BITS, p_owner)
+    elif type(entry) is _CollisionNode and entry._hash != p_leaf[0]:
+        new_entry = _merge(entry, p_leaf, p_shift + _BITS, p_owner)
+    else:
+        (new_entry, added) = _assoc(entry, p_shift + _BITS, p_leaf, p_owner)
+        if new_entry is entry:
+            # modified in place (so p_node is owned by p_owner too)
+            return (p_node, added)
+    if p_node._owner is not p_owner:
+        p_node = _Node(p_node._bitmap, p_node._entries.copy(), p_owner)
+    p_node._entries[index] = new_entry
+    return (p_node, added)
+
+def _dissoc(p_node, p_shift:int, p_hash:int, p_key:typing.Hashable, p_owner:object) -> typing.Tuple[typing.Any,bool]:
+    """
+    Returns the entry resulting from the removal of p_key from p_node (p_node itself or a copy owned by p_owner,
+    or its only remaining leaf if it isn't the root, or None if it is empty) and whether p_key was in p_node.
+    """
+    if type(p_node) is _CollisionNode:
+        entries = p_node._entries
+        for i in range(len(entries)):
+            if entries[i][1] is p_key or entries[i][1] == p_key:
+                if len(entries) == 2:
+                    return (entries[1 - i], True)
+                if p_node._owner is not p_owner:
+                    p_node = _CollisionNode(p_node._hash, entries.copy(), p_owner)
+                del p_node._entries[i]
+                return (p_node, True)
+        return (p_node, False)
+
+    bit = 1 << ((p_hash >> p_shift) & _MASK)
+    if not p_node._bitmap & bit:
+        return (p_node, False)
+    index = (p_node._bitmap & (bit - 1)).bit_count()
+
+    entry = p_node._entries[index]
+    if type(entry) is tuple:
+        if not (entry[0] == p_hash and (entry[1] is p_key or entry[1] == p_key)):
+            return (p_node, False)
+        new_entry = None
+    else:
+        (new_entry, removed) = _dissoc(entry, p_shift + _BITS, p_hash, p_key, p_owner)
+        if not removed:
+            return (p_node, False)
+        if new_entry is entry:
+            return (p_node, True)
+
+    if new_entry is None:
+        if p_shift > 0:
+            if len(p_node._entries) == 1:
+                return (None, True)
+            if len(p_node._entries) == 2 and type(p_node._entries[1 - index]) is not _Node:
+                # the remaining leaf (or collision node) replaces this node in its parent
+                return (p_node._entries[1 - index], True)
+        if p_node._owner is not p_owner:
+            p_node = _Node(p_node._bitmap, p_node._entries.copy(), p_owner)
+        p_node._bitmap &= ~bit
+        del p_node._entries[index]
+        return (p_node, True)
+
+    if p_shift > 0 and len(p_node._entries) == 1 and type(new_entry) is not _Node:
+        return (new_entry, True)
+    if p_node._owner is not p_owner:
+        p_node = _Node(p_node._bitmap, p_node._entries.copy(), p_owner)
+    p_node._entries[index] = new_entry
+    return (p_node, True)
+
+def _leaves(p_node:_Node) -> typing.Iterator[typing.Tuple]:
+
+    stack = [iter(p_node._entries)]
+    while stack:
+        for entry in stack[-1]:
+            if type(entry) is tuple:
+                yield entry
+            else:
+                stack.append(iter(entry._entries))
+                break
+        else:
+            stack.pop()
+
+############################################
+
+class PersistentMap(MutableMapping):
+
+    def __init__(
+        self,
+        p_items:typing.Iterable[typing.Tuple[typing.Hashable,typing.Any]]|typing.Mapping=(),
+        p_copy_value:typing.Callable[[typing.Any],typing.Any]|None=None,
+    ):
+        """
+        Arguments:
+            p_items (Iterable[(key, value)] | Mapping, empty by default):
+                Initial items of the map
+            p_copy_value (Callable[[value],value] | None, None by default):
+                Function copying a value, if the values are mutable. A value is then copied the first time it is accessed
+                through the map after the map was copied (so that it can be modified in place without affecting the other copies).
+        """
+        self._owner = object()
+        self._root = _Node(0, [], self._owner)
+        self._size = 0
+        self._copy_value = p_copy_value
+        if isinstance(p_items, Mapping):
+            p_items = p_items.items()
+        for (key, value) in p_items:
+            self[key] = value
+
+    def copy(self) -> PersistentMap:
+        """
+        Returns a copy of this map (in constant time, as it shares the structure of this map).
+        """
+        res = PersistentMap(p_copy_value=self._copy_value)
+        res._root = self._root
+        res._size = self._size
+        # the nodes (and values) owned by this map are now shared with the copy, so they can't be modified in place anymore
+        self._owner = object()
+        return res
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, p_key:object) -> bool:
+        return _lookup(self._root, hash(p_key) & _HASH_MASK, p_key) is not None
+
+    def _value(self, p_leaf:typing.Tuple) -> typing.Any:
+
+        if self._copy_value is None or p_leaf[3] is self._owner:
+            return p_leaf[2]
+        # the value may be shared with other copies of the map
+        value = self._copy_value(p_leaf[2])
+        (self._root, _) = _assoc(self._root, 0, (p_leaf[0], p_leaf[1], value, self._owner), self._owner)
+        return value
+
+    def __getitem__(self, p_key:typing.Hashable) -> typing.Any:
+
+        leaf = _lookup(self._root, hash(p_key) & _HASH_MASK, p_key)
+        if leaf is None:
+            raise KeyError(p_key)
+        return self._value(leaf)
+
+    def get(self, p_key:typing.Hashable, p_default:typing.Any=None) -> typing.Any:
+
+        leaf = _lookup(self._root, hash(p_key) & _HASH_MASK, p_key)
+        if leaf is None:
+            return p_default
+        return self._value(leaf)
+
+    def setdefault(self, p_key:typing.Hashable, p_default:typing.Any=None) -> typing.Any:
+
+        leaf = _lookup(self._root, hash(p_key) & _HASH_MASK, p_key)
+        if leaf is None:
+            self[p_key] = p_default
+            return p_default
+        return self._value(leaf)
+
+    def __setitem__(self, p_key:typing.Hashable, p_value:typing.Any) -> None:
+
+        (self._root, added) = _assoc(self._root, 0, (hash(p_key) & _HASH_MASK, p_key, p_value, self._owner), self._owner)
+        if added:
+            self._size += 1
+
+    def __delitem__(self, p_key:typing.Hashable) -> None:
+
+        (self._root, removed) = _dissoc(self._root, 0, hash(p_key) & _HASH_MASK, p_key, self._owner)
+        if not removed:
+            raise KeyError(p_key)
+        self._size -= 1
+
+    def __iter__(self) -> typing.Iterator[typing.Hashable]:
+        for leaf in _leaves(self._root):
+            yield leaf[1]
+
+    def items(self) -> ItemsView:
+        return _ItemsView(self)
+
+    def values(self) -> ValuesView:
+        return _ValuesView(self)
+
+    def __repr__(self) -> str:
+        return "PersistentMap({" + ", ".join("{0!r}: {1!r}".format(leaf[1], leaf[2]) for leaf in _leaves(self._root)) + "})"
+
+class _ItemsView(ItemsView):
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[typing.Hashable,typing.Any]]:
+        # (values read from the leaves directly, unless they have to be copied)
+        if self._mapping._copy_value is not None:
+            yield from super().__iter__()
+        else:
+            for leaf in _leaves(self._mapping._root):
+                yield (leaf[1], leaf[2])
+
+class _ValuesView(ValuesView):
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        if self._mapping._copy_value is not None:
+            yield from super().__iter__()
+        else:
+            for leaf in _leaves(self._mapping._root):
+                yield leaf[2]
+
+class PersistentSet(MutableSet):
+
+    def __init__(self, p_elements:typing.Iterable[typing.Hashable]=()):
+        self._map:PersistentMap = PersistentMap()
+        self.update(p_elements)
+
+    def copy(self) -> PersistentSet:
+        """
+        Returns a copy of this set (in constant time, as it shares the structure of this set).
+        """
+        res = PersistentSet()
+        res._map = self._map.copy()
+        return res
+
+    @classmethod
+    def _from_iterable(cls, p_elements:typing.Iterable[typing.Hashable]) -> PersistentSet:
+        return cls(p_elements)
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def __contains__(self, p_element:object) -> bool:
+        return p_element in self._map
+
+    def __iter__(self) -> typing.Iterator[typing.Hashable]:
+        return iter(self._map)
+
+    def add(self, p_element:typing.Hashable) -> None:
+        self._map[p_element] = None
+
+    def discard(self, p_element:typing.Hashable) -> None:
+        if p_element in self._map:
+            del self._map[p_element]
+
+    def update(self, p_elements:typing.Iterable[typing.Hashable]) -> None:
+        # (through add and discard only, so that subclasses can maintain indexes of the elements)
+        for element in p_elements:
+            self.add(element)
+
+    def difference_update(self, p_elements:typing.Iterable[typing.Hashable]) -> None:
+        for element in p_elements:
+            self.discard(element)
+
+    def __repr__(self) -> str:
+        return "PersistentSet({" + ", ".join(repr(element) for element in self) + "})"
@@ -0,0 +1,122 @@
+import sys
+sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
+
+import typing
+from enum import Enum
+
+############################################
+
+# NOTE: Trail, 18 / 10 / 2022
+
+# A trail (undo log) allowing to backtrack changes made to (mutable) structures.
+# Each mutation made through the trail records how to undo it, and backups are simple markers (levels) in the trail.
+# As such, backing up costs O(1), and backtracking costs O(number of changes made since the backup),
+# instead of copying the whole structures on each backup.
+
+# Changes made when there is no backup level are not recorded, as there is nothing to backtrack to.
+
+# Records only reference the modified structures (no functions), so objects holding a trail can still be deep copied.
+
+# Structures which are modified in place (and whose changes aren't recorded one by one) are instead copied before their first modification
+# at the current level (see save_once). This also allows to share such structures between copies ("forks") of an object :
+# after a fork, nothing is considered owned anymore, so both the original and the copy copy a shared structure before modifying it (copy-on-write).
+
+############################################
+
+class TrailEntryType(Enum):
+    SET_ITEM = 0    # (container, key, whether the key was present, previous value)
+    ADD = 1         # (set, element)
+    SET_ATTR = 2    # (object, attribute name, previous value)
+    CALL = 3        # (object, method name, arguments) : calls the method to undo a change
+
+class Trail():
+
+    def __init__(self):
+        self._entries:typing.List[typing.Tuple] = []
+        self._marks:typing.List[int] = []
+        # keys of the structures owned at each level, i.e. already saved at this level (see save_once)
+        # None means everything is owned (nothing to backtrack to and nothing shared with another object)
+        self._owned:typing.List[typing.Set|None] = [None]
+
+    @property
+    def level(self) -> int:
+        return len(self._marks)
+
+    def push_level(self) -> None:
+        self._marks.append(len(self._entries))
+        self._owned.append(set())
+
+    def pop_level(self) -> None:
+        """
+        Undoes (in reverse order) all the changes recorded since the last level was pushed, and removes this level.
+        Raises an IndexError if there is no level to backtrack to.
+        """
+        mark = self._marks.pop()
+        self._owned.pop()
+        while len(self._entries) > mark:
+            entry = self._entries.pop()
+            if entry[0] == TrailEntryType.SET_ITEM:
+                (_, container, key, had_key, old_value) = entry
+                if had_key:
+                    container[key] = old_value
+                else:
+                    del container[key]
+            elif entry[0] == TrailEntryType.ADD:
+                entry[1].discard(entry[2])
+            elif entry[0] == TrailEntryType.SET_ATTR:
+                setattr(entry[1], entry[2], entry[3])
+            elif entry[0] == TrailEntryType.CALL:
+                getattr(entry[1], entry[2])(*entry[3])
+
+    def clear(self) -> None:
+        self._entries = []
+        self._marks = []
+        self._owned = [None]
+
+    def share(self) -> None:
+        """
+        To be called when the structures of the object holding this trail get shared with another object (fork).
+        From now on, structures will be copied before their first modification, whatever the level.
+        """
+        self._owned = [set() for _ in self._owned]
+
+    def set_item(self, p_container:typing.MutableMapping, p_key, p_value) -> None:
+        if len(self._marks) > 0:
+            if p_key in p_container:
+                self._entries.append((TrailEntryType.SET_ITEM, p_container, p_key, True, p_container[p_key]))
+            else:
+                self._entries.append((TrailEntryType.SET_ITEM, p_container, p_key, False, None))
+        p_container[p_key] = p_value
+
+    def add(self, p_set:typing.Set, p_element) -> None:
+        if p_element not in p_set:
+            if len(self._marks) > 0:
+                self._entries.append((TrailEntryType.ADD, p_set, p_element))
+            p_set.add(p_element)
+
+    def set_attr(self, p_object:object, p_name:str, p_value) -> None:
+        if len(self._marks) > 0:
+            self._entries.append((TrailEntryType.SET_ATTR, p_object, p_name, getattr(p_object, p_name)))
+        setattr(p_object, p_name, p_value)
+
+    def record_call(self, p_object:object, p_method_name:str, *p_args) -> None:
+        if len(self._marks) > 0:
+            self._entries.append((TrailEntryType.CALL, p_object, p_method_name, p_args))
+
+    def save_once(self, p_key) -> bool:
+        """
+        Used to save a whole structure (identified by the specified key) the first time it is modified at the current level,
+        for structures which are modified in place and whose changes can't easily be recorded one by one.
+        The caller is expected to replace the structure by a copy (with set_item or set_attr) when True is returned.
+        Arguments:
+            p_key: key identifying the structure
+        Returns:
+            True if the structure isn't owned at the current level (i.e. must be copied by the caller before being modified), False otherwise
+        Side effects:
+            Marks the structure as owned at the current level
+        """
+        owned = self._owned[-1]
+        if owned is None or p_key in owned:
+            return False
+        owned.add(p_key)
+        return True
@@ -1,6 +1,260 @@
 import sys
 sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-playground7")
 
+import numpy as np
+
+############################################
+
+# NOTE: Union-Find (integer array), 18 / 10 / 2022
+
+# UnionFind4 is a variant of UnionFind2 whose elements are the integers 0..n-1, stored in a numpy array of parents
+# instead of dictionaries keyed by (string) names, with no set per component. Mapping names to integers (interning) is up to the caller.
+# Besides the usual (scalar) operations, it offers vectorized bulk operations (find_many, union_many, labels),
+# e.g. to load many unifications at once (initial chronicles, BCN) or to extract all connected components in one pass.
+
+# A root is always linked to a root with a smaller index (instead of using ranks). This way, union_many can link all the pairs
+# of a batch at once (each root taking the smallest root it is paired with), without creating cycles. Paths are compressed by find / find_many.
+
+############################################
+
+class UnionFind4:
+
+    def __init__(self, p_size:int=0):
+        self.parent_node = np.arange(p_size, dtype=np.int64)
+
+    @property
+    def size(self) -> int:
+        return len(self.parent_node)
+
+    def make_set(self, u):
+        """
+        Extends the elements to 0..max(u), each new element being a singleton set
+        (unlike UnionFind2, an existing element can't be separated from its component).
+        """
+        u = _as_index_array(u)
+        n = int(np.max(u)) + 1 if len(u) > 0 else 0
+        if n > self.size:
+            self.parent_node = np.concatenate((self.parent_node, np.arange(self.size, n, dtype=np.int64)))
+
+    def contains(self, u):
+
+        u = _as_index_array(u)
+        return bool(np.all((u >= 0) & (u < self.size)))
+
+    def find(self, k):
+
+        parent_node = self.parent_node
+        r = k
+        while parent_node[r] != r:
+            r = parent_node[r]
+        while parent_node[k] != r:
+            (parent_node[k], k) = (r, parent_node[k])
+        return int(r)
+
+    def find_many(self, u):
+        """
+        Returns the roots of the specified elements (as an array), compressing their paths.
+        """
+        u = _as_index_array(u)
+        parent_node = self.parent_node
+        roots = parent_node[u]
+        grand_parents = parent_node[roots]
+        while np.any(grand_parents != roots):
+            roots = grand_parents
+            grand_parents = parent_node[roots]
+        parent_node[u] = roots
+        return roots
+
+    def union(self, a, b):
+
+        x = self.find(a)
+        y = self.find(b)
+
+        if x < y:
+            self.parent_node[y] = x
+        elif y < x:
+            self.parent_node[x] = y
+
+    def union_many(self, a, b):
+        """
+        Unions the elements of a with the elements of b, pairwise.
+        """
+        a = _as_index_array(a)
+        b = _as_index_array(b)
+        while len(a) > 0:
+            x = self.find_many(a)
+            y = self.find_many(b)
+            mask = x != y
+            if not np.any(mask):
+                break
+            (a, b, x, y) = (a[mask], b[mask], x[mask], y[mask])
+            # each root is linked to the smallest (smaller) root it is paired with, which can't create a cycle
+            np.minimum.at(self.parent_node, np.maximum(x, y), np.minimum(x, y))
+
+    def add_and_union(self, a, b):
+
+        self.make_set([a, b])
+        self.union(a, b)
+
+    def labels(self):
+        """
+        Returns the root of each element (as an array), i.e. a label identifying its connected component.
+        """
+        return self.find_many(np.arange(self.size, dtype=np.int64))
+
+    def connected_component(self, a):
+
+        return set(np.flatnonzero(self.labels() == self.find(a)).tolist())
+
+    def connected_components(self):
+        """
+        Returns a dictionary associating to each root the elements of its connected component (as an array).
+        """
+        labels = self.labels()
+        order = np.argsort(labels, kind="stable")
+        (roots, starts) = np.unique(labels[order], return_index=True)
+        return dict(zip(roots.tolist(), np.split(order, starts[1:])))
+
+    def fork(self):
+
+        res = UnionFind4()
+        res.parent_node = self.parent_node.copy()
+        return res
+
+def _as_index_array(u):
+    if isinstance(u, np.ndarray):
+        return u.astype(np.int64, copy=False)
+    return np.fromiter(u, dtype=np.int64)
+
+############################################
+
+# NOTE: Union-Find (trailed), 18 / 10 / 2022
+
+# UnionFind3 is a variant of UnionFind2 whose changes can be recorded in a trail (see src.utility.trail), to be undone on backtracking.
+# To make this possible, find doesn't compress paths (union by rank alone keeps the trees' depth logarithmic),
+# and the connected components are stored as circular linked lists (each element points to the next element of its component)
+# instead of sets. This way, a union only changes a constant number of entries (parent, rank, and two "next" pointers),
+# so backing up costs O(1) and backtracking O(number of unions since the backup), instead of copying the whole union-find on each backup.
+# Forking (see fork) costs O(1) : the dictionaries are shared between the union-find and its fork, and copied (once) by whichever of them
+# is modified first (copy-on-write, like the structures shared by trail.share). Unlike with save_once, this is done once per fork rather than
+# once per level, as changes are recorded one by one. The copy is made through the trail, so backtracking past it shares the dictionaries again.
+# For the same reason, changes are recorded with the name of the modified dictionary rather than the dictionary itself, so that undoing them
+# never modifies a dictionary shared with a fork.
+
+############################################
+
+class UnionFind3:
+
+    def __init__(self):
+        self.parent_node = {}
+        self.rank = {}
+        # next element in the (circular) connected component of each element
+        self.next_node = {}
+        # whether the dictionaries are shared with a fork (and must be copied before being modified)
+        self._shared = False
+
+    def make_set(self, u, p_trail=None):
+        """
+        Creates a singleton set for each of the specified elements which isn't in the union-find yet
+        (unlike UnionFind2, an element can't be separated from its component).
+        """
+        for i in u:
+            if i not in self.parent_node:
+                self._own(p_trail)
+                self._set("parent_node", i, i, p_trail)
+                self._set("rank", i, 0, p_trail)
+                self._set("next_node", i, i, p_trail)
+
+    def contains(self, u):
+
+        for i in u:
+            if not i in self.parent_node:
+                return False
+        return True
+
+    def find(self, k):
+
+        parent_node = self.parent_node
+        while parent_node[k] != k:
+            k = parent_node[k]
+        return k
+
+    def union(self, a, b, p_trail=None):
+
+        x = self.find(a)
+        y = self.find(b)
+
+        if x == y:
+            return
+        self._own(p_trail)
+        if self.rank[x] > self.rank[y]:
+            (x, y) = (y, x)
+        self._set("parent_node", x, y, p_trail)
+        if self.rank[x] == self.rank[y]:
+            self._set("rank", y, self.rank[y] + 1, p_trail)
+        # splice the two circular lists together by swapping the successors of their roots
+        (next_x, next_y) = (self.next_node[x], self.next_node[y])
+        self._set("next_node", x, next_y, p_trail)
+        self._set("next_node", y, next_x, p_trail)
+
+    def add_and_union(self, a, b, p_trail=None):
+
+        self.make_set([a, b], p_trail)
+        self.union(a, b, p_trail)
+
+    def connected_component(self, a):
+
+        res = set([a])
+        i = self.next_node[a]
+        while i != a:
+            res.add(i)
+            i = self.next_node[i]
+        return res
+
+    def fork(self):
+        """
+        Returns a copy of this union-find, which can then be modified (and its changes recorded in another trail) independently.
+        The dictionaries are shared until either union-find is modified (copy-on-write).
+        """
+        res = UnionFind3()
+        res.parent_node = self.parent_node
+        res.rank = self.rank
+        res.next_node = self.next_node
+        res._shared = True
+        self._shared = True
+        return res
+
+    def _own(self, p_trail):
+        # copies the dictionaries before the first modification since the last fork (if they are still shared)
+        if not self._shared:
+            return
+        for name in ("parent_node", "rank", "next_node"):
+            if p_trail is None:
+                setattr(self, name, getattr(self, name).copy())
+            else:
+                p_trail.set_attr(self, name, getattr(self, name).copy())
+        if p_trail is None:
+            self._shared = False
+        else:
+            p_trail.set_attr(self, "_shared", False)
+
+    def _set(self, p_name, p_key, p_value, p_trail):
+        p_dict = getattr(self, p_name)
+        if p_trail is not None:
+            # the dictionary is designated by name, so that the change is undone on the dictionary owned at that time (see _undo_set)
+            p_trail.record_call(self, "_undo_set", p_name, p_key, p_key in p_dict, p_dict.get(p_key))
+        p_dict[p_key] = p_value
+
+    def _undo_set(self, p_name, p_key, p_had_key, p_old_value):
+        # the dictionaries may be shared with a fork made since the change : they must then be copied before being restored
+        if self._shared:
+            self._own(None)
+        p_dict = getattr(self, p_name)
+        if p_had_key:
+            p_dict[p_key] = p_old_value
+        else:
+            del p_dict[p_key]
+
 ############################################
 
 class UnionFind2:
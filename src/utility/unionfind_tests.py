@@ -3,7 +3,8 @@ sys.path.append("/home/nrealus/perso/latest/prog/ai-planning-sandbox/python-play
 
 import time
 import random
-from unionfind import UnionFind2, UnionFind1
+from unionfind import UnionFind4, UnionFind3, UnionFind2, UnionFind1
+from trail import Trail
 
 ############################################
 
@@ -11,6 +12,9 @@ def compare_connected_component_building():
 
     uf1 = UnionFind1()
     uf2 = UnionFind2()
+    uf3 = UnionFind3()
+    uf4 = UnionFind4()
+    trail = Trail()
 
     u = set([i for i in range(100000)])
     v1 = random.sample(u,10000)
@@ -20,6 +24,8 @@ def compare_connected_component_building():
 
     uf1.make_set(u)    
     uf2.make_set(u)
+    uf3.make_set(u)
+    uf4.make_set(u)
     
     print("--- uf1 ---")
 
@@ -93,3 +99,109 @@ def compare_connected_component_building():
         uf2.make_set([v3[i]])
     es = time.perf_counter()
     print("make set times {0}".format(es-ts))
+
+    print("--- uf3 ---")
+
+    ts = time.perf_counter()
+    trail.push_level()
+    for i in range(1,2500):
+        uf3.union(v1[i-1],v1[i],trail)
+        uf3.union(v2[i-1],v2[i],trail)
+        uf3.union(v3[i-1],v3[i],trail)
+    es = time.perf_counter()
+    print("unions time : {0}".format(es-ts))
+
+    ts = time.perf_counter()
+    for i in range(0,2500):
+        uf3.find(v1[i])
+        uf3.find(v2[i])
+        uf3.find(v3[i])
+    es = time.perf_counter()
+    print("finds time : {0}".format(es-ts))
+
+    ts = time.perf_counter()
+    uf3.connected_component(v1[random.randint(0,2500)])
+    uf3.connected_component(v2[random.randint(0,2500)])
+    uf3.connected_component(v3[random.randint(0,2500)])
+    es = time.perf_counter()
+    print("connected components time : {0}".format(es-ts))
+
+    ts = time.perf_counter()
+    uf3_fork = uf3.fork()
+    es = time.perf_counter()
+    print("fork time : {0}".format(es-ts))
+
+    ts = time.perf_counter()
+    trail.pop_level()
+    es = time.perf_counter()
+    print("backtrack time : {0}".format(es-ts))
+
+    print("--- uf4 ---")
+
+    ts = time.perf_counter()
+    uf4.union_many(v1[:2499],v1[1:2500])
+    uf4.union_many(v2[:2499],v2[1:2500])
+    uf4.union_many(v3[:2499],v3[1:2500])
+    es = time.perf_counter()
+    print("unions time : {0}".format(es-ts))
+
+    ts = time.perf_counter()
+    uf4.find_many(v1[:2500])
+    uf4.find_many(v2[:2500])
+    uf4.find_many(v3[:2500])
+    es = time.perf_counter()
+    print("finds time : {0}".format(es-ts))
+
+    ts = time.perf_counter()
+    uf4.connected_components()
+    es = time.perf_counter()
+    print("(all) connected components time : {0}".format(es-ts))
+
+def test_union_find4(verbose=False):
+    """
+    Checks that UnionFind4 (bulk operations) builds the same connected components as UnionFind2 (scalar operations), on random unions.
+    """
+    success = True
+    for seed in range(50):
+        rng = random.Random(seed)
+        n = rng.randint(1, 200)
+        uf2 = UnionFind2()
+        uf4 = UnionFind4()
+        uf2.make_set(range(n))
+        uf4.make_set(range(n))
+
+        for _ in range(rng.randint(1, 5)):
+            # random batches, with repeated elements and pairs of already unified elements
+            k = rng.randint(0, n)
+            a = [rng.randrange(n) for _ in range(k)]
+            b = [rng.randrange(n) for _ in range(k)]
+            for (x, y) in zip(a, b):
+                uf2.union(x, y)
+            if rng.random() < 0.5:
+                uf4.union_many(a, b)
+            else:
+                for (x, y) in zip(a, b):
+                    uf4.union(x, y)
+
+            expected = {}
+            for i in range(n):
+                expected.setdefault(uf2.find(i), set()).add(i)
+            expected = set(frozenset(c) for c in expected.values())
+
+            labels = uf4.labels().tolist()
+            roots = uf4.find_many(list(range(n))).tolist()
+            components = uf4.connected_components()
+            if (roots != labels
+                or any(labels[r] != r for r in labels)
+                or set(frozenset(c.tolist()) for c in components.values()) != expected
+                or any(labels[i] != r for (r, c) in components.items() for i in c.tolist())
+                or any(uf4.connected_component(i) != uf2.connected_component(i) for i in rng.sample(range(n), min(n, 10)))
+            ):
+                success = False
+                if verbose:
+                    print("mismatch (seed {0}) : {1} / {2}".format(seed, components, expected))
+
+    print("test_union_find4 : {0}".format("SUCCESS" if success else "FAILURE"))
+    return success
+
+test_union_find4()